@@ -0,0 +1,57 @@
+"""
+Cost of computing the Codex prompt_cache_key per request over a growing tool loop.
+
+Compares hashing the whole conversation (the previous scheme, which also gave
+every request a different key) with the prefix key cached per session.
+
+Usage: python bench/bench_codex_cache_key.py [--history 200] [--iterations 40]
+"""
+
+import argparse
+import hashlib
+import json
+import time
+
+from nanobot.providers.base import PromptMessages
+from nanobot.providers.openai_codex_provider import OpenAICodexProvider
+
+
+def _full_hash(messages: list[dict]) -> str:
+    raw = json.dumps(messages, ensure_ascii=True, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _conversation(history: int) -> PromptMessages:
+    messages = PromptMessages([{"role": "system", "content": "You are nanobot. " * 500}], session_key="cli:bench")
+    for i in range(history):
+        messages.append({"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i} " * 40})
+    return messages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--history", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=40)
+    args = parser.parse_args()
+
+    tools = [{"type": "function", "function": {"name": f"tool_{i}", "description": "d" * 200}} for i in range(20)]
+    provider = OpenAICodexProvider()
+    results = {}
+    for label in ("full history", "prefix"):
+        messages = _conversation(args.history)
+        instructions = messages[0]["content"]
+        keys = set()
+        start = time.perf_counter()
+        for i in range(args.iterations):
+            if label == "full history":
+                keys.add(_full_hash(messages))
+            else:
+                keys.add(provider._prompt_cache_key(messages, instructions, tools))
+            messages.append({"role": "tool", "tool_call_id": f"c{i}", "name": "exec", "content": "x" * 500})
+        results[label] = (time.perf_counter() - start) / args.iterations
+        print(f"{label:>12}: {results[label] * 1e6:9.1f} us/request, {len(keys)} distinct key(s)")
+    print(f"     speedup: {results['full history'] / results['prefix']:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
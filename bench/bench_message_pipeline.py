@@ -0,0 +1,74 @@
+"""
+Per-iteration provider overhead of a tool-call loop: plain lists vs PromptMessages.
+
+Builds the request kwargs the way LiteLLMProvider does on every iteration of
+a turn, without calling a model.
+
+Usage: python bench/bench_message_pipeline.py [--history 200] [--iterations 40] [--tools 20]
+"""
+
+import argparse
+import json
+import time
+
+from nanobot.providers.base import PromptMessages
+from nanobot.providers.litellm_provider import LiteLLMProvider
+
+
+def _history(count: int) -> list[dict]:
+    out = []
+    for i in range(count):
+        if i % 4 == 2:
+            out.append({"role": "assistant", "content": "", "tool_calls": [
+                {"id": f"c{i}", "type": "function", "function": {"name": "read_file", "arguments": "{}"}},
+            ]})
+        elif i % 4 == 3:
+            out.append({"role": "tool", "tool_call_id": f"c{i - 1}", "name": "read_file", "content": "x" * 200})
+        else:
+            out.append({"role": "user" if i % 4 == 0 else "assistant", "content": f"message {i} " * 20})
+    return out
+
+
+def _tools(count: int) -> list[dict]:
+    return [
+        {"type": "function", "function": {"name": f"tool_{i}", "description": "d" * 200,
+                                          "parameters": {"type": "object", "properties": {}}}}
+        for i in range(count)
+    ]
+
+
+def _run(provider: LiteLLMProvider, messages: list[dict], iterations: int, tools: int, cached: bool) -> float:
+    definitions = _tools(tools)
+    start = time.perf_counter()
+    for i in range(iterations):
+        provider._build_kwargs(messages, definitions if cached else _tools(tools), None, 1024, 0.1)
+        call = {"id": f"it{i}", "type": "function", "function": {"name": "exec", "arguments": json.dumps({"i": i})}}
+        messages.append({"role": "assistant", "content": "", "tool_calls": [call], "reasoning_content": None})
+        messages.append({"role": "tool", "tool_call_id": f"it{i}", "name": "exec", "content": "done"})
+    return (time.perf_counter() - start) / iterations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--history", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=40)
+    parser.add_argument("--tools", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    provider = LiteLLMProvider(default_model="anthropic/claude-opus-4-5")
+    system = {"role": "system", "content": "You are nanobot. " * 500}
+    before = min(
+        _run(provider, [system, *_history(args.history)], args.iterations, args.tools, cached=False)
+        for _ in range(args.repeat)
+    )
+    after = min(
+        _run(provider, PromptMessages([system, *_history(args.history)]), args.iterations, args.tools, cached=True)
+        for _ in range(args.repeat)
+    )
+    print(f"plain list + rebuilt tools: {before * 1e6:8.1f} us/iteration")
+    print(f"PromptMessages + cached:    {after * 1e6:8.1f} us/iteration  ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Per-call client overhead of LiteLLMProvider vs the direct OpenAI-compatible path.
+
+Both providers talk to a local mock chat-completions server that answers
+instantly, so the difference is the time spent in the client stack.
+
+Usage: python bench/bench_provider_overhead.py [--calls 200] [--history 40] [--stream]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from nanobot.providers.custom_provider import CustomProvider  # noqa: E402
+from nanobot.providers.litellm_provider import LiteLLMProvider  # noqa: E402
+from nanobot.providers.registry import find_by_name  # noqa: E402
+from tests.conftest import MockChatServer  # noqa: E402
+
+
+def _messages(history: int) -> list[dict]:
+    out = [{"role": "system", "content": "You are nanobot. " * 200}]
+    for i in range(history):
+        out.append({"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i} " * 20})
+    return out
+
+
+async def _run(provider, messages: list[dict], calls: int, stream: bool) -> float:
+    async def once() -> None:
+        if stream:
+            async for _ in provider.chat_stream(messages, max_tokens=16):
+                pass
+        else:
+            response = await provider.chat(messages, max_tokens=16)
+            assert response.finish_reason != "error", response.content
+
+    await once()  # warm up connections and lazy imports
+    start = time.perf_counter()
+    for _ in range(calls):
+        await once()
+    return (time.perf_counter() - start) / calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--history", type=int, default=40)
+    parser.add_argument("--stream", action="store_true")
+    args = parser.parse_args()
+
+    server = MockChatServer().start()
+    base = server.base
+    messages = _messages(args.history)
+
+    litellm = LiteLLMProvider(api_key="sk-test", api_base=base, default_model="vllm/mock", provider_name="vllm")
+    direct = CustomProvider(api_key="sk-test", api_base=base, default_model="vllm/mock", spec=find_by_name("vllm"))
+    try:
+        before = asyncio.run(_run(litellm, messages, args.calls, args.stream))
+        after = asyncio.run(_run(direct, messages, args.calls, args.stream))
+    finally:
+        server.shutdown()
+
+    mode = "stream" if args.stream else "chat"
+    print(f"LiteLLM ({mode}): {before * 1e3:7.2f} ms/call")
+    print(f"direct  ({mode}): {after * 1e3:7.2f} ms/call  ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Resident memory of cached sessions: plain dict messages vs MessageRecord.
+
+Usage: python bench/bench_session_memory.py [--sessions 10000] [--messages 500]
+"""
+
+import argparse
+import gc
+import tracemalloc
+from datetime import datetime, timedelta
+
+from nanobot.session.manager import MessageRecord, Session
+
+
+def _messages(count: int) -> list[dict]:
+    start = datetime(2026, 1, 1)
+    out = []
+    for i in range(count):
+        ts = (start + timedelta(seconds=i)).isoformat(timespec="microseconds")
+        if i % 4 == 2:
+            out.append({
+                "role": "assistant", "content": None, "timestamp": ts,
+                "tool_calls": [{"id": f"call_{i}", "type": "function",
+                                "function": {"name": "read_file", "arguments": '{"path": "a.txt"}'}}],
+            })
+        elif i % 4 == 3:
+            out.append({"role": "tool", "tool_call_id": f"call_{i - 1}", "name": "read_file",
+                        "content": f"file contents {i}", "timestamp": ts})
+        else:
+            out.append({"role": "user" if i % 4 == 0 else "assistant", "content": f"message {i}", "timestamp": ts})
+    return out
+
+
+def _measure(sessions: int, messages: int, compact: bool) -> int:
+    gc.collect()
+    tracemalloc.start()
+    held = []
+    for s in range(sessions):
+        # Fresh dicts and strings per session, as after loading from disk
+        msgs = _messages(messages)
+        held.append(Session(key=f"bench:{s}", messages=[MessageRecord(m) for m in msgs] if compact else msgs))
+        del msgs
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return current
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--messages", type=int, default=500)
+    args = parser.parse_args()
+
+    total = args.sessions * args.messages
+    results = {}
+    for label, compact in (("dict", False), ("record", True)):
+        results[label] = _measure(args.sessions, args.messages, compact)
+        print(f"{label:>7}: {results[label] / 2**20:9.1f} MiB  ({results[label] / total:6.1f} B/message)")
+    print(f"  saved: {1 - results['record'] / results['dict']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,10 +6,20 @@ import platform
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 from nanobot.agent.memory import MemoryStore
 from nanobot.agent.skills import SkillsLoader
+from nanobot.providers.base import PromptMessages
+
+
+def _stat_signature(path: Path) -> tuple[int, int] | None:
+    """(mtime_ns, size) of a file, or None if it does not exist."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
 
 
 class ContextBuilder:
@@ -22,19 +32,71 @@ class ContextBuilder:
         self.workspace = workspace
         self.memory = MemoryStore(workspace)
         self.skills = SkillsLoader(workspace)
+        # part name -> (signature, rendered text); signatures are file stats, so
+        # a part is rebuilt only when one of its source files changes.
+        self._parts: dict[str, tuple[Any, str]] = {}
+        self._cache_hits = 0
+        self._cache_misses = 0
     
     def build_system_prompt(self, skill_names: list[str] | None = None) -> str:
-        """Build the system prompt from identity, bootstrap files, memory, and skills."""
-        parts = [self._get_identity()]
-
-        bootstrap = self._load_bootstrap_files()
-        if bootstrap:
-            parts.append(bootstrap)
+        """Build the system prompt from identity, bootstrap files, skills, and memory."""
+        return "\n\n---\n\n".join(self.build_system_segments(skill_names))
+
+    def build_system_segments(self, skill_names: list[str] | None = None) -> list[str]:
+        """
+        The system prompt as segments, ordered from most to least stable.
+
+        Identity never changes, bootstrap files and skills change when edited,
+        and memory is rewritten by every consolidation. Keeping memory last
+        lets provider prompt caches reuse everything in front of it.
+        """
+        identity = self._cached_part("identity", None, self._get_identity)
+        workspace = "\n\n---\n\n".join(p for p in (
+            self._cached_part("bootstrap", self._bootstrap_signature(), self._load_bootstrap_files),
+            self._cached_part("skills", self._skills_signature(), self._build_skills_sections),
+        ) if p)
+        memory = self._cached_part("memory", _stat_signature(self.memory.memory_file), self._build_memory_section)
+        return [p for p in (identity, workspace, memory) if p]
+
+    def cache_info(self) -> dict[str, float]:
+        """Prompt part cache counters: hits, misses and hit_rate."""
+        total = self._cache_hits + self._cache_misses
+        return {
+            "hits": self._cache_hits,
+            "misses": self._cache_misses,
+            "hit_rate": self._cache_hits / total if total else 0.0,
+        }
+
+    def _cached_part(self, name: str, signature: Any, build: Callable[[], str]) -> str:
+        """Return a cached prompt part, rebuilding it when its signature changes."""
+        cached = self._parts.get(name)
+        if cached is not None and cached[0] == signature:
+            self._cache_hits += 1
+            return cached[1]
+        self._cache_misses += 1
+        text = build()
+        self._parts[name] = (signature, text)
+        return text
+
+    def _bootstrap_signature(self) -> tuple:
+        return tuple(_stat_signature(self.workspace / f) for f in self.BOOTSTRAP_FILES)
+
+    def _skills_signature(self) -> tuple:
+        """Stats of every SKILL.md plus the current result of each requirement check."""
+        sig: list[Any] = [self.skills.requirements_signature()]
+        for root in (self.skills.workspace_skills, self.skills.builtin_skills):
+            if not root or not root.is_dir():
+                continue
+            for skill_dir in sorted(root.iterdir()):
+                sig.append((skill_dir.name, _stat_signature(skill_dir / "SKILL.md")))
+        return tuple(sig)
 
+    def _build_memory_section(self) -> str:
         memory = self.memory.get_memory_context()
-        if memory:
-            parts.append(f"# Memory\n\n{memory}")
+        return f"# Memory\n\n{memory}" if memory else ""
 
+    def _build_skills_sections(self) -> str:
+        parts = []
         always_skills = self.skills.get_always_skills()
         if always_skills:
             always_content = self.skills.load_skills_for_context(always_skills)
@@ -111,13 +173,19 @@ Reply directly with text for conversations. Only use the 'message' tool to send
         channel: str | None = None,
         chat_id: str | None = None,
     ) -> list[dict[str, Any]]:
-        """Build the complete message list for an LLM call."""
-        return [
-            {"role": "system", "content": self.build_system_prompt(skill_names)},
+        """
+        Build the complete message list for an LLM call.
+
+        The result is a PromptMessages list: messages appended during the turn
+        are sanitized once and providers send it without copying.
+        """
+        segments = self.build_system_segments(skill_names)
+        return PromptMessages([
+            {"role": "system", "content": "\n\n---\n\n".join(segments)},
             *history,
             {"role": "user", "content": self._build_runtime_context(channel, chat_id)},
             {"role": "user", "content": self._build_user_content(current_message, media)},
-        ]
+        ], system_segments=segments, session_key=f"{channel}:{chat_id}" if channel and chat_id else None)
 
     def _build_user_content(self, text: str, media: list[str] | None) -> str | list[dict[str, Any]]:
         """Build user message content with optional base64-encoded images."""
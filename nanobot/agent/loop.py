@@ -5,9 +5,9 @@ from __future__ import annotations
 import asyncio
 import json
 import re
-from contextlib import AsyncExitStack
+from contextlib import AsyncExitStack, asynccontextmanager
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Awaitable, Callable
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable
 
 from loguru import logger
 
@@ -23,14 +23,52 @@ from nanobot.agent.tools.spawn import SpawnTool
 from nanobot.agent.tools.web import WebFetchTool, WebSearchTool
 from nanobot.bus.events import InboundMessage, OutboundMessage
 from nanobot.bus.queue import MessageBus
-from nanobot.providers.base import LLMProvider
-from nanobot.session.manager import Session, SessionManager
+from nanobot.providers.base import LLMProvider, LLMResponse, PromptCacheStats
+from nanobot.session.manager import MessageRecord, Session, SessionManager
+from nanobot.utils.tokens import TokenBudget, estimate_prompt_tokens, estimate_tokens
 
 if TYPE_CHECKING:
     from nanobot.config.schema import ChannelsConfig, ExecToolConfig
     from nanobot.cron.service import CronService
 
 
+class _ThinkFilter:
+    """Drop <think>…</think> blocks from streamed text, even when tags span chunks."""
+
+    _OPEN, _CLOSE = "<think>", "</think>"
+
+    def __init__(self):
+        self._pending = ""
+        self._inside = False
+        self._started = False
+
+    def feed(self, text: str) -> str:
+        """Consume one delta; return the visible text it completes."""
+        self._pending += text
+        out: list[str] = []
+        while self._pending:
+            tag = self._CLOSE if self._inside else self._OPEN
+            i = self._pending.find(tag)
+            if i < 0:
+                # Hold back a tail that may be the start of the tag
+                keep = next((k for k in range(min(len(tag) - 1, len(self._pending)), 0, -1)
+                             if tag.startswith(self._pending[-k:])), 0)
+                i = len(self._pending) - keep
+                if not self._inside:
+                    out.append(self._pending[:i])
+                self._pending = self._pending[i:]
+                break
+            if not self._inside:
+                out.append(self._pending[:i])
+            self._pending = self._pending[i + len(tag):]
+            self._inside = not self._inside
+        visible = "".join(out)
+        if not self._started:
+            visible = visible.lstrip()  # Like _strip_think, drop whitespace left by a leading block
+            self._started = bool(visible)
+        return visible
+
+
 class AgentLoop:
     """
     The agent loop is the core processing engine.
@@ -55,6 +93,8 @@ class AgentLoop:
         temperature: float = 0.1,
         max_tokens: int = 4096,
         memory_window: int = 100,
+        history_max_tokens: int = 0,
+        max_concurrent_turns: int = 8,
         brave_api_key: str | None = None,
         exec_config: ExecToolConfig | None = None,
         cron_service: CronService | None = None,
@@ -62,6 +102,10 @@ class AgentLoop:
         session_manager: SessionManager | None = None,
         mcp_servers: dict | None = None,
         channels_config: ChannelsConfig | None = None,
+        consolidation_provider: LLMProvider | None = None,
+        consolidation_model: str | None = None,
+        subagent_provider: LLMProvider | None = None,
+        subagent_model: str | None = None,
     ):
         from nanobot.config.schema import ExecToolConfig
         self.bus = bus
@@ -69,10 +113,17 @@ class AgentLoop:
         self.provider = provider
         self.workspace = workspace
         self.model = model or provider.get_default_model()
+        # Background work may run on its own (cheaper, faster) model
+        self.consolidation_provider = consolidation_provider or provider
+        self.consolidation_model = consolidation_model or self.model
         self.max_iterations = max_iterations
         self.temperature = temperature
         self.max_tokens = max_tokens
         self.memory_window = memory_window
+        # History budget in tokens; 0 keeps the message-count window only
+        self.token_budget = TokenBudget(history_max_tokens) if history_max_tokens > 0 else None
+        self._tools_tokens: tuple[list[dict], int] | None = None  # (definitions, estimate)
+        self.prompt_cache = PromptCacheStats()  # Provider-reported prompt cache usage
         self.brave_api_key = brave_api_key
         self.exec_config = exec_config or ExecToolConfig()
         self.cron_service = cron_service
@@ -82,10 +133,10 @@ class AgentLoop:
         self.sessions = session_manager or SessionManager(workspace)
         self.tools = ToolRegistry()
         self.subagents = SubagentManager(
-            provider=provider,
+            provider=subagent_provider or provider,
             workspace=workspace,
             bus=bus,
-            model=self.model,
+            model=subagent_model or self.model,
             temperature=self.temperature,
             max_tokens=self.max_tokens,
             brave_api_key=brave_api_key,
@@ -102,7 +153,9 @@ class AgentLoop:
         self._consolidation_tasks: set[asyncio.Task] = set()  # Strong refs to in-flight tasks
         self._consolidation_locks: dict[str, asyncio.Lock] = {}
         self._active_tasks: dict[str, list[asyncio.Task]] = {}  # session_key -> tasks
-        self._processing_lock = asyncio.Lock()
+        self._session_locks: dict[str, asyncio.Lock] = {}  # Serialize turns within a session
+        self._session_waiters: dict[str, int] = {}  # session_key -> turns holding/awaiting the lock
+        self._turn_slots = asyncio.Semaphore(max(1, max_concurrent_turns))
         self._register_default_tools()
 
     def _register_default_tools(self) -> None:
@@ -146,7 +199,7 @@ class AgentLoop:
             self._mcp_connecting = False
 
     def _set_tool_context(self, channel: str, chat_id: str, message_id: str | None = None) -> None:
-        """Update context for all tools that need routing info."""
+        """Set per-turn routing context for all tools that need it."""
         for name in ("message", "spawn", "cron"):
             if tool := self.tools.get(name):
                 if hasattr(tool, "set_context"):
@@ -169,10 +222,73 @@ class AgentLoop:
             return f'{tc.name}("{val[:40]}…")' if len(val) > 40 else f'{tc.name}("{val}")'
         return ", ".join(_fmt(tc) for tc in tool_calls)
 
+    async def _chat(
+        self,
+        messages: list[dict],
+        on_delta: Callable[..., Awaitable[None]] | None = None,
+    ) -> LLMResponse:
+        """
+        Call the provider, streaming text deltas to on_delta when given.
+
+        Deltas exclude <think> blocks. Each call's stream ends with
+        ``on_delta("", end=True, discard=...)``; ``discard`` is set when the
+        call turned into tool calls, so its text was not the reply.
+        """
+        kwargs: dict[str, Any] = dict(
+            messages=messages,
+            tools=self.tools.get_definitions(),
+            model=self.model,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+        )
+        if not on_delta:
+            response = await self.provider.chat(**kwargs)
+        else:
+            response = None
+            visible = _ThinkFilter()
+            async for event in self.provider.chat_stream(**kwargs):
+                if event.content and (text := visible.feed(event.content)):
+                    await on_delta(text)
+                if event.response:
+                    response = event.response
+            response = response or LLMResponse(content="Error calling LLM: empty stream", finish_reason="error")
+            await on_delta("", end=True, discard=response.has_tool_calls)
+        if response.usage:
+            self.prompt_cache.record(response.usage)
+            if "cached_tokens" in response.usage:
+                logger.debug(
+                    "Prompt cache: {}/{} prompt tokens cached",
+                    response.usage["cached_tokens"], response.usage["prompt_tokens"],
+                )
+        return response
+
+    def _calibrate(self, messages: list[dict], response: LLMResponse) -> None:
+        """Feed the provider's prompt token count back into the history budget."""
+        prompt_tokens = response.usage.get("prompt_tokens") if response.usage else None
+        if self.token_budget is None or not prompt_tokens:
+            return
+        estimated = estimate_prompt_tokens(messages)
+        definitions = self.tools.get_definitions()
+        if self._tools_tokens is None or self._tools_tokens[0] is not definitions:
+            self._tools_tokens = (definitions, estimate_tokens(json.dumps(definitions, ensure_ascii=False)))
+        estimated += self._tools_tokens[1]
+        self.token_budget.calibrate(estimated, prompt_tokens)
+
+    def _get_history(self, session: Session) -> list[dict[str, Any]]:
+        max_tokens = self.token_budget.history_tokens if self.token_budget else None
+        return session.get_history(max_messages=self.memory_window, max_tokens=max_tokens)
+
+    def _needs_consolidation(self, session: Session) -> bool:
+        """Whether the unconsolidated history no longer fits the window."""
+        if len(session.messages) - session.last_consolidated >= self.memory_window:
+            return True
+        return self.token_budget is not None and session.history_tokens() > self.token_budget.history_tokens
+
     async def _run_agent_loop(
         self,
         initial_messages: list[dict],
         on_progress: Callable[..., Awaitable[None]] | None = None,
+        on_delta: Callable[..., Awaitable[None]] | None = None,
     ) -> tuple[str | None, list[str], list[dict]]:
         """Run the agent iteration loop. Returns (final_content, tools_used, messages)."""
         messages = initial_messages
@@ -183,13 +299,9 @@ class AgentLoop:
         while iteration < self.max_iterations:
             iteration += 1
 
-            response = await self.provider.chat(
-                messages=messages,
-                tools=self.tools.get_definitions(),
-                model=self.model,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-            )
+            response = await self._chat(messages, on_delta)
+            if iteration == 1:
+                self._calibrate(messages, response)
 
             if response.has_tool_calls:
                 if on_progress:
@@ -218,7 +330,10 @@ class AgentLoop:
                     tools_used.append(tool_call.name)
                     args_str = json.dumps(tool_call.arguments, ensure_ascii=False)
                     logger.info("Tool call: {}({})", tool_call.name, args_str[:200])
-                    result = await self.tools.execute(tool_call.name, tool_call.arguments)
+                results = await self.tools.execute_batch(
+                    [(tc.name, tc.arguments) for tc in response.tool_calls]
+                )
+                for tool_call, result in zip(response.tool_calls, results):
                     messages = self.context.add_tool_result(
                         messages, tool_call.id, tool_call.name, result
                     )
@@ -274,9 +389,31 @@ class AgentLoop:
             channel=msg.channel, chat_id=msg.chat_id, content=content,
         ))
 
+    @staticmethod
+    def _turn_key(msg: InboundMessage) -> str:
+        """Session key the turn will run against (system messages target their origin)."""
+        if msg.channel == "system":
+            return msg.chat_id if ":" in msg.chat_id else f"cli:{msg.chat_id}"
+        return msg.session_key
+
+    @asynccontextmanager
+    async def _session_turn(self, key: str) -> AsyncIterator[None]:
+        """Serialize turns within a session and cap concurrent turns across sessions."""
+        lock = self._session_locks.setdefault(key, asyncio.Lock())
+        self._session_waiters[key] = self._session_waiters.get(key, 0) + 1
+        try:
+            async with lock, self._turn_slots:
+                with self.sessions.pinned(key):
+                    yield
+        finally:
+            self._session_waiters[key] -= 1
+            if not self._session_waiters[key]:
+                del self._session_waiters[key]
+                self._session_locks.pop(key, None)
+
     async def _dispatch(self, msg: InboundMessage) -> None:
-        """Process a message under the global lock."""
-        async with self._processing_lock:
+        """Process a message, serialized per session and bounded globally."""
+        async with self._session_turn(self._turn_key(msg)):
             try:
                 response = await self._process_message(msg)
                 if response is not None:
@@ -315,6 +452,7 @@ class AgentLoop:
         msg: InboundMessage,
         session_key: str | None = None,
         on_progress: Callable[[str], Awaitable[None]] | None = None,
+        on_delta: Callable[..., Awaitable[None]] | None = None,
     ) -> OutboundMessage | None:
         """Process a single inbound message and return the response."""
         # System messages: parse origin from chat_id ("channel:chat_id")
@@ -325,7 +463,7 @@ class AgentLoop:
             key = f"{channel}:{chat_id}"
             session = self.sessions.get_or_create(key)
             self._set_tool_context(channel, chat_id, msg.metadata.get("message_id"))
-            history = session.get_history(max_messages=self.memory_window)
+            history = self._get_history(session)
             messages = self.context.build_messages(
                 history=history,
                 current_message=msg.content, channel=channel, chat_id=chat_id,
@@ -378,8 +516,7 @@ class AgentLoop:
             return OutboundMessage(channel=msg.channel, chat_id=msg.chat_id,
                                   content="🐈 nanobot commands:\n/new — Start a new conversation\n/stop — Stop the current task\n/help — Show available commands")
 
-        unconsolidated = len(session.messages) - session.last_consolidated
-        if (unconsolidated >= self.memory_window and session.key not in self._consolidating):
+        if self._needs_consolidation(session) and session.key not in self._consolidating:
             self._consolidating.add(session.key)
             lock = self._consolidation_locks.setdefault(session.key, asyncio.Lock())
 
@@ -388,6 +525,7 @@ class AgentLoop:
                     async with lock:
                         await self._consolidate_memory(session)
                 finally:
+                    self.sessions.unpin(session.key)
                     self._consolidating.discard(session.key)
                     if not lock.locked():
                         self._consolidation_locks.pop(session.key, None)
@@ -395,6 +533,7 @@ class AgentLoop:
                     if _task is not None:
                         self._consolidation_tasks.discard(_task)
 
+            self.sessions.pin(session.key)  # Unpinned by the task
             _task = asyncio.create_task(_consolidate_and_unlock())
             self._consolidation_tasks.add(_task)
 
@@ -403,7 +542,7 @@ class AgentLoop:
             if isinstance(message_tool, MessageTool):
                 message_tool.start_turn()
 
-        history = session.get_history(max_messages=self.memory_window)
+        history = self._get_history(session)
         initial_messages = self.context.build_messages(
             history=history,
             current_message=msg.content,
@@ -419,8 +558,19 @@ class AgentLoop:
                 channel=msg.channel, chat_id=msg.chat_id, content=content, metadata=meta,
             ))
 
+        async def _bus_delta(content: str, *, end: bool = False, discard: bool = False) -> None:
+            meta = dict(msg.metadata or {})
+            meta["_stream_delta"] = True
+            meta["_stream_end"] = end
+            meta["_stream_discard"] = discard
+            await self.bus.publish_outbound(OutboundMessage(
+                channel=msg.channel, chat_id=msg.chat_id, content=content, metadata=meta,
+            ))
+
+        stream = self.channels_config is not None and self.channels_config.send_deltas
         final_content, _, all_msgs = await self._run_agent_loop(
             initial_messages, on_progress=on_progress or _bus_progress,
+            on_delta=(on_delta or _bus_delta) if stream else None,
         )
 
         if final_content is None:
@@ -457,14 +607,15 @@ class AgentLoop:
                     for c in entry["content"]
                 ]
             entry.setdefault("timestamp", datetime.now().isoformat())
-            session.messages.append(entry)
+            session.messages.append(MessageRecord(entry))
         session.updated_at = datetime.now()
 
     async def _consolidate_memory(self, session, archive_all: bool = False) -> bool:
         """Delegate to MemoryStore.consolidate(). Returns True on success."""
         return await MemoryStore(self.workspace).consolidate(
-            session, self.provider, self.model,
+            session, self.consolidation_provider, self.consolidation_model,
             archive_all=archive_all, memory_window=self.memory_window,
+            keep_tokens=self.token_budget.history_tokens // 2 if self.token_budget else None,
         )
 
     async def process_direct(
@@ -474,9 +625,13 @@ class AgentLoop:
         channel: str = "cli",
         chat_id: str = "direct",
         on_progress: Callable[[str], Awaitable[None]] | None = None,
+        on_delta: Callable[..., Awaitable[None]] | None = None,
     ) -> str:
         """Process a message directly (for CLI or cron usage)."""
         await self._connect_mcp()
         msg = InboundMessage(channel=channel, sender_id="user", chat_id=chat_id, content=content)
-        response = await self._process_message(msg, session_key=session_key, on_progress=on_progress)
+        async with self._session_turn(session_key):
+            response = await self._process_message(
+                msg, session_key=session_key, on_progress=on_progress, on_delta=on_delta,
+            )
         return response.content if response else ""
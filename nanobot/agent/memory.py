@@ -74,9 +74,13 @@ class MemoryStore:
         *,
         archive_all: bool = False,
         memory_window: int = 50,
+        keep_tokens: int | None = None,
     ) -> bool:
         """Consolidate old messages into MEMORY.md + HISTORY.md via LLM tool call.
 
+        Keeps the newest ``memory_window // 2`` messages, fewer if they exceed
+        ``keep_tokens`` estimated tokens.
+
         Returns True on success (including no-op), False on failure.
         """
         if archive_all:
@@ -85,11 +89,13 @@ class MemoryStore:
             logger.info("Memory consolidation (archive_all): {} messages", len(session.messages))
         else:
             keep_count = memory_window // 2
+            if keep_tokens is not None:
+                keep_count = session.fit_tokens(keep_tokens, keep_count)
             if len(session.messages) <= keep_count:
                 return True
             if len(session.messages) - session.last_consolidated <= 0:
                 return True
-            old_messages = session.messages[session.last_consolidated:-keep_count]
+            old_messages = session.messages[session.last_consolidated:len(session.messages) - keep_count]
             if not old_messages:
                 return True
             logger.info("Memory consolidation: {} to consolidate, {} keep", len(old_messages), keep_count)
@@ -4,24 +4,46 @@ import json
 import os
 import re
 import shutil
+import time
+from dataclasses import dataclass
 from pathlib import Path
 
 # Default builtin skills directory (relative to this file)
 BUILTIN_SKILLS_DIR = Path(__file__).parent.parent / "skills"
 
+# How long a `shutil.which` / env requirement result is reused before re-checking
+REQUIREMENT_TTL_S = 60.0
+
+
+@dataclass
+class _SkillEntry:
+    """One parsed SKILL.md, reused until the file's (mtime_ns, size) changes."""
+
+    name: str
+    path: Path
+    source: str  # "workspace" or "builtin"
+    signature: tuple[int, int]
+    content: str
+    frontmatter: dict | None  # raw frontmatter key/values
+    meta: dict  # nanobot (or openclaw) metadata parsed from frontmatter
+    body: str  # content with frontmatter stripped
+
 
 class SkillsLoader:
     """
     Loader for agent skills.
     
     Skills are markdown files (SKILL.md) that teach the agent how to use
-    specific tools or perform certain tasks.
+    specific tools or perform certain tasks. Each file is read and parsed once
+    into an index entry; entries are re-parsed only when the file changes.
     """
     
     def __init__(self, workspace: Path, builtin_skills_dir: Path | None = None):
         self.workspace = workspace
         self.workspace_skills = workspace / "skills"
         self.builtin_skills = builtin_skills_dir or BUILTIN_SKILLS_DIR
+        self._index: dict[str, _SkillEntry] = {}
+        self._requirement_cache: dict[tuple[str, str], tuple[float, bool]] = {}
     
     def list_skills(self, filter_unavailable: bool = True) -> list[dict[str, str]]:
         """
@@ -33,28 +55,10 @@ class SkillsLoader:
         Returns:
             List of skill info dicts with 'name', 'path', 'source'.
         """
-        skills = []
-        
-        # Workspace skills (highest priority)
-        if self.workspace_skills.exists():
-            for skill_dir in self.workspace_skills.iterdir():
-                if skill_dir.is_dir():
-                    skill_file = skill_dir / "SKILL.md"
-                    if skill_file.exists():
-                        skills.append({"name": skill_dir.name, "path": str(skill_file), "source": "workspace"})
-        
-        # Built-in skills
-        if self.builtin_skills and self.builtin_skills.exists():
-            for skill_dir in self.builtin_skills.iterdir():
-                if skill_dir.is_dir():
-                    skill_file = skill_dir / "SKILL.md"
-                    if skill_file.exists() and not any(s["name"] == skill_dir.name for s in skills):
-                        skills.append({"name": skill_dir.name, "path": str(skill_file), "source": "builtin"})
-        
-        # Filter by requirements
+        entries = self._scan().values()
         if filter_unavailable:
-            return [s for s in skills if self._check_requirements(self._get_skill_meta(s["name"]))]
-        return skills
+            entries = [e for e in entries if self._check_requirements(e.meta)]
+        return [{"name": e.name, "path": str(e.path), "source": e.source} for e in entries]
     
     def load_skill(self, name: str) -> str | None:
         """
@@ -66,18 +70,8 @@ class SkillsLoader:
         Returns:
             Skill content or None if not found.
         """
-        # Check workspace first
-        workspace_skill = self.workspace_skills / name / "SKILL.md"
-        if workspace_skill.exists():
-            return workspace_skill.read_text(encoding="utf-8")
-        
-        # Check built-in
-        if self.builtin_skills:
-            builtin_skill = self.builtin_skills / name / "SKILL.md"
-            if builtin_skill.exists():
-                return builtin_skill.read_text(encoding="utf-8")
-        
-        return None
+        entry = self._entry(name)
+        return entry.content if entry else None
     
     def load_skills_for_context(self, skill_names: list[str]) -> str:
         """
@@ -91,10 +85,9 @@ class SkillsLoader:
         """
         parts = []
         for name in skill_names:
-            content = self.load_skill(name)
-            if content:
-                content = self._strip_frontmatter(content)
-                parts.append(f"### Skill: {name}\n\n{content}")
+            entry = self._entry(name)
+            if entry and entry.content:
+                parts.append(f"### Skill: {name}\n\n{entry.body}")
         
         return "\n\n---\n\n".join(parts) if parts else ""
     
@@ -108,29 +101,26 @@ class SkillsLoader:
         Returns:
             XML-formatted skills summary.
         """
-        all_skills = self.list_skills(filter_unavailable=False)
-        if not all_skills:
+        entries = list(self._scan().values())
+        if not entries:
             return ""
         
         def escape_xml(s: str) -> str:
             return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
         
         lines = ["<skills>"]
-        for s in all_skills:
-            name = escape_xml(s["name"])
-            path = s["path"]
-            desc = escape_xml(self._get_skill_description(s["name"]))
-            skill_meta = self._get_skill_meta(s["name"])
-            available = self._check_requirements(skill_meta)
+        for e in entries:
+            desc = (e.frontmatter or {}).get("description") or e.name
+            available = self._check_requirements(e.meta)
             
             lines.append(f"  <skill available=\"{str(available).lower()}\">")
-            lines.append(f"    <name>{name}</name>")
-            lines.append(f"    <description>{desc}</description>")
-            lines.append(f"    <location>{path}</location>")
+            lines.append(f"    <name>{escape_xml(e.name)}</name>")
+            lines.append(f"    <description>{escape_xml(desc)}</description>")
+            lines.append(f"    <location>{e.path}</location>")
             
             # Show missing requirements for unavailable skills
             if not available:
-                missing = self._get_missing_requirements(skill_meta)
+                missing = self._get_missing_requirements(e.meta)
                 if missing:
                     lines.append(f"    <requires>{escape_xml(missing)}</requires>")
             
@@ -139,15 +129,87 @@ class SkillsLoader:
         
         return "\n".join(lines)
     
+    def _scan(self) -> dict[str, _SkillEntry]:
+        """Refresh the index in one pass; only changed SKILL.md files are re-read."""
+        index: dict[str, _SkillEntry] = {}
+        # Workspace skills first (highest priority), then built-in
+        for source, root in (("workspace", self.workspace_skills), ("builtin", self.builtin_skills)):
+            if not root or not root.exists():
+                continue
+            for skill_dir in sorted(root.iterdir()):
+                if skill_dir.name in index or not skill_dir.is_dir():
+                    continue
+                if entry := self._load_entry(skill_dir.name, skill_dir / "SKILL.md", source):
+                    index[entry.name] = entry
+        self._index = index
+        return index
+
+    def _entry(self, name: str) -> _SkillEntry | None:
+        """Look up a single skill by name without rescanning every directory."""
+        candidates = [("workspace", self.workspace_skills / name / "SKILL.md")]
+        if self.builtin_skills:
+            candidates.append(("builtin", self.builtin_skills / name / "SKILL.md"))
+        for source, path in candidates:
+            if entry := self._load_entry(name, path, source):
+                self._index[name] = entry
+                return entry
+        self._index.pop(name, None)
+        return None
+
+    def _load_entry(self, name: str, path: Path, source: str) -> _SkillEntry | None:
+        """Return the indexed entry for path, re-parsing it only if the file changed."""
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        signature = (st.st_mtime_ns, st.st_size)
+        cached = self._index.get(name)
+        if cached and cached.path == path and cached.signature == signature:
+            return cached
+        try:
+            content = path.read_text(encoding="utf-8")
+        except OSError:
+            return None
+        frontmatter = self._parse_frontmatter(content)
+        return _SkillEntry(
+            name=name,
+            path=path,
+            source=source,
+            signature=signature,
+            content=content,
+            frontmatter=frontmatter,
+            meta=self._parse_nanobot_metadata((frontmatter or {}).get("metadata", "")),
+            body=self._strip_frontmatter(content),
+        )
+
+    def _requirement_met(self, kind: str, name: str) -> bool:
+        """Check a 'bin' or 'env' requirement, memoized for REQUIREMENT_TTL_S."""
+        now = time.monotonic()
+        cached = self._requirement_cache.get((kind, name))
+        if cached and cached[0] > now:
+            return cached[1]
+        met = bool(shutil.which(name)) if kind == "bin" else bool(os.environ.get(name))
+        self._requirement_cache[(kind, name)] = (now + REQUIREMENT_TTL_S, met)
+        return met
+
+    def requirements_signature(self) -> tuple:
+        """Current result of every skill requirement, to tell when availability changes."""
+        checks = set()
+        for e in self._scan().values():
+            requires = e.meta.get("requires", {})
+            checks.update(("bin", b) for b in requires.get("bins", []))
+            checks.update(("env", v) for v in requires.get("env", []))
+        return tuple((kind, name, self._requirement_met(kind, name)) for kind, name in sorted(checks))
+
     def _get_missing_requirements(self, skill_meta: dict) -> str:
         """Get a description of missing requirements."""
         missing = []
         requires = skill_meta.get("requires", {})
         for b in requires.get("bins", []):
-            if not shutil.which(b):
+            if not self._requirement_met("bin", b):
                 missing.append(f"CLI: {b}")
         for env in requires.get("env", []):
-            if not os.environ.get(env):
+            if not self._requirement_met("env", env):
                 missing.append(f"ENV: {env}")
         return ", ".join(missing)
     
@@ -166,6 +228,20 @@ class SkillsLoader:
                 return content[match.end():].strip()
         return content
     
+    @staticmethod
+    def _parse_frontmatter(content: str) -> dict | None:
+        """Parse simple `key: value` YAML frontmatter; None if there is none."""
+        if content.startswith("---"):
+            match = re.match(r"^---\n(.*?)\n---", content, re.DOTALL)
+            if match:
+                metadata = {}
+                for line in match.group(1).split("\n"):
+                    if ":" in line:
+                        key, value = line.split(":", 1)
+                        metadata[key.strip()] = value.strip().strip('"\'')
+                return metadata
+        return None
+
     def _parse_nanobot_metadata(self, raw: str) -> dict:
         """Parse skill metadata JSON from frontmatter (supports nanobot and openclaw keys)."""
         try:
@@ -177,28 +253,23 @@ class SkillsLoader:
     def _check_requirements(self, skill_meta: dict) -> bool:
         """Check if skill requirements are met (bins, env vars)."""
         requires = skill_meta.get("requires", {})
-        for b in requires.get("bins", []):
-            if not shutil.which(b):
-                return False
-        for env in requires.get("env", []):
-            if not os.environ.get(env):
-                return False
-        return True
+        return (
+            all(self._requirement_met("bin", b) for b in requires.get("bins", []))
+            and all(self._requirement_met("env", e) for e in requires.get("env", []))
+        )
     
     def _get_skill_meta(self, name: str) -> dict:
         """Get nanobot metadata for a skill (cached in frontmatter)."""
-        meta = self.get_skill_metadata(name) or {}
-        return self._parse_nanobot_metadata(meta.get("metadata", ""))
+        entry = self._entry(name)
+        return entry.meta if entry else {}
     
     def get_always_skills(self) -> list[str]:
         """Get skills marked as always=true that meet requirements."""
-        result = []
-        for s in self.list_skills(filter_unavailable=True):
-            meta = self.get_skill_metadata(s["name"]) or {}
-            skill_meta = self._parse_nanobot_metadata(meta.get("metadata", ""))
-            if skill_meta.get("always") or meta.get("always"):
-                result.append(s["name"])
-        return result
+        return [
+            e.name for e in self._scan().values()
+            if (e.meta.get("always") or (e.frontmatter or {}).get("always"))
+            and self._check_requirements(e.meta)
+        ]
     
     def get_skill_metadata(self, name: str) -> dict | None:
         """
@@ -210,19 +281,5 @@ class SkillsLoader:
         Returns:
             Metadata dict or None.
         """
-        content = self.load_skill(name)
-        if not content:
-            return None
-        
-        if content.startswith("---"):
-            match = re.match(r"^---\n(.*?)\n---", content, re.DOTALL)
-            if match:
-                # Simple YAML parsing
-                metadata = {}
-                for line in match.group(1).split("\n"):
-                    if ":" in line:
-                        key, value = line.split(":", 1)
-                        metadata[key.strip()] = value.strip().strip('"\'')
-                return metadata
-        
-        return None
+        entry = self._entry(name)
+        return dict(entry.frontmatter) if entry and entry.frontmatter is not None else None
@@ -1,5 +1,6 @@
 """File system tools: read, write, edit."""
 
+import asyncio
 import difflib
 from pathlib import Path
 from typing import Any
@@ -31,6 +32,10 @@ class ReadFileTool(Tool):
     @property
     def name(self) -> str:
         return "read_file"
+
+    @property
+    def read_only(self) -> bool:
+        return True
     
     @property
     def description(self) -> str:
@@ -50,6 +55,10 @@ class ReadFileTool(Tool):
         }
     
     async def execute(self, path: str, **kwargs: Any) -> str:
+        # Off the loop thread so batched reads overlap
+        return await asyncio.to_thread(self._read, path)
+
+    def _read(self, path: str) -> str:
         try:
             file_path = _resolve_path(path, self._workspace, self._allowed_dir)
             if not file_path.exists():
@@ -98,6 +107,9 @@ class WriteFileTool(Tool):
         }
     
     async def execute(self, path: str, content: str, **kwargs: Any) -> str:
+        return await asyncio.to_thread(self._write, path, content)
+
+    def _write(self, path: str, content: str) -> str:
         try:
             file_path = _resolve_path(path, self._workspace, self._allowed_dir)
             file_path.parent.mkdir(parents=True, exist_ok=True)
@@ -146,6 +158,9 @@ class EditFileTool(Tool):
         }
     
     async def execute(self, path: str, old_text: str, new_text: str, **kwargs: Any) -> str:
+        return await asyncio.to_thread(self._edit, path, old_text, new_text)
+
+    def _edit(self, path: str, old_text: str, new_text: str) -> str:
         try:
             file_path = _resolve_path(path, self._workspace, self._allowed_dir)
             if not file_path.exists():
@@ -203,6 +218,10 @@ class ListDirTool(Tool):
     @property
     def name(self) -> str:
         return "list_dir"
+
+    @property
+    def read_only(self) -> bool:
+        return True
     
     @property
     def description(self) -> str:
@@ -222,6 +241,9 @@ class ListDirTool(Tool):
         }
     
     async def execute(self, path: str, **kwargs: Any) -> str:
+        return await asyncio.to_thread(self._list, path)
+
+    def _list(self, path: str) -> str:
         try:
             dir_path = _resolve_path(path, self._workspace, self._allowed_dir)
             if not dir_path.exists():
@@ -1,5 +1,6 @@
 """Message tool for sending messages to users."""
 
+from contextvars import ContextVar
 from typing import Any, Awaitable, Callable
 
 from nanobot.agent.tools.base import Tool
@@ -17,16 +18,40 @@ class MessageTool(Tool):
         default_message_id: str | None = None,
     ):
         self._send_callback = send_callback
-        self._default_channel = default_channel
-        self._default_chat_id = default_chat_id
-        self._default_message_id = default_message_id
-        self._sent_in_turn: bool = False
+        # Routing and send tracking are per turn: each turn runs in its own task,
+        # so concurrent turns see their own values instead of clobbering each other.
+        self._route: ContextVar[tuple[str, str, str | None]] = ContextVar(
+            "message_route", default=(default_channel, default_chat_id, default_message_id),
+        )
+        self._sent: ContextVar[list[bool] | None] = ContextVar("message_sent", default=None)
+
+    @property
+    def _default_channel(self) -> str:
+        return self._route.get()[0]
+
+    @property
+    def _default_chat_id(self) -> str:
+        return self._route.get()[1]
+
+    @property
+    def _default_message_id(self) -> str | None:
+        return self._route.get()[2]
+
+    @property
+    def _sent_in_turn(self) -> bool:
+        sent = self._sent.get()
+        return bool(sent and sent[0])
+
+    @_sent_in_turn.setter
+    def _sent_in_turn(self, value: bool) -> None:
+        if (sent := self._sent.get()) is not None:
+            sent[0] = value
+        else:
+            self._sent.set([value])
 
     def set_context(self, channel: str, chat_id: str, message_id: str | None = None) -> None:
-        """Set the current message context."""
-        self._default_channel = channel
-        self._default_chat_id = chat_id
-        self._default_message_id = message_id
+        """Set the message context for the current turn."""
+        self._route.set((channel, chat_id, message_id))
 
     def set_send_callback(self, callback: Callable[[OutboundMessage], Awaitable[None]]) -> None:
         """Set the callback for sending messages."""
@@ -34,7 +59,7 @@ class MessageTool(Tool):
 
     def start_turn(self) -> None:
         """Reset per-turn send tracking."""
-        self._sent_in_turn = False
+        self._sent.set([False])
 
     @property
     def name(self) -> str:
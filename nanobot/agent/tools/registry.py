@@ -1,5 +1,6 @@
 """Tool registry for dynamic tool management."""
 
+import asyncio
 from typing import Any
 
 from nanobot.agent.tools.base import Tool
@@ -14,14 +15,17 @@ class ToolRegistry:
     
     def __init__(self):
         self._tools: dict[str, Tool] = {}
+        self._definitions: list[dict[str, Any]] | None = None
     
     def register(self, tool: Tool) -> None:
         """Register a tool."""
         self._tools[tool.name] = tool
+        self._definitions = None
     
     def unregister(self, name: str) -> None:
         """Unregister a tool by name."""
         self._tools.pop(name, None)
+        self._definitions = None
     
     def get(self, name: str) -> Tool | None:
         """Get a tool by name."""
@@ -32,8 +36,17 @@ class ToolRegistry:
         return name in self._tools
     
     def get_definitions(self) -> list[dict[str, Any]]:
-        """Get all tool definitions in OpenAI format."""
-        return [tool.to_schema() for tool in self._tools.values()]
+        """
+        Get all tool definitions in OpenAI format.
+
+        Sorted by name, so the order (part of the provider's cached prompt
+        prefix) does not depend on registration or MCP connection order. The
+        list is built once and shared until a tool is registered or
+        unregistered; callers must not modify it.
+        """
+        if self._definitions is None:
+            self._definitions = [self._tools[name].to_schema() for name in sorted(self._tools)]
+        return self._definitions
     
     async def execute(self, name: str, params: dict[str, Any]) -> str:
         """Execute a tool by name with given parameters."""
@@ -53,6 +66,34 @@ class ToolRegistry:
             return result
         except Exception as e:
             return f"Error executing {name}: {str(e)}" + _HINT
+
+    async def execute_batch(self, calls: list[tuple[str, dict[str, Any]]]) -> list[str]:
+        """
+        Execute several tool calls, returning results in call order.
+
+        Consecutive read-only calls run concurrently; any side-effecting call
+        acts as a barrier and runs alone, so ordering between writes and the
+        reads around them is preserved.
+        """
+        results: list[str] = []
+        batch: list[tuple[str, dict[str, Any]]] = []
+
+        async def _flush() -> None:
+            if len(batch) == 1:
+                results.append(await self.execute(*batch[0]))
+            elif batch:
+                results.extend(await asyncio.gather(*(self.execute(n, p) for n, p in batch)))
+            batch.clear()
+
+        for name, params in calls:
+            tool = self._tools.get(name)
+            if tool and tool.read_only:
+                batch.append((name, params))
+                continue
+            await _flush()
+            results.append(await self.execute(name, params))
+        await _flush()
+        return results
     
     @property
     def tool_names(self) -> list[str]:
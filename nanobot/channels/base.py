@@ -18,6 +18,7 @@ class BaseChannel(ABC):
     """
     
     name: str = "base"
+    supports_streaming: bool = False  # Render "_stream_delta" messages incrementally
     
     def __init__(self, config: Any, bus: MessageBus):
         """
@@ -52,6 +53,12 @@ class BaseChannel(ABC):
     async def send(self, msg: OutboundMessage) -> None:
         """
         Send a message through this channel.
+
+        Channels with ``supports_streaming`` also receive token deltas flagged
+        ``_stream_delta`` in metadata; ``_stream_end`` closes one LLM call's
+        stream, with ``_stream_discard`` set when that call's text was not the
+        reply (it went on to call tools). The complete reply is still sent as
+        a normal message.
         
         Args:
             msg: The message to send.
@@ -200,6 +200,8 @@ class ChannelManager:
                         continue
                 
                 channel = self.channels.get(msg.channel)
+                if msg.metadata.get("_stream_delta") and not (channel and channel.supports_streaming):
+                    continue  # Final message still arrives in full for non-streaming channels
                 if channel:
                     try:
                         await channel.send(msg)
@@ -4,6 +4,7 @@ import asyncio
 import os
 import signal
 from pathlib import Path
+from typing import Any
 import select
 import sys
 
@@ -19,7 +20,7 @@ from prompt_toolkit.history import FileHistory
 from prompt_toolkit.patch_stdout import patch_stdout
 
 from nanobot import __version__, __logo__
-from nanobot.config.schema import Config
+from nanobot.config.schema import Config, ModelRouteConfig
 
 app = typer.Typer(
     name="nanobot",
@@ -29,6 +30,7 @@ app = typer.Typer(
 
 console = Console()
 EXIT_COMMANDS = {"exit", "quit", "/exit", "/quit", ":q"}
+THINKING = "[dim]nanobot is thinking...[/dim]"
 
 # ---------------------------------------------------------------------------
 # CLI input: prompt_toolkit for editing, paste, history, and display
@@ -107,6 +109,23 @@ def _print_agent_response(response: str, render_markdown: bool) -> None:
     console.print()
 
 
+class _StreamPreview:
+    """The tail of a reply being streamed, shown in place of the thinking spinner's text."""
+
+    LINES = 6
+
+    def __init__(self):
+        self.status = None  # rich Status while the spinner is up
+        self._text = ""
+
+    async def feed(self, content: str, *, end: bool = False, discard: bool = False) -> None:
+        # Each LLM call starts a fresh preview; the full reply is printed once the turn ends
+        self._text = "" if end else self._text + content
+        if self.status is not None:
+            tail = "\n".join(self._text.rsplit("\n", self.LINES)[-self.LINES:]).strip()
+            self.status.update(Text(tail, style="dim") if tail else THINKING)
+
+
 def _is_exit_command(command: str) -> bool:
     """Return True when input should end interactive chat."""
     return command.lower() in EXIT_COMMANDS
@@ -229,44 +248,196 @@ def _create_workspace_templates(workspace: Path):
     (workspace / "skills").mkdir(exist_ok=True)
 
 
-def _make_provider(config: Config):
-    """Create the appropriate LLM provider from config."""
+def _make_session_store(config: Config, backend: str | None = None):
+    """Create the session store backend from config."""
+    sessions_dir = config.workspace_path / "sessions"
+    if (backend or config.sessions.backend) == "sqlite":
+        from nanobot.session.sqlite_store import SqliteSessionStore
+        return SqliteSessionStore(sessions_dir / "sessions.db", lazy_load=config.sessions.lazy_load)
+
+    from nanobot.session.store import JsonlSessionStore
+    return JsonlSessionStore(
+        sessions_dir,
+        append_only=config.sessions.append_only,
+        compact_every=config.sessions.compact_every,
+        lazy_load=config.sessions.lazy_load,
+    )
+
+
+def _configure_http(config: Config) -> None:
+    """Apply HTTP pool settings to the shared client registry."""
+    from nanobot.utils.http import http_clients
+
+    http_clients.configure(
+        http2=config.http.http2,
+        max_connections=config.http.max_connections,
+        max_keepalive_connections=config.http.max_keepalive_connections,
+        keepalive_expiry_s=config.http.keepalive_expiry_s,
+    )
+
+
+async def _close_http() -> None:
+    from nanobot.utils.http import http_clients
+
+    await http_clients.aclose()
+
+
+def _make_session_manager(config: Config):
+    """Create the session manager from config."""
+    from nanobot.session.manager import SessionManager
+
+    return SessionManager(
+        config.workspace_path,
+        store=_make_session_store(config),
+        cache_max_sessions=config.sessions.cache_max_sessions,
+        cache_max_bytes=config.sessions.cache_max_mb * 1024 * 1024,
+        cache_ttl_s=config.sessions.cache_ttl_s,
+        write_behind=config.sessions.write_behind,
+        fsync=config.sessions.fsync,
+        fsync_interval_s=config.sessions.fsync_interval_s,
+    )
+
+
+def _make_provider(config: Config, model: str | None = None, provider_name: str | None = None):
+    """Create the LLM provider from config, with rate limits and retries around it.
+
+    ``model`` and ``provider_name`` default to agents.defaults (see _route_provider);
+    the default provider also gets the agents.fallback chain.
+    """
+    if model is None and provider_name is None and config.agents.fallback.chain:
+        return _make_fallback_provider(config)
+    provider = _make_base_provider(config, model, provider_name)
+    if config.rate_limits:
+        from nanobot.providers.ratelimit import RateLimitedProvider, shared_limiter
+
+        limiters = {
+            key: shared_limiter(key, limits.rpm, limits.tpm, limits.max_in_flight)
+            for key, limits in config.rate_limits.items()
+        }
+        name = config.get_provider_name(model or config.agents.defaults.model, provider_name)
+        provider = RateLimitedProvider(provider, limiters, name)
+    retry = config.retry
+    if retry.max_attempts <= 1 and not retry.hedge:
+        return provider
+    from nanobot.providers.retry import RetryingProvider
+
+    return RetryingProvider(
+        provider,
+        max_attempts=retry.max_attempts,
+        base_delay_s=retry.base_delay_s,
+        max_delay_s=retry.max_delay_s,
+        hedge=retry.hedge,
+        hedge_percentile=retry.hedge_percentile,
+        hedge_min_delay_s=retry.hedge_min_delay_s,
+    )
+
+
+def _make_fallback_provider(config: Config):
+    """The main model followed by the agents.fallback chain, each with its own provider."""
+    from nanobot.providers.fallback import FallbackProvider, Tier
+
+    main = config.agents.defaults.model
+    tiers = []
+    for model, forced in [(main, None)] + [
+        (entry.model or main, entry.provider or None) for entry in config.agents.fallback.chain
+    ]:
+        label = f"{config.get_provider_name(model, forced)}:{model}"
+        tiers.append(Tier(_make_provider(config, model, forced), model, label))
+    return FallbackProvider(tiers, deadline_s=config.agents.fallback.deadline_s)
+
+
+def _make_base_provider(
+    config: Config, model: str | None = None, provider_name: str | None = None, api_base: str | None = None,
+):
+    """Create the appropriate LLM provider from config (``api_base`` overrides the configured one)."""
     from nanobot.providers.litellm_provider import LiteLLMProvider
     from nanobot.providers.openai_codex_provider import OpenAICodexProvider
     from nanobot.providers.custom_provider import CustomProvider
 
-    model = config.agents.defaults.model
-    provider_name = config.get_provider_name(model)
-    p = config.get_provider(model)
+    model = model or config.agents.defaults.model
+    forced = provider_name
+    provider_name = config.get_provider_name(model, forced)
+    p = config.get_provider(model, forced)
 
     # OpenAI Codex (OAuth)
     if provider_name == "openai_codex" or model.startswith("openai-codex/"):
         return OpenAICodexProvider(default_model=model)
 
+    # Several endpoints (e.g. vLLM replicas): one backend each, load-balanced
+    if p and p.api_bases and api_base is None:
+        from nanobot.providers.balancer import LoadBalancedProvider
+
+        return LoadBalancedProvider([_make_base_provider(config, model, forced, base) for base in p.api_bases])
+
     # Custom: direct OpenAI-compatible endpoint, bypasses LiteLLM
     if provider_name == "custom":
         return CustomProvider(
             api_key=p.api_key if p else "no-key",
-            api_base=config.get_api_base(model) or "http://localhost:8000/v1",
+            api_base=api_base or config.get_api_base(model, forced) or "http://localhost:8000/v1",
             default_model=model,
         )
 
-    from nanobot.providers.registry import find_by_name
+    from nanobot.providers.registry import find_by_name, find_gateway
     spec = find_by_name(provider_name)
     if not model.startswith("bedrock/") and not (p and p.api_key) and not (spec and spec.is_oauth):
         console.print("[red]Error: No API key configured.[/red]")
         console.print("Set one in ~/.nanobot/config.json under providers section")
         raise typer.Exit(1)
 
+    # OpenAI-compatible providers: direct path, LiteLLM only for the other APIs
+    api_base = api_base or config.get_api_base(model, forced)
+    direct = find_gateway(provider_name, p.api_key if p else None, api_base) or spec
+    if direct and direct.openai_compatible and (api_base or direct.default_api_base):
+        return CustomProvider(
+            api_key=p.api_key if p else "no-key",
+            api_base=api_base or direct.default_api_base,
+            default_model=model,
+            spec=direct,
+            extra_headers=p.extra_headers if p else None,
+        )
+
     return LiteLLMProvider(
         api_key=p.api_key if p else None,
-        api_base=config.get_api_base(model),
+        api_base=api_base,
         default_model=model,
         extra_headers=p.extra_headers if p else None,
         provider_name=provider_name,
     )
 
 
+def _route_provider(config: Config, route: ModelRouteConfig, provider) -> tuple[Any, str]:
+    """Provider and model for a routed task (see agents.routing).
+
+    The main provider is reused when the route resolves to the same provider,
+    so only a route to another provider opens its own client. A route to
+    another model does not inherit the agents.fallback chain, which backs up
+    the main model only.
+    """
+    from nanobot.providers.fallback import FallbackProvider
+
+    main_model = config.agents.defaults.model
+    model = route.model or main_model
+    forced = route.provider or None
+    if config.get_provider_name(model, forced) == config.get_provider_name(main_model):
+        if isinstance(provider, FallbackProvider) and model != main_model:
+            provider = provider.tiers[0].provider
+        return provider, model
+    return _make_provider(config, model, forced), model
+
+
+def _agent_routes(config: Config, provider) -> dict[str, Any]:
+    """AgentLoop arguments for the consolidation and subagent routes."""
+    routing = config.agents.routing
+    consolidation_provider, consolidation_model = _route_provider(config, routing.consolidation, provider)
+    subagent_provider, subagent_model = _route_provider(config, routing.subagent, provider)
+    return dict(
+        consolidation_provider=consolidation_provider,
+        consolidation_model=consolidation_model,
+        subagent_provider=subagent_provider,
+        subagent_model=subagent_model,
+    )
+
+
 # ============================================================================
 # Gateway / Server
 # ============================================================================
@@ -282,7 +453,6 @@ def gateway(
     from nanobot.bus.queue import MessageBus
     from nanobot.agent.loop import AgentLoop
     from nanobot.channels.manager import ChannelManager
-    from nanobot.session.manager import SessionManager
     from nanobot.cron.service import CronService
     from nanobot.cron.types import CronJob
     from nanobot.heartbeat.service import HeartbeatService
@@ -296,7 +466,8 @@ def gateway(
     config = load_config()
     bus = MessageBus()
     provider = _make_provider(config)
-    session_manager = SessionManager(config.workspace_path)
+    session_manager = _make_session_manager(config)
+    _configure_http(config)
     
     # Create cron service first (callback set after agent creation)
     cron_store_path = get_data_dir() / "cron" / "jobs.json"
@@ -312,6 +483,8 @@ def gateway(
         max_tokens=config.agents.defaults.max_tokens,
         max_iterations=config.agents.defaults.max_tool_iterations,
         memory_window=config.agents.defaults.memory_window,
+        history_max_tokens=config.agents.defaults.history_max_tokens,
+        max_concurrent_turns=config.agents.defaults.max_concurrent_turns,
         brave_api_key=config.tools.web.search.api_key or None,
         exec_config=config.tools.exec,
         cron_service=cron,
@@ -319,6 +492,7 @@ def gateway(
         session_manager=session_manager,
         mcp_servers=config.tools.mcp_servers,
         channels_config=config.channels,
+        **_agent_routes(config, provider),
     )
     
     # Set cron callback (needs agent)
@@ -345,17 +519,18 @@ def gateway(
 
     def _pick_heartbeat_target() -> tuple[str, str]:
         """Pick a routable channel/chat target for heartbeat-triggered messages."""
-        enabled = set(channels.enabled_channels)
+        enabled = set(channels.enabled_channels) - {"cli", "system"}
         # Prefer the most recently updated non-internal session on an enabled channel.
-        for item in session_manager.list_sessions():
-            key = item.get("key") or ""
-            if ":" not in key:
-                continue
-            channel, chat_id = key.split(":", 1)
-            if channel in {"cli", "system"}:
-                continue
-            if channel in enabled and chat_id:
-                return channel, chat_id
+        candidates = [
+            item
+            for channel in enabled
+            for item in session_manager.list_sessions(channel=channel, limit=1)
+            if item["key"].split(":", 1)[1]
+        ]
+        if candidates:
+            latest = max(candidates, key=lambda item: item.get("updated_at") or "")
+            channel, chat_id = latest["key"].split(":", 1)
+            return channel, chat_id
         # Fallback keeps prior behavior but remains explicit.
         return "cli", "direct"
 
@@ -384,10 +559,11 @@ def gateway(
         await bus.publish_outbound(OutboundMessage(channel=channel, chat_id=chat_id, content=response))
 
     hb_cfg = config.gateway.heartbeat
+    heartbeat_provider, heartbeat_model = _route_provider(config, config.agents.routing.heartbeat, provider)
     heartbeat = HeartbeatService(
         workspace=config.workspace_path,
-        provider=provider,
-        model=agent.model,
+        provider=heartbeat_provider,
+        model=heartbeat_model,
         on_execute=on_heartbeat_execute,
         on_notify=on_heartbeat_notify,
         interval_s=hb_cfg.interval_s,
@@ -421,6 +597,8 @@ def gateway(
             cron.stop()
             agent.stop()
             await channels.stop_all()
+            session_manager.close()
+            await _close_http()
     
     asyncio.run(run())
 
@@ -450,6 +628,7 @@ def agent(
     
     bus = MessageBus()
     provider = _make_provider(config)
+    _configure_http(config)
 
     # Create cron service for tool usage (no callback needed for CLI unless running)
     cron_store_path = get_data_dir() / "cron" / "jobs.json"
@@ -469,12 +648,16 @@ def agent(
         max_tokens=config.agents.defaults.max_tokens,
         max_iterations=config.agents.defaults.max_tool_iterations,
         memory_window=config.agents.defaults.memory_window,
+        history_max_tokens=config.agents.defaults.history_max_tokens,
+        max_concurrent_turns=config.agents.defaults.max_concurrent_turns,
         brave_api_key=config.tools.web.search.api_key or None,
         exec_config=config.tools.exec,
         cron_service=cron,
         restrict_to_workspace=config.tools.restrict_to_workspace,
+        session_manager=_make_session_manager(config),
         mcp_servers=config.tools.mcp_servers,
         channels_config=config.channels,
+        **_agent_routes(config, provider),
     )
     
     # Show spinner when logs are off (no output to miss); skip when logs are on
@@ -483,7 +666,7 @@ def agent(
             from contextlib import nullcontext
             return nullcontext()
         # Animated spinner is safe to use with prompt_toolkit input handling
-        return console.status("[dim]nanobot is thinking...[/dim]", spinner="dots")
+        return console.status(THINKING, spinner="dots")
 
     async def _cli_progress(content: str, *, tool_hint: bool = False) -> None:
         ch = agent_loop.channels_config
@@ -493,13 +676,19 @@ def agent(
             return
         console.print(f"  [dim]↳ {content}[/dim]")
 
+    preview = _StreamPreview()
+
     if message:
         # Single message mode — direct call, no bus needed
         async def run_once():
-            with _thinking_ctx():
-                response = await agent_loop.process_direct(message, session_id, on_progress=_cli_progress)
+            with _thinking_ctx() as preview.status:
+                response = await agent_loop.process_direct(
+                    message, session_id, on_progress=_cli_progress, on_delta=preview.feed,
+                )
             _print_agent_response(response, render_markdown=markdown)
             await agent_loop.close_mcp()
+            agent_loop.sessions.close()
+            await _close_http()
 
         asyncio.run(run_once())
     else:
@@ -530,6 +719,9 @@ def agent(
                 while True:
                     try:
                         msg = await asyncio.wait_for(bus.consume_outbound(), timeout=1.0)
+                        if msg.metadata.get("_stream_delta"):
+                            await preview.feed(msg.content, end=msg.metadata.get("_stream_end", False))
+                            continue
                         if msg.metadata.get("_progress"):
                             is_tool_hint = msg.metadata.get("_tool_hint", False)
                             ch = agent_loop.channels_config
@@ -577,8 +769,9 @@ def agent(
                             content=user_input,
                         ))
 
-                        with _thinking_ctx():
+                        with _thinking_ctx() as preview.status:
                             await turn_done.wait()
+                        preview.status = None
 
                         if turn_response:
                             _print_agent_response(turn_response[0], render_markdown=markdown)
@@ -595,6 +788,8 @@ def agent(
                 outbound_task.cancel()
                 await asyncio.gather(bus_task, outbound_task, return_exceptions=True)
                 await agent_loop.close_mcp()
+                agent_loop.sessions.close()
+                await _close_http()
 
         asyncio.run(run_interactive())
 
@@ -783,6 +978,86 @@ def channels_login():
         console.print("[red]npm not found. Please install Node.js.[/red]")
 
 
+# ============================================================================
+# Session Commands
+# ============================================================================
+
+sessions_app = typer.Typer(help="Manage conversation sessions")
+app.add_typer(sessions_app, name="sessions")
+
+
+@sessions_app.command("migrate")
+def sessions_migrate():
+    """Copy JSONL sessions into the SQLite session store."""
+    from nanobot.config.loader import load_config
+    from nanobot.session.store import JsonlSessionStore
+
+    config = load_config()
+    source = JsonlSessionStore(config.workspace_path / "sessions", lazy_load=False)
+    target = _make_session_store(config, backend="sqlite")
+
+    migrated = failed = 0
+    try:
+        for info in source.list_sessions():
+            session = source.load(info["key"])
+            if session is None:
+                failed += 1
+                continue
+            session._needs_rewrite = True
+            target.save(session)
+            migrated += 1
+    finally:
+        target.close()
+
+    console.print(f"[green]✓[/green] Migrated {migrated} session(s) to {target.db_path}")
+    if failed:
+        console.print(f"[yellow]Skipped {failed} unreadable session(s)[/yellow]")
+    if config.sessions.backend != "sqlite":
+        console.print('Set [cyan]sessions.backend[/cyan] to "sqlite" in your config to use it.')
+
+
+@sessions_app.command("compact")
+def sessions_compact(
+    idle_days: int = typer.Option(None, "--idle-days", help="Archive whole sessions idle this many days (default: sessions.archiveAfterDays, 0 = never)"),
+):
+    """Move consolidated and idle session history into compressed archives (run while the gateway is stopped)."""
+    from datetime import datetime, timedelta
+
+    from nanobot.config.loader import load_config
+    from nanobot.session.store import JsonlSessionStore
+
+    config = load_config()
+    if config.sessions.backend != "jsonl":
+        console.print("[yellow]Archival is only supported for the jsonl session backend.[/yellow]")
+        raise typer.Exit(1)
+
+    sessions_dir = config.workspace_path / "sessions"
+    store = JsonlSessionStore(sessions_dir)
+    days = config.sessions.archive_after_days if idle_days is None else idle_days
+    cutoff = datetime.now() - timedelta(days=days)
+
+    def _active_bytes() -> int:
+        return sum(p.stat().st_size for p in sessions_dir.glob("*.jsonl"))
+
+    before = _active_bytes()
+    compacted = moved = 0
+    for info in store.list_sessions():
+        session = store.load(info["key"])
+        if session is None:
+            continue
+        idle = days > 0 and session.updated_at < cutoff
+        count = store.archive(session.key, len(session.messages) if idle else session.last_consolidated)
+        if count:
+            compacted += 1
+            moved += count
+
+    after = _active_bytes()
+    console.print(
+        f"[green]✓[/green] Archived {moved} message(s) from {compacted} session(s); "
+        f"active files {before / 1024:.1f} KiB → {after / 1024:.1f} KiB"
+    )
+
+
 # ============================================================================
 # Cron Commands
 # ============================================================================
@@ -950,6 +1225,7 @@ def cron_run(
 
     config = load_config()
     provider = _make_provider(config)
+    _configure_http(config)
     bus = MessageBus()
     agent_loop = AgentLoop(
         bus=bus,
@@ -960,11 +1236,14 @@ def cron_run(
         max_tokens=config.agents.defaults.max_tokens,
         max_iterations=config.agents.defaults.max_tool_iterations,
         memory_window=config.agents.defaults.memory_window,
+        history_max_tokens=config.agents.defaults.history_max_tokens,
         brave_api_key=config.tools.web.search.api_key or None,
         exec_config=config.tools.exec,
         restrict_to_workspace=config.tools.restrict_to_workspace,
+        session_manager=_make_session_manager(config),
         mcp_servers=config.tools.mcp_servers,
         channels_config=config.channels,
+        **_agent_routes(config, provider),
     )
 
     store_path = get_data_dir() / "cron" / "jobs.json"
@@ -985,7 +1264,11 @@ def cron_run(
     service.on_job = on_job
 
     async def run():
-        return await service.run_job(job_id, force=force)
+        try:
+            return await service.run_job(job_id, force=force)
+        finally:
+            agent_loop.sessions.close()
+            await _close_http()
 
     if asyncio.run(run()):
         console.print("[green]✓[/green] Job executed")
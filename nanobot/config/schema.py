@@ -189,6 +189,7 @@ class ChannelsConfig(Base):
 
     send_progress: bool = True    # stream agent's text progress to the channel
     send_tool_hints: bool = False  # stream tool-call hints (e.g. read_file("…"))
+    send_deltas: bool = False  # stream LLM tokens to channels that render them incrementally
     whatsapp: WhatsAppConfig = Field(default_factory=WhatsAppConfig)
     telegram: TelegramConfig = Field(default_factory=TelegramConfig)
     discord: DiscordConfig = Field(default_factory=DiscordConfig)
@@ -211,12 +212,43 @@ class AgentDefaults(Base):
     temperature: float = 0.1
     max_tool_iterations: int = 40
     memory_window: int = 100
+    history_max_tokens: int = 0  # Token budget for session history, e.g. 32000 (0 = message count only)
+    max_concurrent_turns: int = 8  # Turns of different sessions processed in parallel
+
+
+class ModelRouteConfig(Base):
+    """Model for one kind of background LLM call; empty fields fall back to the main agent's."""
+
+    model: str = ""
+    provider: str = ""  # Provider name (e.g. "groq"); empty = as for the main agent
+
+
+class ModelRoutingConfig(Base):
+    """Per-task models, so background work can use fast, cheap ones (main = agents.defaults)."""
+
+    heartbeat: ModelRouteConfig = Field(default_factory=ModelRouteConfig)  # Heartbeat skip/run decision
+    consolidation: ModelRouteConfig = Field(default_factory=ModelRouteConfig)  # Memory consolidation
+    subagent: ModelRouteConfig = Field(default_factory=ModelRouteConfig)  # Spawned subagents
+
+
+class FallbackConfig(Base):
+    """
+    Models to try, in order, when the main one errors or misses the deadline.
+
+    Only calls to the main model fall back: an agents.routing route to
+    another model uses that model alone.
+    """
+
+    chain: list[ModelRouteConfig] = Field(default_factory=list)
+    deadline_s: float = 0.0  # Per-attempt deadline (streams: until the first event); 0 = none
 
 
 class AgentsConfig(Base):
     """Agent configuration."""
 
     defaults: AgentDefaults = Field(default_factory=AgentDefaults)
+    routing: ModelRoutingConfig = Field(default_factory=ModelRoutingConfig)
+    fallback: FallbackConfig = Field(default_factory=FallbackConfig)
 
 
 class ProviderConfig(Base):
@@ -224,6 +256,7 @@ class ProviderConfig(Base):
 
     api_key: str = ""
     api_base: str | None = None
+    api_bases: list[str] = Field(default_factory=list)  # Several endpoints (e.g. vLLM replicas), load-balanced
     extra_headers: dict[str, str] | None = None  # Custom headers (e.g. APP-Code for AiHubMix)
 
 
@@ -264,6 +297,50 @@ class GatewayConfig(Base):
     heartbeat: HeartbeatConfig = Field(default_factory=HeartbeatConfig)
 
 
+class SessionsConfig(Base):
+    """Session storage configuration."""
+
+    backend: Literal["jsonl", "sqlite"] = "jsonl"  # sqlite stores sessions in sessions/sessions.db
+    append_only: bool = True  # Append new messages instead of rewriting the whole file
+    compact_every: int = 100  # Full rewrite after this many appends
+    lazy_load: bool = True  # Load only the unconsolidated tail; page older messages in on demand
+    cache_max_sessions: int = 256  # Sessions kept in memory (0 = unlimited)
+    cache_max_mb: int = 64  # Approximate memory budget for cached sessions (0 = unlimited)
+    cache_ttl_s: int = 3600  # Drop sessions idle for longer than this (0 = never)
+    write_behind: bool = True  # Write sessions from a background I/O thread
+    fsync: Literal["none", "interval", "always"] = "none"  # When to fsync written sessions
+    fsync_interval_s: float = 1.0  # Sync period for fsync = "interval"
+    archive_after_days: int = 30  # `nanobot sessions compact` archives whole sessions idle this long
+
+
+class HttpConfig(Base):
+    """Pooled HTTP clients shared by providers, tools and channels."""
+
+    http2: bool = False  # Needs the optional 'h2' package (pip install httpx[http2])
+    max_connections: int = 100  # Per pool (one pool per service)
+    max_keepalive_connections: int = 20
+    keepalive_expiry_s: float = 30.0
+
+
+class RateLimitConfig(Base):
+    """Client-side limits for one provider or model (0 = unlimited)."""
+
+    rpm: int = 0  # Requests per minute
+    tpm: int = 0  # Prompt + completion tokens per minute (estimated, then reconciled with usage)
+    max_in_flight: int = 0  # Concurrent requests
+
+
+class RetryConfig(Base):
+    """Retries and hedged requests for LLM calls."""
+
+    max_attempts: int = 3  # 1 = no retries
+    base_delay_s: float = 0.5  # Backoff doubles per attempt, with full jitter
+    max_delay_s: float = 30.0  # Backoff cap; a longer Retry-After ends the retries
+    hedge: bool = False  # Send a second request when one outlasts the hedge percentile
+    hedge_percentile: float = 0.95
+    hedge_min_delay_s: float = 1.0
+
+
 class WebSearchConfig(Base):
     """Web search tool configuration."""
 
@@ -311,6 +388,10 @@ class Config(BaseSettings):
     channels: ChannelsConfig = Field(default_factory=ChannelsConfig)
     providers: ProvidersConfig = Field(default_factory=ProvidersConfig)
     gateway: GatewayConfig = Field(default_factory=GatewayConfig)
+    sessions: SessionsConfig = Field(default_factory=SessionsConfig)
+    http: HttpConfig = Field(default_factory=HttpConfig)
+    retry: RetryConfig = Field(default_factory=RetryConfig)
+    rate_limits: dict[str, RateLimitConfig] = Field(default_factory=dict)  # Keyed by provider name or model
     tools: ToolsConfig = Field(default_factory=ToolsConfig)
 
     @property
@@ -318,11 +399,16 @@ class Config(BaseSettings):
         """Get expanded workspace path."""
         return Path(self.agents.defaults.workspace).expanduser()
 
-    def _match_provider(self, model: str | None = None) -> tuple["ProviderConfig | None", str | None]:
-        """Match provider config and its registry name. Returns (config, spec_name)."""
+    def _match_provider(
+        self, model: str | None = None, provider: str | None = None,
+    ) -> tuple["ProviderConfig | None", str | None]:
+        """Match provider config and its registry name. Returns (config, spec_name).
+
+        ``provider`` forces a provider by name, like agents.defaults.provider does.
+        """
         from nanobot.providers.registry import PROVIDERS
 
-        forced = self.agents.defaults.provider
+        forced = provider or self.agents.defaults.provider
         if forced != "auto":
             p = getattr(self.providers, forced, None)
             return (p, forced) if p else (None, None)
@@ -360,14 +446,14 @@ class Config(BaseSettings):
                 return p, spec.name
         return None, None
 
-    def get_provider(self, model: str | None = None) -> ProviderConfig | None:
+    def get_provider(self, model: str | None = None, provider: str | None = None) -> ProviderConfig | None:
         """Get matched provider config (api_key, api_base, extra_headers). Falls back to first available."""
-        p, _ = self._match_provider(model)
+        p, _ = self._match_provider(model, provider)
         return p
 
-    def get_provider_name(self, model: str | None = None) -> str | None:
+    def get_provider_name(self, model: str | None = None, provider: str | None = None) -> str | None:
         """Get the registry name of the matched provider (e.g. "deepseek", "openrouter")."""
-        _, name = self._match_provider(model)
+        _, name = self._match_provider(model, provider)
         return name
 
     def get_api_key(self, model: str | None = None) -> str | None:
@@ -375,11 +461,11 @@ class Config(BaseSettings):
         p = self.get_provider(model)
         return p.api_key if p else None
 
-    def get_api_base(self, model: str | None = None) -> str | None:
+    def get_api_base(self, model: str | None = None, provider: str | None = None) -> str | None:
         """Get API base URL for the given model. Applies default URLs for known gateways."""
         from nanobot.providers.registry import find_by_name
 
-        p, name = self._match_provider(model)
+        p, name = self._match_provider(model, provider)
         if p and p.api_base:
             return p.api_base
         # Only gateways get a default api_base here. Standard providers
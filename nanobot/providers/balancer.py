@@ -0,0 +1,194 @@
+"""Load balancing across several endpoints of one provider (e.g. vLLM replicas)."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from typing import Any, AsyncIterator
+
+from loguru import logger
+
+from nanobot.providers.base import LLMProvider, LLMResponse, LLMStreamEvent
+from nanobot.providers.retry import is_retryable
+from nanobot.utils.http import http_clients
+
+
+class Backend:
+    """One endpoint with its in-flight count and health state."""
+
+    def __init__(self, provider: LLMProvider, name: str):
+        self.provider = provider
+        self.name = name
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def info(self) -> dict[str, Any]:
+        return {
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ejected": not self.healthy(time.monotonic()),
+        }
+
+
+class LoadBalancedProvider(LLMProvider):
+    """
+    Spreads calls over several backends of the same model.
+
+    A call from a session (PromptMessages.session_key) goes to the session's
+    backend by rendezvous hashing, so its prompt prefix stays in that
+    replica's KV cache; the mapping only changes for sessions of a backend
+    that leaves. Calls without a session, and sessions whose backend is
+    ``affinity_slack`` requests busier than the least loaded one, go to the
+    backend with the fewest outstanding requests.
+
+    A backend failing ``eject_after`` times in a row with a transient error
+    (see is_retryable) is ejected for ``eject_s``, and the call moves on to
+    the next backend. Every ``health_check_interval_s`` ejected backends are
+    probed with GET /models and readmitted when they answer.
+    """
+
+    def __init__(
+        self,
+        backends: list[LLMProvider],
+        eject_after: int = 3,
+        eject_s: float = 30.0,
+        affinity_slack: int = 4,
+        health_check_interval_s: float = 10.0,
+    ):
+        first = backends[0]
+        super().__init__(first.api_key, first.api_base)
+        self.backends = [Backend(p, p.api_base or f"backend-{i}") for i, p in enumerate(backends)]
+        self.eject_after = eject_after
+        self.eject_s = eject_s
+        self.affinity_slack = affinity_slack
+        self.health_check_interval_s = health_check_interval_s
+        self._last_health_check = time.monotonic()
+        self._health_task: asyncio.Task | None = None
+
+    @staticmethod
+    def _score(session_key: str, backend: Backend) -> bytes:
+        return hashlib.blake2b(f"{session_key}|{backend.name}".encode(), digest_size=8).digest()
+
+    def _ranked(self, session_key: str | None) -> list[Backend]:
+        """Backends in the order a call should try them."""
+        now = time.monotonic()
+        healthy = [b for b in self.backends if b.healthy(now)]
+        if not healthy:
+            # Everything is ejected: try the backend that comes back first
+            return sorted(self.backends, key=lambda b: b.ejected_until)
+        least = sorted(healthy, key=lambda b: b.outstanding)
+        if session_key:
+            sticky = max(healthy, key=lambda b: self._score(session_key, b))
+            if sticky.outstanding <= least[0].outstanding + self.affinity_slack:
+                return [sticky, *(b for b in least if b is not sticky)]
+        return least
+
+    def _finish(self, backend: Backend, response: LLMResponse | None) -> None:
+        backend.outstanding -= 1
+        if response is None or response.finish_reason != "error" or not is_retryable(response.error):
+            backend.consecutive_failures = 0
+            return
+        backend.failures += 1
+        backend.consecutive_failures += 1
+        if backend.consecutive_failures >= self.eject_after:
+            backend.ejected_until = time.monotonic() + self.eject_s
+            logger.warning("Ejecting LLM backend {} for {:.0f}s: {}", backend.name, self.eject_s, response.error)
+
+    def _maybe_check_health(self) -> None:
+        now = time.monotonic()
+        if now - self._last_health_check < self.health_check_interval_s:
+            return
+        if self._health_task is not None and not self._health_task.done():
+            return
+        self._last_health_check = now
+        if any(not b.healthy(now) for b in self.backends):
+            self._health_task = asyncio.create_task(self.check_health())
+
+    async def check_health(self) -> None:
+        """Probe ejected backends with GET /models and readmit those that answer."""
+        client = http_clients.get("llm-health")
+        for backend in self.backends:
+            if backend.healthy(time.monotonic()) or not backend.provider.api_base:
+                continue
+            api_key, api_base = backend.provider.api_key, backend.provider.api_base
+            headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+            try:
+                response = await client.get(f"{api_base.rstrip('/')}/models", headers=headers, timeout=5.0)
+            except Exception as e:
+                logger.debug("Health check of {} failed: {}", backend.name, e)
+                continue
+            if response.status_code < 500:
+                backend.ejected_until = 0.0
+                backend.consecutive_failures = 0
+                logger.info("LLM backend {} is healthy again", backend.name)
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        self._maybe_check_health()
+        response: LLMResponse | None = None
+        for backend in self._ranked(getattr(messages, "session_key", None)):
+            backend.outstanding += 1
+            backend.requests += 1
+            response = None
+            try:
+                response = await backend.provider.chat(
+                    messages=messages, tools=tools, model=model,
+                    max_tokens=max_tokens, temperature=temperature,
+                )
+            finally:
+                self._finish(backend, response)
+            if response.finish_reason != "error" or not is_retryable(response.error):
+                break
+        return response
+
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[LLMStreamEvent]:
+        self._maybe_check_health()
+        for backend in self._ranked(getattr(messages, "session_key", None)):
+            backend.outstanding += 1
+            backend.requests += 1
+            response = None
+            started = failover = False
+            try:
+                async for event in backend.provider.chat_stream(
+                    messages=messages, tools=tools, model=model,
+                    max_tokens=max_tokens, temperature=temperature,
+                ):
+                    response = event.response
+                    if response is not None and not started and is_retryable(response.error):
+                        failover = True
+                        continue
+                    started = started or bool(event.content or event.reasoning_content or event.tool_call)
+                    yield event
+            finally:
+                self._finish(backend, response)
+            if not failover:
+                return
+        if response is not None:
+            yield LLMStreamEvent(response=response)
+
+    def info(self) -> dict[str, dict[str, Any]]:
+        return {b.name: b.info() for b in self.backends}
+
+    def get_default_model(self) -> str:
+        return self.backends[0].provider.get_default_model()
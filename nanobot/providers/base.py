@@ -2,7 +2,166 @@
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import Any
+from itertools import islice
+from typing import Any, AsyncIterator, Iterable
+
+import json_repair
+
+from nanobot.utils.tokens import estimate_message_tokens
+
+# Standard OpenAI chat-completion message keys plus reasoning_content for
+# thinking-enabled models (Kimi k2.5, DeepSeek-R1, etc.).
+MESSAGE_KEYS = frozenset({"role", "content", "tool_calls", "tool_call_id", "name", "reasoning_content"})
+
+_SEGMENT_SEPARATOR = "\n\n---\n\n"
+_EPHEMERAL = {"type": "ephemeral"}
+# Rolling history breakpoints: the newest message plus anchors at fixed
+# positions every _ANCHOR_STRIDE messages. Anthropic looks back up to 20
+# blocks from a breakpoint for a cached prefix, so earlier anchors keep
+# hitting while the tool loop appends messages.
+_HISTORY_BREAKPOINTS = 2
+_ANCHOR_STRIDE = 8
+
+
+def _sanitize_content(msg: dict[str, Any]) -> dict[str, Any]:
+    """Replace empty text content that causes provider 400 errors (copying only if needed)."""
+    content = msg.get("content")
+
+    if isinstance(content, str) and not content:
+        clean = dict(msg)
+        clean["content"] = None if (msg.get("role") == "assistant" and msg.get("tool_calls")) else "(empty)"
+        return clean
+
+    if isinstance(content, list):
+        filtered = [
+            item for item in content
+            if not (
+                isinstance(item, dict)
+                and item.get("type") in ("text", "input_text", "output_text")
+                and not item.get("text")
+            )
+        ]
+        if len(filtered) != len(content):
+            clean = dict(msg)
+            if filtered:
+                clean["content"] = filtered
+            elif msg.get("role") == "assistant" and msg.get("tool_calls"):
+                clean["content"] = None
+            else:
+                clean["content"] = "(empty)"
+            return clean
+
+    return msg
+
+
+def sanitize_message(msg: dict[str, Any]) -> dict[str, Any]:
+    """
+    Return a message in the form every provider accepts.
+
+    Empty content is replaced, keys outside MESSAGE_KEYS are dropped and
+    assistant messages always carry "content". A message that is already
+    clean is returned as is.
+    """
+    clean = _sanitize_content(msg)
+    if not MESSAGE_KEYS.issuperset(clean) or (clean.get("role") == "assistant" and "content" not in clean):
+        clean = {k: v for k, v in clean.items() if k in MESSAGE_KEYS}
+        if clean.get("role") == "assistant":
+            clean.setdefault("content", None)
+    return clean
+
+
+class PromptMessages(list):
+    """
+    A message list whose entries are sanitized once, as they are added.
+
+    Providers send it without their per-call sanitizing pass, so a growing
+    tool-call loop no longer copies every message on every iteration.
+
+    ``system_segments`` optionally records how the leading system message is
+    split, from most to least stable, so providers with prompt caching can
+    place a cache breakpoint after each segment. ``session_key`` identifies
+    the conversation for providers that take a cache routing key.
+    ``estimated_tokens()`` keeps a running estimate, so each message is
+    counted once however many calls the list is sent with.
+    """
+
+    def __init__(
+        self,
+        messages: Iterable[dict[str, Any]] = (),
+        system_segments: list[str] | None = None,
+        session_key: str | None = None,
+    ):
+        super().__init__(sanitize_message(m) for m in messages)
+        self.system_segments = system_segments
+        self.session_key = session_key
+        self._tokens = 0
+        self._counted = 0  # Leading messages included in _tokens
+
+    def estimated_tokens(self) -> int:
+        """Estimated prompt tokens of all messages; only new ones are counted."""
+        if self._counted > len(self):  # Messages were removed: recount
+            self._tokens = self._counted = 0
+        self._tokens += sum(estimate_message_tokens(m) for m in islice(self, self._counted, None))
+        self._counted = len(self)
+        return self._tokens
+
+    def append(self, msg: dict[str, Any]) -> None:
+        super().append(sanitize_message(msg))
+
+    def extend(self, messages: Iterable[dict[str, Any]]) -> None:
+        super().extend(sanitize_message(m) for m in messages)
+
+
+def parse_usage(u: Any) -> dict[str, int]:
+    """
+    Token usage from an OpenAI-style usage object.
+
+    Besides prompt/completion/total tokens, records prompt-cache reads as
+    ``cached_tokens`` (OpenAI ``prompt_tokens_details.cached_tokens`` or
+    Anthropic ``cache_read_input_tokens``) and cache writes as
+    ``cache_creation_tokens`` when the provider reports them.
+    """
+    usage = {
+        "prompt_tokens": u.prompt_tokens,
+        "completion_tokens": u.completion_tokens,
+        "total_tokens": u.total_tokens,
+    }
+    details = getattr(u, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None) or getattr(u, "cache_read_input_tokens", None)
+    if isinstance(cached, int):
+        usage["cached_tokens"] = cached
+    created = getattr(u, "cache_creation_input_tokens", None)
+    if isinstance(created, int):
+        usage["cache_creation_tokens"] = created
+    return usage
+
+
+class PromptCacheStats:
+    """Running provider prompt-cache counters, fed from response usage."""
+
+    def __init__(self):
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.cache_creation_tokens = 0
+
+    def record(self, usage: dict[str, int]) -> None:
+        if not usage.get("prompt_tokens"):
+            return
+        self.requests += 1
+        self.prompt_tokens += usage["prompt_tokens"]
+        self.cached_tokens += usage.get("cached_tokens", 0)
+        self.cache_creation_tokens += usage.get("cache_creation_tokens", 0)
+
+    def info(self) -> dict[str, float]:
+        """Counters plus hit_rate: the share of prompt tokens read from the cache."""
+        return {
+            "requests": self.requests,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cache_creation_tokens": self.cache_creation_tokens,
+            "hit_rate": self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0,
+        }
 
 
 @dataclass
@@ -21,6 +180,8 @@ class LLMResponse:
     finish_reason: str = "stop"
     usage: dict[str, int] = field(default_factory=dict)
     reasoning_content: str | None = None  # Kimi, DeepSeek-R1 etc.
+    error: Exception | None = field(default=None, repr=False)  # What caused finish_reason="error"
+    queue_wait_s: float = 0.0  # Time spent waiting for a client-side rate limit slot
     
     @property
     def has_tool_calls(self) -> bool:
@@ -28,6 +189,98 @@ class LLMResponse:
         return len(self.tool_calls) > 0
 
 
+@dataclass
+class LLMStreamEvent:
+    """
+    One event from a streaming chat call.
+
+    Text arrives as ``content`` deltas, tool calls once fully assembled, and
+    the final event carries the complete ``response``.
+    """
+    content: str = ""
+    reasoning_content: str = ""
+    tool_call: ToolCallRequest | None = None
+    response: LLMResponse | None = None
+
+
+class ChatStreamAssembler:
+    """
+    Assemble OpenAI-style chat completion chunks into stream events and a final response.
+
+    A tool call is emitted as soon as it is complete: when the next call's
+    index starts, or when the choice reports a finish_reason.
+    """
+
+    def __init__(self):
+        self._content: list[str] = []
+        self._reasoning: list[str] = []
+        self._tool_calls: dict[int, dict[str, str]] = {}
+        self._completed: dict[int, ToolCallRequest] = {}
+        self._finish_reason = "stop"
+        self._usage: dict[str, int] = {}
+
+    def feed(self, chunk: Any) -> list[LLMStreamEvent]:
+        """Consume one chunk; return the events it completes (new text, finished tool calls)."""
+        if u := getattr(chunk, "usage", None):
+            self._usage = parse_usage(u)
+        if not getattr(chunk, "choices", None):
+            return []
+        choice = chunk.choices[0]
+        events: list[LLMStreamEvent] = []
+        delta = getattr(choice, "delta", None)
+
+        for tc in getattr(delta, "tool_calls", None) or []:
+            index = tc.index or 0
+            if index not in self._tool_calls:
+                events += self._complete_tool_calls(before=index)
+            buf = self._tool_calls.setdefault(index, {"id": "", "name": "", "arguments": ""})
+            if tc.id:
+                buf["id"] = tc.id
+            if fn := tc.function:
+                if fn.name:
+                    buf["name"] = fn.name
+                if fn.arguments:
+                    buf["arguments"] += fn.arguments
+
+        text = getattr(delta, "content", None) or ""
+        reasoning = getattr(delta, "reasoning_content", None) or ""
+        if text or reasoning:
+            self._content.append(text)
+            self._reasoning.append(reasoning)
+            events.append(LLMStreamEvent(content=text, reasoning_content=reasoning))
+        if choice.finish_reason:
+            self._finish_reason = choice.finish_reason
+            events += self._complete_tool_calls()
+        return events
+
+    def flush(self) -> list[LLMStreamEvent]:
+        """Emit tool calls still open when the stream ended without a finish_reason."""
+        return self._complete_tool_calls()
+
+    def _complete_tool_calls(self, before: int | None = None) -> list[LLMStreamEvent]:
+        events = []
+        for index, buf in sorted(self._tool_calls.items()):
+            if index in self._completed or (before is not None and index >= before):
+                continue
+            self._completed[index] = ToolCallRequest(
+                id=buf["id"], name=buf["name"],
+                arguments=json_repair.loads(buf["arguments"] or "{}"),
+            )
+            events.append(LLMStreamEvent(tool_call=self._completed[index]))
+        return events
+
+    def result(self) -> LLMResponse:
+        """Build the final response from everything fed so far."""
+        self._complete_tool_calls()
+        return LLMResponse(
+            content="".join(self._content) or None,
+            tool_calls=[call for _, call in sorted(self._completed.items())],
+            finish_reason=self._finish_reason,
+            usage=self._usage,
+            reasoning_content="".join(self._reasoning) or None,
+        )
+
+
 class LLMProvider(ABC):
     """
     Abstract base class for LLM providers.
@@ -39,6 +292,89 @@ class LLMProvider(ABC):
     def __init__(self, api_key: str | None = None, api_base: str | None = None):
         self.api_key = api_key
         self.api_base = api_base
+        self._cached_tools: tuple[list[dict[str, Any]], list[dict[str, Any]]] | None = None
+
+    def _apply_cache_control(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+        limit: int = 4,
+    ) -> tuple[list[dict[str, Any]], list[dict[str, Any]] | None]:
+        """
+        Return copies of messages and tools with at most ``limit`` cache_control breakpoints.
+
+        Breakpoints go, in order of priority, to recent history (rolling, see
+        _history_breakpoints), to the system prompt and then to the last tool
+        definition. A system prompt built from segments (see PromptMessages)
+        is sent as one block per segment and its latest, least stable
+        segments get breakpoints first; tools precede the system prompt in
+        the cached prefix, so a system breakpoint covers them too.
+        """
+        new_messages = list(messages)
+        history = self._history_breakpoints(messages, min(_HISTORY_BREAKPOINTS, limit - 1))
+        budget = limit - len(history)
+
+        if messages and messages[0].get("role") == "system" and budget > 0:
+            content = messages[0]["content"]
+            segments = getattr(messages, "system_segments", None)
+            if segments and content == _SEGMENT_SEPARATOR.join(segments):
+                blocks = [
+                    {"type": "text", "text": seg + (_SEGMENT_SEPARATOR if j < len(segments) - 1 else "")}
+                    for j, seg in enumerate(segments)
+                ]
+            elif isinstance(content, str):
+                blocks = [{"type": "text", "text": content}]
+            else:
+                blocks = list(content)
+            marked = min(budget, len(blocks))
+            for j in range(len(blocks) - marked, len(blocks)):
+                blocks[j] = {**blocks[j], "cache_control": _EPHEMERAL}
+            new_messages[0] = {**messages[0], "content": blocks}
+            budget -= marked
+
+        for i in history:
+            content = messages[i]["content"]
+            if isinstance(content, str):
+                blocks = [{"type": "text", "text": content, "cache_control": _EPHEMERAL}]
+            else:
+                blocks = list(content)
+                blocks[-1] = {**blocks[-1], "cache_control": _EPHEMERAL}
+            new_messages[i] = {**messages[i], "content": blocks}
+
+        if not tools or budget <= 0:
+            return new_messages, tools
+        # The registry hands out the same definitions list until tools change
+        cached = self._cached_tools
+        if cached is not None and cached[0] is tools:
+            return new_messages, cached[1]
+        new_tools = list(tools)
+        new_tools[-1] = {**new_tools[-1], "cache_control": _EPHEMERAL}
+        self._cached_tools = (tools, new_tools)
+        return new_messages, new_tools
+
+    @staticmethod
+    def _history_breakpoints(messages: list[dict[str, Any]], count: int) -> list[int]:
+        """
+        Indices of the history messages that get a rolling cache breakpoint.
+
+        The newest message with text content, then anchors at multiples of
+        _ANCHOR_STRIDE before it. Anchors only move when the loop has appended
+        a whole stride, so each call finds the prefixes written by earlier ones.
+        """
+        picks: list[int] = []
+        i = len(messages) - 1
+        while len(picks) < count and i > 0:
+            msg = messages[i]
+            content = msg.get("content")
+            if msg.get("role") != "system" and (
+                (isinstance(content, str) and content)
+                or (isinstance(content, list) and content and isinstance(content[-1], dict))
+            ):
+                picks.append(i)
+                i = (i - 1) // _ANCHOR_STRIDE * _ANCHOR_STRIDE
+            else:
+                i -= 1
+        return picks
 
     @staticmethod
     def _sanitize_empty_content(messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
@@ -46,39 +382,18 @@ class LLMProvider(ABC):
 
         Empty content can appear when MCP tools return nothing. Most providers
         reject empty-string content or empty text blocks in list content.
+        PromptMessages are already clean and returned unchanged.
         """
-        result: list[dict[str, Any]] = []
-        for msg in messages:
-            content = msg.get("content")
-
-            if isinstance(content, str) and not content:
-                clean = dict(msg)
-                clean["content"] = None if (msg.get("role") == "assistant" and msg.get("tool_calls")) else "(empty)"
-                result.append(clean)
-                continue
+        if isinstance(messages, PromptMessages):
+            return messages
+        return [_sanitize_content(msg) for msg in messages]
 
-            if isinstance(content, list):
-                filtered = [
-                    item for item in content
-                    if not (
-                        isinstance(item, dict)
-                        and item.get("type") in ("text", "input_text", "output_text")
-                        and not item.get("text")
-                    )
-                ]
-                if len(filtered) != len(content):
-                    clean = dict(msg)
-                    if filtered:
-                        clean["content"] = filtered
-                    elif msg.get("role") == "assistant" and msg.get("tool_calls"):
-                        clean["content"] = None
-                    else:
-                        clean["content"] = "(empty)"
-                    result.append(clean)
-                    continue
-
-            result.append(msg)
-        return result
+    @staticmethod
+    def _sanitize_messages(messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Apply sanitize_message to every message (PromptMessages already are)."""
+        if isinstance(messages, PromptMessages):
+            return messages
+        return [sanitize_message(msg) for msg in messages]
     
     @abstractmethod
     async def chat(
@@ -103,6 +418,27 @@ class LLMProvider(ABC):
             LLMResponse with content and/or tool calls.
         """
         pass
+
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[LLMStreamEvent]:
+        """
+        Stream a chat completion as LLMStreamEvent deltas.
+
+        The last event always carries the full LLMResponse. Providers without
+        native streaming fall back to chat() and yield a single event.
+        """
+        response = await self.chat(
+            messages=messages, tools=tools, model=model,
+            max_tokens=max_tokens, temperature=temperature,
+        )
+        content = response.content if response.finish_reason != "error" else None
+        yield LLMStreamEvent(content=content or "", response=response)
     
     @abstractmethod
     def get_default_model(self) -> str:
@@ -2,35 +2,127 @@
 
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, AsyncIterator
 
 import json_repair
-from openai import AsyncOpenAI
+from openai import AsyncOpenAI, AsyncStream
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
 
-from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+from nanobot.providers.base import (
+    MESSAGE_KEYS,
+    ChatStreamAssembler,
+    LLMProvider,
+    LLMResponse,
+    LLMStreamEvent,
+    ToolCallRequest,
+    parse_usage,
+)
+from nanobot.providers.registry import ProviderSpec, find_by_model
+from nanobot.utils.http import http_clients
 
 
 class CustomProvider(LLMProvider):
+    """
+    Chat completions straight through the OpenAI SDK.
 
-    def __init__(self, api_key: str = "no-key", api_base: str = "http://localhost:8000/v1", default_model: str = "default"):
+    Serves the ``custom`` provider and every registry spec flagged
+    ``openai_compatible``. With a ``spec``, model names lose their LiteLLM
+    routing prefix and get the spec's model overrides and cache_control
+    breakpoints, as LiteLLMProvider would apply them, and the spec's
+    ``drop_params`` are removed from the request. Connections come from the
+    shared ``http_clients`` pool.
+    """
+
+    def __init__(self, api_key: str = "no-key", api_base: str = "http://localhost:8000/v1", default_model: str = "default",
+                 spec: ProviderSpec | None = None, extra_headers: dict[str, str] | None = None):
         super().__init__(api_key, api_base)
         self.default_model = default_model
-        self._client = AsyncOpenAI(api_key=api_key, base_url=api_base)
+        self.spec = spec
+        self.extra_headers = extra_headers
+        self._openai: AsyncOpenAI | None = None
+        self._openai_http = None  # The pooled client _openai was built on
 
-    async def chat(self, messages: list[dict[str, Any]], tools: list[dict[str, Any]] | None = None,
-                   model: str | None = None, max_tokens: int = 4096, temperature: float = 0.7) -> LLMResponse:
+    @property
+    def _client(self) -> AsyncOpenAI:
+        """SDK client on the pooled HTTP client of the running event loop."""
+        http_client = http_clients.get(f"llm:{self.api_base}")
+        if self._openai is None or self._openai_http is not http_client:
+            # Retries are left to RetryingProvider, which classifies errors for every provider
+            self._openai = AsyncOpenAI(
+                api_key=self.api_key or "no-key", base_url=self.api_base, http_client=http_client,
+                default_headers=self.extra_headers or None, max_retries=0,
+            )
+            self._openai_http = http_client
+        return self._openai
+
+    def _build_kwargs(self, messages: list[dict[str, Any]], tools: list[dict[str, Any]] | None,
+                      model: str | None, max_tokens: int, temperature: float) -> dict[str, Any]:
+        model = model or self.default_model
+        messages = self._sanitize_messages(messages)
+        spec = self.spec
+        if spec:
+            model = spec.direct_model(model)
+            if drop := MESSAGE_KEYS.intersection(spec.drop_params):
+                messages = [
+                    {k: v for k, v in m.items() if k not in drop} if not drop.isdisjoint(m) else m
+                    for m in messages
+                ]
+            if spec.supports_prompt_caching:
+                messages, tools = self._apply_cache_control(messages, tools, spec.cache_breakpoint_limit)
         kwargs: dict[str, Any] = {
-            "model": model or self.default_model,
-            "messages": self._sanitize_empty_content(messages),
+            "model": model,
+            "messages": messages,
             "max_tokens": max(1, max_tokens),
             "temperature": temperature,
         }
+        # Model-specific overrides (e.g. kimi-k2.5 temperature), also behind gateways
+        if spec and (overrides := (find_by_model(model) or spec).model_overrides_for(model)):
+            kwargs.update(overrides)
         if tools:
             kwargs.update(tools=tools, tool_choice="auto")
+        return kwargs
+
+    async def chat(self, messages: list[dict[str, Any]], tools: list[dict[str, Any]] | None = None,
+                   model: str | None = None, max_tokens: int = 4096, temperature: float = 0.7) -> LLMResponse:
+        kwargs = self._build_kwargs(messages, tools, model, max_tokens, temperature)
+        try:
+            return self._parse(await self._create(kwargs))
+        except Exception as e:
+            return LLMResponse(content=f"Error: {e}", finish_reason="error", error=e)
+
+    async def chat_stream(self, messages: list[dict[str, Any]], tools: list[dict[str, Any]] | None = None,
+                          model: str | None = None, max_tokens: int = 4096,
+                          temperature: float = 0.7) -> AsyncIterator[LLMStreamEvent]:
+        kwargs = self._build_kwargs(messages, tools, model, max_tokens, temperature)
+        assembler = ChatStreamAssembler()
         try:
-            return self._parse(await self._client.chat.completions.create(**kwargs))
+            stream = await self._create({**kwargs, "stream": True, "stream_options": {"include_usage": True}})
+            async for chunk in stream:
+                for event in assembler.feed(chunk):
+                    yield event
+            for event in assembler.flush():
+                yield event
         except Exception as e:
-            return LLMResponse(content=f"Error: {e}", finish_reason="error")
+            yield LLMStreamEvent(response=LLMResponse(content=f"Error: {e}", finish_reason="error", error=e))
+            return
+        yield LLMStreamEvent(response=assembler.result())
+
+    async def _create(self, body: dict[str, Any]) -> Any:
+        """
+        POST /chat/completions with an already JSON-ready body.
+
+        chat.completions.create() walks every message against the SDK's
+        TypedDicts before sending, which costs more than the request itself
+        for long histories; the body here is plain JSON already.
+        """
+        if self.spec and self.spec.drop_params:
+            body = {k: v for k, v in body.items() if k not in self.spec.drop_params}
+        if body.get("stream"):
+            return await self._client.post(
+                "/chat/completions", body=body, cast_to=ChatCompletion,
+                stream=True, stream_cls=AsyncStream[ChatCompletionChunk],
+            )
+        return await self._client.post("/chat/completions", body=body, cast_to=ChatCompletion)
 
     def _parse(self, response: Any) -> LLMResponse:
         choice = response.choices[0]
@@ -43,7 +135,7 @@ class CustomProvider(LLMProvider):
         u = response.usage
         return LLMResponse(
             content=msg.content, tool_calls=tool_calls, finish_reason=choice.finish_reason or "stop",
-            usage={"prompt_tokens": u.prompt_tokens, "completion_tokens": u.completion_tokens, "total_tokens": u.total_tokens} if u else {},
+            usage=parse_usage(u) if u else {},
             reasoning_content=getattr(msg, "reasoning_content", None) or None,
         )
 
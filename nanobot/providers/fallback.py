@@ -0,0 +1,136 @@
+"""Ordered fallback across (provider, model) tiers on error or deadline."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, AsyncIterator
+
+from loguru import logger
+
+from nanobot.providers.base import LLMProvider, LLMResponse, LLMStreamEvent
+
+
+class Tier:
+    """One (provider, model) entry of a fallback chain and how often it served."""
+
+    def __init__(self, provider: LLMProvider, model: str, label: str | None = None):
+        self.provider = provider
+        self.model = model
+        self.label = label or model
+        self.served = 0
+        self.failures = 0
+        self.timeouts = 0
+
+    def info(self) -> dict[str, int]:
+        return {"served": self.served, "failures": self.failures, "timeouts": self.timeouts}
+
+
+class FallbackProvider(LLMProvider):
+    """
+    Tries each tier in order until one answers.
+
+    A tier is skipped when it returns an error response or, with
+    ``deadline_s``, when it has not answered (for streams: produced its first
+    event) within that many seconds. The first tier runs the model the
+    caller asked for; later tiers run their own, and each tier's provider
+    applies its registry prefixes and overrides for it. Streams only fall
+    back before any output has been yielded; a stream that ends without any
+    event counts as a failure.
+    """
+
+    def __init__(self, tiers: list[Tier], deadline_s: float = 0.0):
+        super().__init__(tiers[0].provider.api_key, tiers[0].provider.api_base)
+        self.tiers = tiers
+        self.deadline_s = deadline_s
+
+    def _model(self, index: int, model: str | None) -> str:
+        return (model or self.tiers[0].model) if index == 0 else self.tiers[index].model
+
+    def _timeout_response(self, tier: Tier) -> LLMResponse:
+        tier.timeouts += 1
+        error = TimeoutError(f"{tier.label} did not answer within {self.deadline_s:g}s")
+        return LLMResponse(content=f"Error calling LLM: {error}", finish_reason="error", error=error)
+
+    def _failed(self, index: int, response: LLMResponse) -> None:
+        tier = self.tiers[index]
+        tier.failures += 1
+        if index + 1 < len(self.tiers):
+            logger.warning(
+                "LLM tier {} failed ({}), falling back to {}",
+                tier.label, response.error or response.content, self.tiers[index + 1].label,
+            )
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        response = None
+        for i, tier in enumerate(self.tiers):
+            call = tier.provider.chat(
+                messages=messages, tools=tools, model=self._model(i, model),
+                max_tokens=max_tokens, temperature=temperature,
+            )
+            try:
+                response = await (asyncio.wait_for(call, self.deadline_s) if self.deadline_s else call)
+            except asyncio.TimeoutError:
+                response = self._timeout_response(tier)
+            if response.finish_reason != "error":
+                tier.served += 1
+                return response
+            self._failed(i, response)
+        return response
+
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[LLMStreamEvent]:
+        response = None
+        for i, tier in enumerate(self.tiers):
+            stream = tier.provider.chat_stream(
+                messages=messages, tools=tools, model=self._model(i, model),
+                max_tokens=max_tokens, temperature=temperature,
+            )
+            try:
+                first = await (
+                    asyncio.wait_for(anext(stream, None), self.deadline_s) if self.deadline_s
+                    else anext(stream, None)
+                )
+            except asyncio.TimeoutError:
+                await stream.aclose()
+                response = self._timeout_response(tier)
+                self._failed(i, response)
+                continue
+            if first is None:
+                error = RuntimeError(f"{tier.label} returned an empty stream")
+                response = LLMResponse(content=f"Error calling LLM: {error}", finish_reason="error", error=error)
+            else:
+                response = first.response
+            if response is not None and response.finish_reason == "error":
+                await stream.aclose()
+                self._failed(i, response)
+                continue
+            yield first
+            async for event in stream:
+                response = event.response or response
+                yield event
+            if response is None or response.finish_reason == "error":
+                tier.failures += 1
+            else:
+                tier.served += 1
+            return
+        if response is not None:
+            yield LLMStreamEvent(response=response)
+
+    def info(self) -> dict[str, dict[str, int]]:
+        return {tier.label: tier.info() for tier in self.tiers}
+
+    def get_default_model(self) -> str:
+        return self.tiers[0].model
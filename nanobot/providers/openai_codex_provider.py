@@ -5,16 +5,19 @@ from __future__ import annotations
 import asyncio
 import hashlib
 import json
+from collections import OrderedDict
 from typing import Any, AsyncGenerator
 
 import httpx
 from loguru import logger
 
 from oauth_cli_kit import get_token as get_codex_token
-from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+from nanobot.providers.base import LLMProvider, LLMResponse, LLMStreamEvent, ToolCallRequest
+from nanobot.utils.http import http_clients
 
 DEFAULT_CODEX_URL = "https://chatgpt.com/backend-api/codex/responses"
 DEFAULT_ORIGINATOR = "nanobot"
+_CACHE_KEYS_MAX = 1024  # Remembered prompt_cache_keys (one per session)
 
 
 class OpenAICodexProvider(LLMProvider):
@@ -23,15 +26,42 @@ class OpenAICodexProvider(LLMProvider):
     def __init__(self, default_model: str = "openai-codex/gpt-5.1-codex"):
         super().__init__(api_key=None, api_base=None)
         self.default_model = default_model
-
-    async def chat(
+        # session -> (instructions, tools, prompt_cache_key)
+        self._cache_keys: OrderedDict[str, tuple[str, Any, str]] = OrderedDict()
+
+    def _prompt_cache_key(self, messages: list[dict[str, Any]], instructions: str, tools: Any) -> str:
+        """
+        Cache routing key from the stable prefix: instructions, tools and session.
+
+        The history is left out, so every request of a session (and every
+        iteration of its tool loop) reuses one key and the server can keep
+        routing it to the cached prefix. Keys are hashed once per session and
+        recomputed only when the instructions or tools change.
+        """
+        session = getattr(messages, "session_key", None) or ""
+        cached = self._cache_keys.get(session)
+        if cached is not None and (cached[1] is tools or cached[1] == tools) and cached[0] == instructions:
+            self._cache_keys.move_to_end(session)
+            return cached[2]
+        h = hashlib.sha256()
+        h.update(session.encode("utf-8"))
+        h.update(b"\0")
+        h.update(instructions.encode("utf-8"))
+        h.update(b"\0")
+        h.update(json.dumps(tools or [], ensure_ascii=True, sort_keys=True).encode("utf-8"))
+        key = h.hexdigest()
+        self._cache_keys[session] = (instructions, tools, key)
+        if len(self._cache_keys) > _CACHE_KEYS_MAX:
+            self._cache_keys.popitem(last=False)
+        return key
+
+    async def _prepare_request(
         self,
         messages: list[dict[str, Any]],
-        tools: list[dict[str, Any]] | None = None,
-        model: str | None = None,
-        max_tokens: int = 4096,
-        temperature: float = 0.7,
-    ) -> LLMResponse:
+        tools: list[dict[str, Any]] | None,
+        model: str | None,
+    ) -> tuple[dict[str, str], dict[str, Any]]:
+        """Build headers and Responses API body shared by chat() and chat_stream()."""
         model = model or self.default_model
         system_prompt, input_items = _convert_messages(messages)
 
@@ -46,14 +76,24 @@ class OpenAICodexProvider(LLMProvider):
             "input": input_items,
             "text": {"verbosity": "medium"},
             "include": ["reasoning.encrypted_content"],
-            "prompt_cache_key": _prompt_cache_key(messages),
+            "prompt_cache_key": self._prompt_cache_key(messages, system_prompt, tools),
             "tool_choice": "auto",
             "parallel_tool_calls": True,
         }
 
         if tools:
             body["tools"] = _convert_tools(tools)
+        return headers, body
 
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        headers, body = await self._prepare_request(messages, tools, model)
         url = DEFAULT_CODEX_URL
 
         try:
@@ -73,8 +113,39 @@ class OpenAICodexProvider(LLMProvider):
             return LLMResponse(
                 content=f"Error calling Codex: {str(e)}",
                 finish_reason="error",
+                error=e,
             )
 
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncGenerator[LLMStreamEvent, None]:
+        headers, body = await self._prepare_request(messages, tools, model)
+        url = DEFAULT_CODEX_URL
+        started = False
+
+        try:
+            try:
+                async for event in _stream_codex(url, headers, body, verify=True):
+                    started = True
+                    yield event
+            except Exception as e:
+                if started or "CERTIFICATE_VERIFY_FAILED" not in str(e):
+                    raise
+                logger.warning("SSL certificate verification failed for Codex API; retrying with verify=False")
+                async for event in _stream_codex(url, headers, body, verify=False):
+                    yield event
+        except Exception as e:
+            yield LLMStreamEvent(response=LLMResponse(
+                content=f"Error calling Codex: {str(e)}",
+                finish_reason="error",
+                error=e,
+            ))
+
     def get_default_model(self) -> str:
         return self.default_model
 
@@ -103,12 +174,38 @@ async def _request_codex(
     body: dict[str, Any],
     verify: bool,
 ) -> tuple[str, list[ToolCallRequest], str]:
-    async with httpx.AsyncClient(timeout=60.0, verify=verify) as client:
-        async with client.stream("POST", url, headers=headers, json=body) as response:
-            if response.status_code != 200:
-                text = await response.aread()
-                raise RuntimeError(_friendly_error(response.status_code, text.decode("utf-8", "ignore")))
-            return await _consume_sse(response)
+    client = _codex_client(verify)
+    async with client.stream("POST", url, headers=headers, json=body) as response:
+        if response.status_code != 200:
+            text = await response.aread()
+            raise httpx.HTTPStatusError(
+                _friendly_error(response.status_code, text.decode("utf-8", "ignore")),
+                request=response.request, response=response,
+            )
+        return await _consume_sse(response)
+
+
+async def _stream_codex(
+    url: str,
+    headers: dict[str, str],
+    body: dict[str, Any],
+    verify: bool,
+) -> AsyncGenerator[LLMStreamEvent, None]:
+    client = _codex_client(verify)
+    async with client.stream("POST", url, headers=headers, json=body) as response:
+        if response.status_code != 200:
+            text = await response.aread()
+            raise httpx.HTTPStatusError(
+                _friendly_error(response.status_code, text.decode("utf-8", "ignore")),
+                request=response.request, response=response,
+            )
+        async for event in _stream_sse(response):
+            yield event
+
+
+def _codex_client(verify: bool) -> httpx.AsyncClient:
+    """Pooled client for the Codex API (a separate pool when TLS verification is off)."""
+    return http_clients.get("codex" if verify else "codex-noverify", timeout=60.0, verify=verify)
 
 
 def _convert_tools(tools: list[dict[str, Any]]) -> list[dict[str, Any]]:
@@ -217,11 +314,6 @@ def _split_tool_call_id(tool_call_id: Any) -> tuple[str, str | None]:
     return "call_0", None
 
 
-def _prompt_cache_key(messages: list[dict[str, Any]]) -> str:
-    raw = json.dumps(messages, ensure_ascii=True, sort_keys=True)
-    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
-
-
 async def _iter_sse(response: httpx.Response) -> AsyncGenerator[dict[str, Any], None]:
     buffer: list[str] = []
     async for line in response.aiter_lines():
@@ -243,6 +335,15 @@ async def _iter_sse(response: httpx.Response) -> AsyncGenerator[dict[str, Any],
 
 
 async def _consume_sse(response: httpx.Response) -> tuple[str, list[ToolCallRequest], str]:
+    final = LLMResponse(content="")
+    async for event in _stream_sse(response):
+        if event.response:
+            final = event.response
+    return final.content or "", final.tool_calls, final.finish_reason
+
+
+async def _stream_sse(response: httpx.Response) -> AsyncGenerator[LLMStreamEvent, None]:
+    """Translate Responses API SSE events into stream events; the last one carries the response."""
     content = ""
     tool_calls: list[ToolCallRequest] = []
     tool_call_buffers: dict[str, dict[str, Any]] = {}
@@ -262,7 +363,10 @@ async def _consume_sse(response: httpx.Response) -> tuple[str, list[ToolCallRequ
                     "arguments": item.get("arguments") or "",
                 }
         elif event_type == "response.output_text.delta":
-            content += event.get("delta") or ""
+            delta = event.get("delta") or ""
+            content += delta
+            if delta:
+                yield LLMStreamEvent(content=delta)
         elif event_type == "response.function_call_arguments.delta":
             call_id = event.get("call_id")
             if call_id and call_id in tool_call_buffers:
@@ -283,20 +387,22 @@ async def _consume_sse(response: httpx.Response) -> tuple[str, list[ToolCallRequ
                     args = json.loads(args_raw)
                 except Exception:
                     args = {"raw": args_raw}
-                tool_calls.append(
-                    ToolCallRequest(
-                        id=f"{call_id}|{buf.get('id') or item.get('id') or 'fc_0'}",
-                        name=buf.get("name") or item.get("name"),
-                        arguments=args,
-                    )
+                tool_call = ToolCallRequest(
+                    id=f"{call_id}|{buf.get('id') or item.get('id') or 'fc_0'}",
+                    name=buf.get("name") or item.get("name"),
+                    arguments=args,
                 )
+                tool_calls.append(tool_call)
+                yield LLMStreamEvent(tool_call=tool_call)
         elif event_type == "response.completed":
             status = (event.get("response") or {}).get("status")
             finish_reason = _map_finish_reason(status)
         elif event_type in {"error", "response.failed"}:
             raise RuntimeError("Codex response failed")
 
-    return content, tool_calls, finish_reason
+    yield LLMStreamEvent(response=LLMResponse(
+        content=content, tool_calls=tool_calls, finish_reason=finish_reason,
+    ))
 
 
 _FINISH_REASON_MAP = {"completed": "stop", "incomplete": "length", "failed": "error", "cancelled": "error"}
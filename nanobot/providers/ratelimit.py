@@ -0,0 +1,203 @@
+"""Client-side rate limits and a concurrency cap per provider or model."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator
+
+from loguru import logger
+
+from nanobot.providers.base import LLMProvider, LLMResponse, LLMStreamEvent
+from nanobot.providers.retry import error_status, retry_after
+from nanobot.utils.tokens import estimate_prompt_tokens, estimate_tokens
+
+# Pause after a 429 that carries no Retry-After
+_DEFAULT_THROTTLE_S = 1.0
+
+
+class RateLimiter:
+    """
+    Token buckets for requests and tokens per minute, plus a cap on in-flight requests.
+
+    Callers queue in arrival order: the head of the queue waits until both
+    buckets can cover it, so a large request is not starved by small ones.
+    Token costs are estimated up front and reconciled with the usage the
+    provider reports. A 0 limit disables that check.
+    """
+
+    def __init__(self, rpm: int = 0, tpm: int = 0, max_in_flight: int = 0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_in_flight = max_in_flight
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._queue = asyncio.Lock()
+        self._in_flight = asyncio.Semaphore(max_in_flight) if max_in_flight > 0 else None
+        self.waits = 0
+        self.total_wait_s = 0.0
+        self.max_wait_s = 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def _delay(self, tokens: int, now: float) -> float:
+        delay = self._blocked_until - now
+        if self.rpm and self._requests < 1:
+            delay = max(delay, (1 - self._requests) * 60 / self.rpm)
+        if self.tpm:
+            # A request larger than the whole bucket only waits for a full one
+            need = min(tokens, self.tpm)
+            if self._tokens < need:
+                delay = max(delay, (need - self._tokens) * 60 / self.tpm)
+        return delay
+
+    async def acquire(self, tokens: int) -> float:
+        """Wait for a slot and debit one request and ``tokens``; returns the seconds spent queued."""
+        start = time.monotonic()
+        if self._in_flight:
+            await self._in_flight.acquire()
+        try:
+            async with self._queue:
+                self._refill(time.monotonic())
+                while (delay := self._delay(tokens, time.monotonic())) > 0:
+                    await asyncio.sleep(delay)
+                    self._refill(time.monotonic())
+                if self.rpm:
+                    self._requests -= 1
+                if self.tpm:
+                    self._tokens -= tokens
+        except BaseException:
+            if self._in_flight:
+                self._in_flight.release()
+            raise
+        waited = time.monotonic() - start
+        if waited > 0.001:
+            self.waits += 1
+            self.total_wait_s += waited
+            self.max_wait_s = max(self.max_wait_s, waited)
+        return waited
+
+    def release(self, estimated: int, actual: int | None = None) -> None:
+        """Free the in-flight slot and correct the token bucket by what the request really used."""
+        if self._in_flight:
+            self._in_flight.release()
+        if self.tpm and actual is not None:
+            self._tokens = min(self.tpm, self._tokens + estimated - actual)
+
+    def throttle(self, seconds: float) -> None:
+        """Hold every caller back for ``seconds`` (after the server answered 429)."""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def info(self) -> dict[str, float]:
+        return {"waits": self.waits, "total_wait_s": self.total_wait_s, "max_wait_s": self.max_wait_s}
+
+
+_limiters: dict[str, RateLimiter] = {}
+
+
+def shared_limiter(key: str, rpm: int = 0, tpm: int = 0, max_in_flight: int = 0) -> RateLimiter:
+    """The process-wide limiter for ``key``, so every provider instance using it shares one budget."""
+    limiter = _limiters.get(key)
+    if limiter is None or (limiter.rpm, limiter.tpm, limiter.max_in_flight) != (rpm, tpm, max_in_flight):
+        limiter = _limiters[key] = RateLimiter(rpm, tpm, max_in_flight)
+    return limiter
+
+
+class RateLimitedProvider(LLMProvider):
+    """
+    Wraps a provider so each call first takes a slot from a RateLimiter.
+
+    ``limiters`` are keyed by model name or provider name; a call uses the
+    entry for its model, else the one for ``provider_name``, else none.
+    Time spent queued is added to LLMResponse.queue_wait_s, apart from
+    model latency.
+    """
+
+    def __init__(self, provider: LLMProvider, limiters: dict[str, RateLimiter], provider_name: str | None = None):
+        super().__init__(provider.api_key, provider.api_base)
+        self.provider = provider
+        self.limiters = limiters
+        self.provider_name = provider_name
+        self._tools_tokens: tuple[list[dict[str, Any]] | None, int] = (None, 0)
+
+    def limiter_for(self, model: str | None) -> RateLimiter | None:
+        model = model or self.provider.get_default_model()
+        return self.limiters.get(model) or self.limiters.get(self.provider_name or "")
+
+    def _estimate(self, messages: list[dict[str, Any]], tools: list[dict[str, Any]] | None, max_tokens: int) -> int:
+        """Prompt tokens plus the completion allowance, as providers count them against TPM."""
+        if tools is not self._tools_tokens[0]:
+            # The tool registry hands out the same list until tools change
+            self._tools_tokens = (tools, estimate_tokens(json.dumps(tools)) if tools else 0)
+        return estimate_prompt_tokens(messages) + self._tools_tokens[1] + max(1, max_tokens)
+
+    def _settle(self, limiter: RateLimiter, estimated: int, response: LLMResponse | None, waited: float) -> None:
+        limiter.release(estimated, response.usage.get("total_tokens") if response else None)
+        if response is None:
+            return
+        response.queue_wait_s += waited
+        if response.error is not None and error_status(response.error) == 429:
+            pause = retry_after(response.error) or _DEFAULT_THROTTLE_S
+            logger.debug("Provider rate limit hit, pausing requests for {:.1f}s", pause)
+            limiter.throttle(pause)
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        kwargs = dict(messages=messages, tools=tools, model=model, max_tokens=max_tokens, temperature=temperature)
+        limiter = self.limiter_for(model)
+        if limiter is None:
+            return await self.provider.chat(**kwargs)
+        estimated = self._estimate(messages, tools, max_tokens)
+        waited = await limiter.acquire(estimated)
+        response = None
+        try:
+            response = await self.provider.chat(**kwargs)
+            return response
+        finally:
+            self._settle(limiter, estimated, response, waited)
+
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[LLMStreamEvent]:
+        kwargs = dict(messages=messages, tools=tools, model=model, max_tokens=max_tokens, temperature=temperature)
+        limiter = self.limiter_for(model)
+        if limiter is None:
+            async for event in self.provider.chat_stream(**kwargs):
+                yield event
+            return
+        estimated = self._estimate(messages, tools, max_tokens)
+        waited = await limiter.acquire(estimated)
+        response = None
+        try:
+            async for event in self.provider.chat_stream(**kwargs):
+                if event.response is not None:
+                    response = event.response
+                    self._settle(limiter, estimated, response, waited)
+                    limiter = None
+                yield event
+        finally:
+            if limiter is not None:
+                self._settle(limiter, estimated, None, waited)
+
+    def get_default_model(self) -> str:
+        return self.provider.get_default_model()
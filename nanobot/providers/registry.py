@@ -56,14 +56,39 @@ class ProviderSpec:
 
     # Direct providers bypass LiteLLM entirely (e.g., CustomProvider)
     is_direct: bool = False
+    # Speaks the OpenAI chat-completions API at api_base / default_api_base,
+    # so requests can skip LiteLLM and go through CustomProvider
+    openai_compatible: bool = False
+    # Request params and message keys the endpoint rejects; CustomProvider drops
+    # them, as LiteLLM's drop_params does, e.g. ("reasoning_content",)
+    drop_params: tuple[str, ...] = ()
 
     # Provider supports cache_control on content blocks (e.g. Anthropic prompt caching)
     supports_prompt_caching: bool = False
+    cache_breakpoint_limit: int = 4          # max cache_control blocks per request (Anthropic: 4)
 
     @property
     def label(self) -> str:
         return self.display_name or self.name.title()
 
+    def direct_model(self, model: str) -> str:
+        """Model name as this provider's own endpoint expects it (no LiteLLM routing prefix)."""
+        if self.strip_model_prefix:
+            return model.split("/")[-1]
+        if "/" in model:
+            prefix, remainder = model.split("/", 1)
+            if prefix.lower().replace("-", "_") in (self.name, self.litellm_prefix):
+                return remainder
+        return model
+
+    def model_overrides_for(self, model: str) -> dict[str, Any]:
+        """Parameter overrides for ``model`` from model_overrides, if any."""
+        model_lower = model.lower()
+        for pattern, overrides in self.model_overrides:
+            if pattern in model_lower:
+                return overrides
+        return {}
+
 
 # ---------------------------------------------------------------------------
 # PROVIDERS — the registry. Order = priority. Copy any entry as template.
@@ -101,6 +126,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         strip_model_prefix=False,
         model_overrides=(),
         supports_prompt_caching=True,
+        openai_compatible=True,
     ),
 
     # AiHubMix: global gateway, OpenAI-compatible interface.
@@ -121,6 +147,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         default_api_base="https://aihubmix.com/v1",
         strip_model_prefix=True,            # anthropic/claude-3 → claude-3 → openai/claude-3
         model_overrides=(),
+        openai_compatible=True,
     ),
 
     # SiliconFlow (硅基流动): OpenAI-compatible gateway, model names keep org prefix
@@ -139,6 +166,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         default_api_base="https://api.siliconflow.cn/v1",
         strip_model_prefix=False,
         model_overrides=(),
+        openai_compatible=True,
     ),
 
     # VolcEngine (火山引擎): OpenAI-compatible gateway
@@ -157,6 +185,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         default_api_base="https://ark.cn-beijing.volces.com/api/v3",
         strip_model_prefix=False,
         model_overrides=(),
+        openai_compatible=True,
     ),
 
     # === Standard providers (matched by model-name keywords) ===============
@@ -249,9 +278,10 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         is_local=False,
         detect_by_key_prefix="",
         detect_by_base_keyword="",
-        default_api_base="",
+        default_api_base="https://api.deepseek.com/v1",
         strip_model_prefix=False,
         model_overrides=(),
+        openai_compatible=True,
     ),
 
     # Gemini: needs "gemini/" prefix for LiteLLM.
@@ -307,9 +337,10 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         is_local=False,
         detect_by_key_prefix="",
         detect_by_base_keyword="",
-        default_api_base="",
+        default_api_base="https://dashscope.aliyuncs.com/compatible-mode/v1",
         strip_model_prefix=False,
         model_overrides=(),
+        openai_compatible=True,
     ),
 
     # Moonshot: Kimi models, needs "moonshot/" prefix.
@@ -334,6 +365,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         model_overrides=(
             ("kimi-k2.5", {"temperature": 1.0}),
         ),
+        openai_compatible=True,
     ),
 
     # MiniMax: needs "minimax/" prefix for LiteLLM routing.
@@ -353,6 +385,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         default_api_base="https://api.minimax.io/v1",
         strip_model_prefix=False,
         model_overrides=(),
+        openai_compatible=True,
     ),
 
     # === Local deployment (matched by config key, NOT by api_base) =========
@@ -374,6 +407,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         default_api_base="",                # user must provide in config
         strip_model_prefix=False,
         model_overrides=(),
+        openai_compatible=True,
     ),
 
     # === Auxiliary (not a primary LLM provider) ============================
@@ -392,9 +426,11 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         is_local=False,
         detect_by_key_prefix="",
         detect_by_base_keyword="",
-        default_api_base="",
+        default_api_base="https://api.groq.com/openai/v1",
         strip_model_prefix=False,
         model_overrides=(),
+        openai_compatible=True,
+        drop_params=("reasoning_content",),  # 400 "property 'reasoning_content' is unsupported"
     ),
 )
 
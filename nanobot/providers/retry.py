@@ -0,0 +1,248 @@
+"""Retries, backoff and hedged requests around any LLM provider."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+import httpx
+import openai
+from loguru import logger
+
+from nanobot.providers.base import LLMProvider, LLMResponse, LLMStreamEvent
+
+# Statuses worth another attempt: timeouts, conflicts, throttling, overload
+RETRYABLE_STATUS = frozenset({408, 409, 425, 429, 500, 502, 503, 504, 529})
+_TRANSIENT_ERRORS = (
+    asyncio.TimeoutError,
+    ConnectionError,
+    httpx.TimeoutException,
+    httpx.NetworkError,
+    httpx.RemoteProtocolError,
+    openai.APIConnectionError,  # includes APITimeoutError and LiteLLM's equivalents
+)
+
+
+def error_status(error: BaseException) -> int | None:
+    """HTTP status behind a provider error (OpenAI/LiteLLM exceptions or httpx), if any."""
+    status = getattr(error, "status_code", None)
+    if not isinstance(status, int):
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def retry_after(error: BaseException) -> float | None:
+    """Seconds the server asked us to wait (Retry-After / retry-after-ms), if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if ms := headers.get("retry-after-ms"):
+            return max(float(ms) / 1000, 0.0)
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: BaseException | None) -> bool:
+    """Whether an error is transient: throttling, overload, timeouts or a dropped connection."""
+    if error is None:
+        return False
+    status = error_status(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return isinstance(error, _TRANSIENT_ERRORS)
+
+
+class LatencyStats:
+    """Per-attempt outcomes and a window of recent successful attempt latencies."""
+
+    def __init__(self, window: int = 200):
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.attempts = 0
+        self.errors = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def record(self, seconds: float, ok: bool) -> None:
+        self.attempts += 1
+        if ok:
+            self.latencies.append(seconds)
+        else:
+            self.errors += 1
+
+    def percentile(self, p: float) -> float | None:
+        """The p-quantile (0..1) of recent successful latencies, or None without samples."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(p * len(ordered)), len(ordered) - 1)]
+
+    def info(self) -> dict[str, float]:
+        return {
+            "attempts": self.attempts,
+            "errors": self.errors,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "p50_s": self.percentile(0.5) or 0.0,
+            "p95_s": self.percentile(0.95) or 0.0,
+        }
+
+
+class RetryingProvider(LLMProvider):
+    """
+    Wraps a provider with classified retries and optional hedging.
+
+    Error responses whose cause is transient (see is_retryable) are retried
+    with full-jitter exponential backoff, or after the server's Retry-After
+    when it sends one. Other errors are returned at once.
+
+    With ``hedge``, a chat() call that outlasts the ``hedge_percentile`` of
+    recent latencies starts a second, identical request and returns whichever
+    succeeds first. Streams are never hedged, and only retried while nothing
+    has been yielded yet.
+    """
+
+    def __init__(
+        self,
+        provider: LLMProvider,
+        max_attempts: int = 3,
+        base_delay_s: float = 0.5,
+        max_delay_s: float = 30.0,
+        hedge: bool = False,
+        hedge_percentile: float = 0.95,
+        hedge_min_delay_s: float = 1.0,
+        hedge_min_samples: int = 20,
+    ):
+        super().__init__(provider.api_key, provider.api_base)
+        self.provider = provider
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay_s = base_delay_s
+        self.max_delay_s = max_delay_s
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay_s = hedge_min_delay_s
+        self.hedge_min_samples = hedge_min_samples
+        self.stats = LatencyStats()
+
+    def _retry_delay(self, attempt: int, error: BaseException | None) -> float | None:
+        """Delay before the next attempt, or None when the error should not be retried."""
+        if attempt >= self.max_attempts or not is_retryable(error):
+            return None
+        if (wait := retry_after(error)) is not None:
+            # Waiting longer than the backoff cap would stall the turn; give up instead
+            return wait if wait <= self.max_delay_s else None
+        return random.uniform(0, min(self.max_delay_s, self.base_delay_s * 2 ** (attempt - 1)))
+
+    def _hedge_delay(self) -> float | None:
+        if not self.hedge or len(self.stats.latencies) < self.hedge_min_samples:
+            return None
+        return max(self.hedge_min_delay_s, self.stats.percentile(self.hedge_percentile) or 0.0)
+
+    async def _timed(self, call: Callable[[], Awaitable[LLMResponse]]) -> LLMResponse:
+        start = time.perf_counter()
+        response = await call()
+        # Time queued behind a rate limiter is not model latency
+        latency = time.perf_counter() - start - response.queue_wait_s
+        self.stats.record(latency, response.finish_reason != "error")
+        return response
+
+    async def _hedged(self, call: Callable[[], Awaitable[LLMResponse]]) -> LLMResponse:
+        delay = self._hedge_delay()
+        if delay is None:
+            return await self._timed(call)
+        primary = asyncio.ensure_future(self._timed(call))
+        pending: set[asyncio.Future[LLMResponse]] = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+            self.stats.hedges += 1
+            logger.debug("LLM call exceeded {:.2f}s, sending a hedged request", delay)
+            pending.add(asyncio.ensure_future(self._timed(call)))
+            response = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    response = task.result()
+                    if response.finish_reason != "error":
+                        self.stats.hedge_wins += task is not primary
+                        return response
+            return response
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        async def call() -> LLMResponse:
+            return await self.provider.chat(
+                messages=messages, tools=tools, model=model,
+                max_tokens=max_tokens, temperature=temperature,
+            )
+
+        attempt = 1
+        while True:
+            response = await self._hedged(call)
+            if response.finish_reason != "error":
+                return response
+            delay = self._retry_delay(attempt, response.error)
+            if delay is None:
+                return response
+            self.stats.retries += 1
+            logger.warning("LLM call failed ({}), retry {} in {:.1f}s", response.error, attempt, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[LLMStreamEvent]:
+        attempt = 1
+        while True:
+            start = time.perf_counter()
+            started = False
+            async for event in self.provider.chat_stream(
+                messages=messages, tools=tools, model=model,
+                max_tokens=max_tokens, temperature=temperature,
+            ):
+                if (response := event.response) is not None:
+                    ok = response.finish_reason != "error"
+                    self.stats.record(time.perf_counter() - start - response.queue_wait_s, ok)
+                    if not ok and not started:
+                        delay = self._retry_delay(attempt, response.error)
+                        if delay is not None:
+                            break
+                started = started or bool(event.content or event.reasoning_content or event.tool_call)
+                yield event
+            else:
+                return
+            self.stats.retries += 1
+            logger.warning("LLM stream failed ({}), retry {} in {:.1f}s", response.error, attempt, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def get_default_model(self) -> str:
+        return self.provider.get_default_model()
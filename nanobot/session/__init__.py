@@ -1,5 +1,7 @@
 """Session management module."""
 
 from nanobot.session.manager import SessionManager, Session
+from nanobot.session.store import JsonlSessionStore, SessionStore
+from nanobot.session.sqlite_store import SqliteSessionStore
 
-__all__ = ["SessionManager", "Session"]
+__all__ = ["SessionManager", "Session", "SessionStore", "JsonlSessionStore", "SqliteSessionStore"]
@@ -1,15 +1,280 @@
 """Session management for conversation history."""
 
 import json
-import shutil
+import sys
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterator, Mapping, MutableSequence, Sequence
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Any
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any
 
-from loguru import logger
+from nanobot.utils.helpers import ensure_dir
+from nanobot.utils.tokens import estimate_message_tokens
 
-from nanobot.utils.helpers import ensure_dir, safe_filename
+if TYPE_CHECKING:
+    from nanobot.session.persister import SessionPersister
+    from nanobot.session.store import SessionStore
+
+
+_MISSING: Any = object()
+_EPOCH = datetime(1970, 1, 1)
+_US = timedelta(microseconds=1)
+
+
+class MessageRecord(Mapping):
+    """
+    Compact, read-only stored message.
+
+    Common keys live in slots (role and name interned, naive ISO timestamps
+    kept as integer microseconds); anything else goes in a small ``extra``
+    dict. It reads like the original dict (``m["role"]``, ``m.get(...)``,
+    ``"tool_calls" in m``) and compares equal to it.
+    """
+
+    __slots__ = ("role", "content", "_ts", "tool_calls", "tool_call_id", "name", "extra", "_tokens")
+    _SLOT_KEYS = ("role", "content", "timestamp", "tool_calls", "tool_call_id", "name")
+
+    def __init__(self, data: Mapping[str, Any]):
+        role = data.get("role", _MISSING)
+        self.role = sys.intern(role) if isinstance(role, str) else role
+        self.content = data.get("content", _MISSING)
+        self._ts = self._pack_ts(data.get("timestamp", _MISSING))
+        self.tool_calls = data.get("tool_calls", _MISSING)
+        self.tool_call_id = data.get("tool_call_id", _MISSING)
+        name = data.get("name", _MISSING)
+        self.name = sys.intern(name) if isinstance(name, str) else name
+        extra = {k: v for k, v in data.items() if k not in self._SLOT_KEYS}
+        self.extra = extra or None
+        self._tokens = -1
+
+    @property
+    def tokens(self) -> int:
+        """Estimated prompt tokens, computed once per record."""
+        if self._tokens < 0:
+            self._tokens = estimate_message_tokens(self)
+        return self._tokens
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "MessageRecord":
+        return data if isinstance(data, MessageRecord) else cls(data)
+
+    @staticmethod
+    def _pack_ts(value: Any) -> Any:
+        if isinstance(value, str) and len(value) in (19, 26):  # datetime.isoformat() without tz
+            try:
+                dt = datetime.fromisoformat(value)
+            except ValueError:
+                return value
+            if dt.isoformat() == value:
+                return (dt - _EPOCH) // _US
+        return value
+
+    def _slot(self, key: str) -> Any:
+        if key == "timestamp":
+            ts = self._ts
+            return (_EPOCH + ts * _US).isoformat() if isinstance(ts, int) else ts
+        return getattr(self, key)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._SLOT_KEYS:
+            value = self._slot(key)
+            if value is not _MISSING:
+                return value
+        elif self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self._SLOT_KEYS:
+            if self._slot(key) is not _MISSING:
+                yield key
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def to_dict(self) -> dict[str, Any]:
+        return dict(self.items())
+
+    copy = to_dict  # Like dict.copy(), but the copy is a mutable dict
+
+    def __repr__(self) -> str:
+        return f"MessageRecord({self.to_dict()!r})"
+
+
+def dump_message(msg: Mapping[str, Any]) -> str:
+    """Serialize a stored message (dict or MessageRecord) as one JSON line."""
+    return json.dumps(msg.to_dict() if isinstance(msg, MessageRecord) else msg, ensure_ascii=False)
+
+
+def load_message(line: str | bytes) -> MessageRecord:
+    return MessageRecord(json.loads(line))
+
+
+def _history_entry(m: Mapping[str, Any]) -> dict[str, Any]:
+    entry: dict[str, Any] = {"role": m["role"], "content": m.get("content", "")}
+    for k in ("tool_calls", "tool_call_id", "name"):
+        if k in m:
+            entry[k] = m[k]
+    return entry
+
+
+def message_tokens(message: Mapping[str, Any]) -> int:
+    """Estimated prompt tokens of a stored message (cached on records)."""
+    if isinstance(message, MessageRecord):
+        return message.tokens
+    return estimate_message_tokens(message)
+
+
+class LazyMessages(MutableSequence):
+    """
+    Message list whose first ``offset`` entries are still on disk.
+
+    Indexing and slicing keep absolute positions, so code written against a
+    plain list (``messages[last_consolidated:]``, ``len(messages)``) works
+    unchanged. Iteration streams the on-disk prefix without keeping it; any
+    other access to the prefix pages it in once.
+    """
+
+    def __init__(self, tail: list[dict[str, Any]], offset: int, loader: Callable[[], Iterator[dict[str, Any]]]):
+        self._items = tail
+        self._offset = offset
+        self._loader = loader
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the whole history is in memory."""
+        return self._offset == 0
+
+    @property
+    def resident(self) -> int:
+        """Number of messages held in memory."""
+        return len(self._items)
+
+    def _page_in(self) -> None:
+        if self._offset:
+            prefix = list(islice(self._loader(), self._offset))
+            if len(prefix) != self._offset:
+                raise RuntimeError(f"session file has {len(prefix)} messages, expected {self._offset}")
+            self._items = prefix + self._items
+            self._offset = 0
+
+    def _local(self, index: int) -> int:
+        """Map an absolute index to an index into the in-memory tail."""
+        if index < 0:
+            index += len(self)
+        if index < self._offset:
+            self._page_in()
+        return index - self._offset
+
+    def __len__(self) -> int:
+        return self._offset + len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1 and (start >= self._offset or stop <= start):
+                return self._items[max(start - self._offset, 0):max(stop - self._offset, 0)]
+            self._page_in()
+            return self._items[index]
+        if not -len(self) <= index < len(self):
+            raise IndexError("message index out of range")
+        local = self._local(index)  # May page in and replace self._items
+        return self._items[local]
+
+    def __setitem__(self, index, value) -> None:
+        if isinstance(index, slice):
+            self._page_in()
+            self._items[index] = value
+        else:
+            local = self._local(index)
+            self._items[local] = value
+
+    def __delitem__(self, index) -> None:
+        if isinstance(index, slice):
+            self._page_in()
+            del self._items[index]
+        else:
+            local = self._local(index)
+            del self._items[local]
+
+    def insert(self, index: int, value: dict[str, Any]) -> None:
+        if index >= len(self):
+            self._items.append(value)
+        else:
+            local = self._local(index)
+            self._items.insert(local, value)
+
+    def copy(self) -> "LazyMessages":
+        """Shallow copy that shares the on-disk prefix."""
+        return LazyMessages(list(self._items), self._offset, self._loader)
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        if self._offset:
+            yield from islice(self._loader(), self._offset)
+        yield from self._items
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (list, LazyMessages)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"LazyMessages(offset={self._offset}, loaded={len(self._items)})"
+
+
+class MessagesSnapshot(Sequence):
+    """
+    Read-only view of a message list as it was when the snapshot was taken.
+
+    Histories are append-only (Session.clear() swaps in a new list), so the
+    entries before ``unsaved_from`` cannot change and are shared with the
+    live list; only the unsaved tail is copied. A LazyMessages prefix stays
+    on disk, and ``resident`` matches the live list so stores treat the
+    snapshot like the list it came from.
+    """
+
+    def __init__(self, messages: Sequence[Mapping[str, Any]], unsaved_from: int):
+        if isinstance(messages, LazyMessages):
+            items, self._offset, self._loader = messages._items, messages._offset, messages._loader
+        else:
+            items, self._offset, self._loader = messages, 0, None
+        self._len = len(messages)
+        self._split = min(max(unsaved_from - self._offset, 0), len(items))
+        self._shared = items
+        self._tail = list(items[self._split:])
+        self.resident = len(items)
+
+    def _iter_from(self, start: int) -> Iterator[Mapping[str, Any]]:
+        if start < self._offset:
+            yield from islice(self._loader(), start, self._offset)
+            start = self._offset
+        local = start - self._offset
+        if local < self._split:
+            yield from islice(self._shared, local, self._split)
+            local = self._split
+        yield from self._tail[local - self._split:]
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[Mapping[str, Any]]:
+        return self._iter_from(0)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._len)
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return list(islice(self._iter_from(start), max(stop - start, 0)))
+        if not -self._len <= index < self._len:
+            raise IndexError("message index out of range")
+        return next(self._iter_from(index % self._len))
 
 
 @dataclass
@@ -18,6 +283,7 @@ class Session:
     A conversation session.
 
     Stores messages in JSONL format for easy reading and persistence.
+    In memory they are held as MessageRecord objects.
 
     Important: Messages are append-only for LLM cache efficiency.
     The consolidation process writes summaries to MEMORY.md/HISTORY.md
@@ -25,11 +291,30 @@ class Session:
     """
 
     key: str  # channel:chat_id
-    messages: list[dict[str, Any]] = field(default_factory=list)
+    messages: list[Mapping[str, Any]] = field(default_factory=list)
     created_at: datetime = field(default_factory=datetime.now)
     updated_at: datetime = field(default_factory=datetime.now)
     metadata: dict[str, Any] = field(default_factory=dict)
     last_consolidated: int = 0  # Number of messages already consolidated to files
+    # Persistence bookkeeping for append-only saves (managed by SessionManager)
+    _saved_count: int = field(default=0, repr=False)  # Messages already on disk
+    _saved_appends: int = field(default=0, repr=False)  # Appends since the last full rewrite
+    _needs_rewrite: bool = field(default=False, repr=False)  # Messages changed in place
+    _saved_consolidated: int = field(default=0, repr=False)  # last_consolidated on disk
+    _size: int = field(default=0, repr=False)  # Approximate bytes of resident messages
+    # get_history() entries for messages[_view_start:], extended as messages are appended
+    _view: list[dict[str, Any]] = field(default_factory=list, repr=False, compare=False)
+    _view_start: int = field(default=0, repr=False, compare=False)
+    _view_of: Any = field(default=None, repr=False, compare=False)  # The list the view was built from
+
+    @property
+    def dirty(self) -> bool:
+        """Whether the session has changes that are not on disk yet."""
+        return (
+            self._needs_rewrite
+            or self._saved_count != len(self.messages)
+            or self._saved_consolidated != self.last_consolidated
+        )
     
     def add_message(self, role: str, content: str, **kwargs: Any) -> None:
         """Add a message to the session."""
@@ -39,13 +324,53 @@ class Session:
             "timestamp": datetime.now().isoformat(),
             **kwargs
         }
-        self.messages.append(msg)
+        self.messages.append(MessageRecord(msg))
         self.updated_at = datetime.now()
-    
-    def get_history(self, max_messages: int = 500) -> list[dict[str, Any]]:
-        """Return unconsolidated messages for LLM input, aligned to a user turn."""
-        unconsolidated = self.messages[self.last_consolidated:]
-        sliced = unconsolidated[-max_messages:]
+
+    def _history_view(self) -> list[dict[str, Any]]:
+        """History entries for all unconsolidated messages, built once per message."""
+        start, view = self.last_consolidated, self._view
+        if self._view_of is not self.messages or not self._view_start <= start <= self._view_start + len(view):
+            view = self._view = []
+            self._view_start, self._view_of = start, self.messages
+        elif start > self._view_start:
+            del view[:start - self._view_start]
+            self._view_start = start
+        built = start + len(view)
+        if built > len(self.messages):  # Messages were removed: rebuild
+            self._view_of = None
+            return self._history_view()
+        if built < len(self.messages):
+            view.extend(_history_entry(m) for m in self.messages[built:])
+        return view
+
+    def fit_tokens(self, max_tokens: int, max_messages: int | None = None) -> int:
+        """Count the newest unconsolidated messages whose estimated tokens fit in ``max_tokens``."""
+        messages = self.messages
+        available = max(0, len(messages) - self.last_consolidated)
+        if max_messages is not None:
+            available = min(available, max_messages)
+        total = 0
+        for count in range(available):
+            total += message_tokens(messages[len(messages) - 1 - count])
+            if total > max_tokens:
+                return count
+        return available
+
+    def history_tokens(self) -> int:
+        """Estimated tokens of all unconsolidated messages."""
+        messages = self.messages
+        return sum(message_tokens(messages[i]) for i in range(self.last_consolidated, len(messages)))
+
+    def get_history(self, max_messages: int = 500, max_tokens: int | None = None) -> list[dict[str, Any]]:
+        """
+        Return unconsolidated messages for LLM input, aligned to a user turn.
+
+        The window is filled from the newest message back and holds at most
+        ``max_messages`` messages and, if given, ``max_tokens`` estimated tokens.
+        """
+        count = max_messages if max_tokens is None else self.fit_tokens(max_tokens, max_messages)
+        sliced = self._history_view()[-count:] if count > 0 else []
 
         # Drop leading non-user messages to avoid orphaned tool_result blocks
         for i, m in enumerate(sliced):
@@ -53,44 +378,66 @@ class Session:
                 sliced = sliced[i:]
                 break
 
-        out: list[dict[str, Any]] = []
-        for m in sliced:
-            entry: dict[str, Any] = {"role": m["role"], "content": m.get("content", "")}
-            for k in ("tool_calls", "tool_call_id", "name"):
-                if k in m:
-                    entry[k] = m[k]
-            out.append(entry)
-        return out
-    
+        # Entries are shared between calls; callers must not mutate them
+        return sliced
+
     def clear(self) -> None:
         """Clear all messages and reset session to initial state."""
         self.messages = []
         self.last_consolidated = 0
         self.updated_at = datetime.now()
+        self._needs_rewrite = True
+        self._view, self._view_of = [], None
 
 
 class SessionManager:
     """
     Manages conversation sessions.
 
-    Sessions are stored as JSONL files in the sessions directory.
+    Sessions are persisted by a SessionStore (JSONL files in the sessions
+    directory by default, or SQLite). With ``write_behind`` saves are handed
+    to a SessionPersister and written from an I/O thread, so save() never
+    waits on disk; call flush() or close() to make sure they landed.
+
+    Loaded sessions are kept in an LRU cache bounded by session count,
+    approximate size and idle time (0 disables a limit). Pinned sessions
+    (in-flight turns, consolidation) and sessions with unsaved or queued
+    changes are never evicted; a session invalidated while its save is
+    still queued is served from memory until the write lands.
     """
 
-    def __init__(self, workspace: Path):
+    def __init__(
+        self,
+        workspace: Path,
+        store: "SessionStore | None" = None,
+        cache_max_sessions: int = 256,
+        cache_max_bytes: int = 64 * 1024 * 1024,
+        cache_ttl_s: float = 3600,
+        write_behind: bool = False,
+        fsync: str = "none",
+        fsync_interval_s: float = 1.0,
+    ):
         self.workspace = workspace
         self.sessions_dir = ensure_dir(self.workspace / "sessions")
-        self.legacy_sessions_dir = Path.home() / ".nanobot" / "sessions"
-        self._cache: dict[str, Session] = {}
-    
-    def _get_session_path(self, key: str) -> Path:
-        """Get the file path for a session."""
-        safe_key = safe_filename(key.replace(":", "_"))
-        return self.sessions_dir / f"{safe_key}.jsonl"
-
-    def _get_legacy_session_path(self, key: str) -> Path:
-        """Legacy global session path (~/.nanobot/sessions/)."""
-        safe_key = safe_filename(key.replace(":", "_"))
-        return self.legacy_sessions_dir / f"{safe_key}.jsonl"
+        if store is None:
+            from nanobot.session.store import JsonlSessionStore
+            store = JsonlSessionStore(self.sessions_dir)
+        self.store = store
+        self._persister: "SessionPersister | None" = None
+        if write_behind:
+            from nanobot.session.persister import SessionPersister
+            self._persister = SessionPersister(store, fsync=fsync, fsync_interval_s=fsync_interval_s)
+        self.cache_max_sessions = cache_max_sessions
+        self.cache_max_bytes = cache_max_bytes
+        self.cache_ttl_s = cache_ttl_s
+        self._cache: OrderedDict[str, Session] = OrderedDict()
+        self._last_used: dict[str, float] = {}
+        self._cached_sizes: dict[str, int] = {}
+        self._cache_bytes = 0
+        self._pins: dict[str, int] = {}
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._cache_evictions = 0
     
     def get_or_create(self, key: str) -> Session:
         """
@@ -103,110 +450,121 @@ class SessionManager:
             The session.
         """
         if key in self._cache:
-            return self._cache[key]
-        
-        session = self._load(key)
+            self._cache_hits += 1
+            session = self._cache[key]
+            self._remember(session)
+            return session
+
+        self._cache_misses += 1
+        # With a save still queued the file is stale: serve the live session
+        # instead of waiting for the writer on the event loop
+        session = self._persister.pending(key) if self._persister else None
         if session is None:
-            session = Session(key=key)
-        
-        self._cache[key] = session
+            session = self.store.load(key) or Session(key=key)
+
+        self._remember(session)
+        self._evict()
         return session
-    
-    def _load(self, key: str) -> Session | None:
-        """Load a session from disk."""
-        path = self._get_session_path(key)
-        if not path.exists():
-            legacy_path = self._get_legacy_session_path(key)
-            if legacy_path.exists():
-                try:
-                    shutil.move(str(legacy_path), str(path))
-                    logger.info("Migrated session {} from legacy path", key)
-                except Exception:
-                    logger.exception("Failed to migrate session {}", key)
-
-        if not path.exists():
-            return None
 
+    def cache_info(self) -> dict[str, float]:
+        """Session cache counters: hits, misses, evictions, sessions, bytes and hit_rate."""
+        total = self._cache_hits + self._cache_misses
+        return {
+            "hits": self._cache_hits,
+            "misses": self._cache_misses,
+            "evictions": self._cache_evictions,
+            "sessions": len(self._cache),
+            "bytes": self._cache_bytes,
+            "hit_rate": self._cache_hits / total if total else 0.0,
+        }
+
+    def pin(self, key: str) -> None:
+        """Protect a session from eviction until the matching unpin()."""
+        self._pins[key] = self._pins.get(key, 0) + 1
+
+    def unpin(self, key: str) -> None:
+        self._pins[key] -= 1
+        if not self._pins[key]:
+            del self._pins[key]
+            self._evict()
+
+    @contextmanager
+    def pinned(self, key: str) -> Iterator[None]:
+        """Keep a session cached while the block runs (turns, consolidation)."""
+        self.pin(key)
         try:
-            messages = []
-            metadata = {}
-            created_at = None
-            last_consolidated = 0
-
-            with open(path, encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-
-                    data = json.loads(line)
-
-                    if data.get("_type") == "metadata":
-                        metadata = data.get("metadata", {})
-                        created_at = datetime.fromisoformat(data["created_at"]) if data.get("created_at") else None
-                        last_consolidated = data.get("last_consolidated", 0)
-                    else:
-                        messages.append(data)
-
-            return Session(
-                key=key,
-                messages=messages,
-                created_at=created_at or datetime.now(),
-                metadata=metadata,
-                last_consolidated=last_consolidated
-            )
-        except Exception as e:
-            logger.warning("Failed to load session {}: {}", key, e)
-            return None
+            yield
+        finally:
+            self.unpin(key)
+
+    def _remember(self, session: Session) -> None:
+        """Insert or refresh a session as most recently used."""
+        key = session.key
+        self._cache[key] = session
+        self._cache.move_to_end(key)
+        self._last_used[key] = time.monotonic()
+        self._cache_bytes += session._size - self._cached_sizes.get(key, 0)
+        self._cached_sizes[key] = session._size
+
+    def _forget(self, key: str) -> None:
+        self._cache.pop(key, None)
+        self._last_used.pop(key, None)
+        self._cache_bytes -= self._cached_sizes.pop(key, 0)
+
+    def _evict(self) -> None:
+        """Drop least recently used sessions that are over a limit, skipping busy ones."""
+        now = time.monotonic()
+        # The most recently used entry is the one a caller is holding right now
+        for key, session in list(self._cache.items())[:-1]:
+            over_count = self.cache_max_sessions and len(self._cache) > self.cache_max_sessions
+            over_bytes = self.cache_max_bytes and self._cache_bytes > self.cache_max_bytes
+            idle = self.cache_ttl_s and now - self._last_used[key] > self.cache_ttl_s
+            if not (over_count or over_bytes or idle):
+                break  # Entries are ordered by last use, so the rest are newer
+            if key in self._pins or session.dirty or (self._persister and self._persister.is_pending(key)):
+                continue
+            self._forget(key)
+            self._cache_evictions += 1
     
     def save(self, session: Session) -> None:
-        """Save a session to disk."""
-        path = self._get_session_path(session.key)
-
-        with open(path, "w", encoding="utf-8") as f:
-            metadata_line = {
-                "_type": "metadata",
-                "key": session.key,
-                "created_at": session.created_at.isoformat(),
-                "updated_at": session.updated_at.isoformat(),
-                "metadata": session.metadata,
-                "last_consolidated": session.last_consolidated
-            }
-            f.write(json.dumps(metadata_line, ensure_ascii=False) + "\n")
-            for msg in session.messages:
-                f.write(json.dumps(msg, ensure_ascii=False) + "\n")
-
-        self._cache[session.key] = session
-    
+        """Persist a session (or queue it with write-behind) and refresh it in the cache."""
+        if self._persister:
+            self._persister.submit(session)
+        else:
+            self.store.save(session)
+        session._saved_count = len(session.messages)
+        session._saved_consolidated = session.last_consolidated
+        session._needs_rewrite = False
+        self._remember(session)
+        self._evict()
+
     def invalidate(self, key: str) -> None:
         """Remove a session from the in-memory cache."""
-        self._cache.pop(key, None)
-    
-    def list_sessions(self) -> list[dict[str, Any]]:
+        self._forget(key)
+
+    def list_sessions(
+        self, channel: str | None = None, limit: int | None = None, offset: int = 0,
+    ) -> list[dict[str, Any]]:
         """
-        List all sessions.
-        
+        List sessions, most recently updated first.
+
+        Args:
+            channel: Only include sessions on this channel.
+            limit: Maximum number of sessions to return.
+            offset: Number of sessions to skip (for pagination).
+
         Returns:
             List of session info dicts.
         """
-        sessions = []
-        
-        for path in self.sessions_dir.glob("*.jsonl"):
-            try:
-                # Read just the metadata line
-                with open(path, encoding="utf-8") as f:
-                    first_line = f.readline().strip()
-                    if first_line:
-                        data = json.loads(first_line)
-                        if data.get("_type") == "metadata":
-                            key = data.get("key") or path.stem.replace("_", ":", 1)
-                            sessions.append({
-                                "key": key,
-                                "created_at": data.get("created_at"),
-                                "updated_at": data.get("updated_at"),
-                                "path": str(path)
-                            })
-            except Exception:
-                continue
-        
-        return sorted(sessions, key=lambda x: x.get("updated_at", ""), reverse=True)
+        return self.store.list_sessions(channel=channel, limit=limit, offset=offset)
+
+    def flush(self) -> None:
+        """Wait until queued write-behind saves have been written."""
+        if self._persister:
+            self._persister.flush()
+
+    def close(self) -> None:
+        """Flush pending saves and close the underlying store."""
+        if self._persister:
+            self._persister.close()
+        self.store.close()
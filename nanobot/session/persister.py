@@ -0,0 +1,148 @@
+"""Write-behind session persistence on a dedicated I/O thread."""
+
+import threading
+import time
+from dataclasses import replace
+
+from loguru import logger
+
+from nanobot.session.manager import MessagesSnapshot, Session
+from nanobot.session.store import SessionStore
+
+FSYNC_POLICIES = ("none", "interval", "always")
+
+
+class SessionPersister:
+    """
+    Queues session saves and writes them from a background thread.
+
+    Saves are coalesced per session: while a write is pending, a newer save
+    replaces it, so only the latest state reaches the store. The caller only
+    pays for copying the messages added since the last save (see
+    MessagesSnapshot). Bookkeeping the writer hands back to the live session
+    is guarded by the same condition as the queue.
+
+    fsync policy: "none" leaves flushing to the OS, "always" syncs after every
+    write, "interval" syncs written sessions at most every ``fsync_interval_s``.
+    """
+
+    def __init__(self, store: SessionStore, fsync: str = "none", fsync_interval_s: float = 1.0):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
+        self.store = store
+        self.fsync = fsync
+        self.fsync_interval_s = fsync_interval_s
+        self._cond = threading.Condition()
+        self._pending: dict[str, tuple[Session, Session]] = {}  # key -> (live session, snapshot)
+        self._writing: Session | None = None  # Live session whose snapshot is being written
+        self._unsynced: set[str] = set()
+        self._last_sync = time.monotonic()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+    def submit(self, session: Session) -> None:
+        """Queue the session's current state for writing."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("session persister is closed")
+            snapshot = replace(
+                session,
+                messages=MessagesSnapshot(session.messages, session._saved_count),
+                metadata=dict(session.metadata),
+            )
+            previous = self._pending.pop(session.key, None)
+            if previous:
+                # The older snapshot never reached disk: keep its view of what is there
+                _, older = previous
+                snapshot._saved_count = older._saved_count
+                snapshot._saved_appends = older._saved_appends
+                snapshot._needs_rewrite = snapshot._needs_rewrite or older._needs_rewrite
+            self._pending[session.key] = (session, snapshot)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="session-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def is_pending(self, key: str) -> bool:
+        """Whether a save for this session has not reached the store yet."""
+        return self.pending(key) is not None
+
+    def pending(self, key: str) -> Session | None:
+        """The live session behind a save that has not reached the store yet, if any."""
+        with self._cond:
+            if key in self._pending:
+                return self._pending[key][0]
+            if self._writing is not None and self._writing.key == key:
+                return self._writing
+            return None
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Block until every queued save has been written."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and self._writing is None, timeout)
+
+    def close(self) -> None:
+        """Flush queued saves, sync if the policy asks for it and stop the thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self._sync()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    timeout = None
+                    if self._unsynced:
+                        timeout = max(0.0, self._last_sync + self.fsync_interval_s - time.monotonic())
+                        if timeout == 0:
+                            break
+                    self._cond.wait(timeout)
+                if not self._pending:
+                    if self._closed:
+                        return
+                    item = None
+                else:
+                    key = next(iter(self._pending))
+                    item = self._pending.pop(key)
+                    self._writing = item[0]
+
+            if item is not None:
+                self._write(*item)
+            if self.fsync == "always" or (
+                self._unsynced and time.monotonic() - self._last_sync >= self.fsync_interval_s
+            ):
+                self._sync()
+
+            with self._cond:
+                self._writing = None
+                self._cond.notify_all()
+
+    def _write(self, live: Session, snapshot: Session) -> None:
+        try:
+            self.store.save(snapshot)
+        except Exception:
+            logger.exception("Failed to save session {}", snapshot.key)
+            # Bookkeeping on the live session assumed this write landed
+            with self._cond:
+                live._needs_rewrite = True
+                if newer := self._pending.get(live.key):
+                    newer[1]._needs_rewrite = True
+            return
+        with self._cond:
+            live._saved_appends = snapshot._saved_appends
+            live._size = snapshot._size
+        if self.fsync != "none":
+            self._unsynced.add(snapshot.key)
+
+    def _sync(self) -> None:
+        if not self._unsynced:
+            return
+        keys, self._unsynced = self._unsynced, set()
+        try:
+            self.store.sync(keys)
+        except Exception:
+            logger.exception("Failed to sync {} session(s)", len(keys))
+        self._last_sync = time.monotonic()
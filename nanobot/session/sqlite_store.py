@@ -0,0 +1,160 @@
+"""SQLite session storage backend."""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterator
+
+from nanobot.session.manager import LazyMessages, MessageRecord, Session, dump_message, load_message
+from nanobot.session.store import SessionStore, first_resident
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    key TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    metadata TEXT NOT NULL DEFAULT '{}',
+    last_consolidated INTEGER NOT NULL DEFAULT 0,
+    message_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at);
+CREATE TABLE IF NOT EXISTS messages (
+    session_key TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (session_key, seq)
+) WITHOUT ROWID;
+"""
+
+
+class SqliteSessionStore(SessionStore):
+    """
+    Sessions in a single SQLite database (WAL mode).
+
+    Messages are rows keyed by (session_key, seq), so a save inserts only the
+    new rows and a load can select just the unconsolidated tail.
+    """
+
+    def __init__(self, db_path: Path, lazy_load: bool = True):
+        self.db_path = db_path
+        self.lazy_load = lazy_load
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def load(self, key: str) -> Session | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created_at, updated_at, metadata, last_consolidated, message_count "
+                "FROM sessions WHERE key = ?", (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            created_at, updated_at, metadata, last_consolidated, total = row
+            start = last_consolidated if self.lazy_load else 0
+            rows = self._conn.execute(
+                "SELECT data FROM messages WHERE session_key = ? AND seq >= ? ORDER BY seq", (key, start),
+            ).fetchall()
+
+        tail = [load_message(data) for (data,) in rows]
+        offset = total - len(tail)
+        messages = LazyMessages(tail, offset, lambda: self._iter_messages(key)) if offset else tail
+        return Session(
+            key=key,
+            messages=messages,
+            created_at=datetime.fromisoformat(created_at),
+            updated_at=datetime.fromisoformat(updated_at),
+            metadata=json.loads(metadata),
+            last_consolidated=last_consolidated,
+            _saved_count=total,
+            _saved_consolidated=last_consolidated,
+            _size=sum(len(data) for (data,) in rows),
+        )
+
+    def _iter_messages(self, key: str) -> Iterator[MessageRecord]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM messages WHERE session_key = ? ORDER BY seq", (key,),
+            ).fetchall()
+        for (data,) in rows:
+            yield load_message(data)
+
+    def save(self, session: Session) -> None:
+        """Insert new message rows (or replace them all) and upsert the session row."""
+        rewrite = session._needs_rewrite or not 0 <= session._saved_count <= len(session.messages)
+        start = 0 if rewrite else session._saved_count
+        resident = first_resident(session.messages)
+        rows = []
+        size = 0 if rewrite else session._size
+        # Serialize before taking the lock: iterating a lazy list may read the database
+        if start >= resident:
+            new = enumerate(session.messages[start:], start)
+        else:
+            new = islice(enumerate(session.messages), start, None)
+        for seq, msg in new:
+            data = dump_message(msg)
+            rows.append((session.key, seq, data))
+            if seq >= resident:
+                size += len(data)
+
+        with self._lock, self._conn:
+            if rewrite:
+                self._conn.execute("DELETE FROM messages WHERE session_key = ?", (session.key,))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO messages (session_key, seq, data) VALUES (?, ?, ?)", rows,
+            )
+            self._conn.execute(
+                "INSERT INTO sessions (key, created_at, updated_at, metadata, last_consolidated, message_count) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET updated_at = excluded.updated_at, "
+                "metadata = excluded.metadata, last_consolidated = excluded.last_consolidated, "
+                "message_count = excluded.message_count",
+                (
+                    session.key,
+                    session.created_at.isoformat(),
+                    session.updated_at.isoformat(),
+                    json.dumps(session.metadata, ensure_ascii=False),
+                    session.last_consolidated,
+                    len(session.messages),
+                ),
+            )
+        session._size = size
+
+    def list_sessions(
+        self, channel: str | None = None, limit: int | None = None, offset: int = 0,
+    ) -> list[dict[str, Any]]:
+        sql = "SELECT key, created_at, updated_at, message_count FROM sessions"
+        params: list[Any] = []
+        if channel is not None:
+            # Range scan on the primary key instead of LIKE (keys may contain wildcards)
+            sql += " WHERE key >= ? AND key < ?"
+            params += [f"{channel}:", f"{channel};"]
+        sql += " ORDER BY updated_at DESC LIMIT ? OFFSET ?"
+        params += [-1 if limit is None else limit, offset]
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            {
+                "key": key,
+                "created_at": created_at,
+                "updated_at": updated_at,
+                "message_count": message_count,
+                "path": str(self.db_path),
+            }
+            for key, created_at, updated_at, message_count in rows
+        ]
+
+    def sync(self, keys: set[str]) -> None:
+        # synchronous=NORMAL only syncs the WAL at checkpoints
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,598 @@
+"""Session storage backends."""
+
+import gzip
+import json
+import os
+import shutil
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from itertools import chain, islice
+from pathlib import Path
+from typing import Any, Iterator
+
+from loguru import logger
+
+from nanobot.session.manager import LazyMessages, MessageRecord, Session, dump_message, load_message
+from nanobot.utils.helpers import ensure_dir, safe_filename
+
+
+def first_resident(messages: list[dict[str, Any]]) -> int:
+    """Index of the first message held in memory (lazy lists keep a prefix on disk)."""
+    return len(messages) - getattr(messages, "resident", len(messages))
+
+
+class SessionStore(ABC):
+    """
+    Persistence backend for sessions.
+
+    Stores load and save whole sessions; SessionManager handles caching and
+    the generic bookkeeping (saved count, dirty state) around them.
+    """
+
+    @abstractmethod
+    def load(self, key: str) -> Session | None:
+        """Load a session, or None if it does not exist."""
+        pass
+
+    @abstractmethod
+    def save(self, session: Session) -> None:
+        """Persist the session's messages and metadata."""
+        pass
+
+    @abstractmethod
+    def list_sessions(
+        self, channel: str | None = None, limit: int | None = None, offset: int = 0,
+    ) -> list[dict[str, Any]]:
+        """
+        List session info dicts (key, created_at, updated_at, message_count,
+        path), newest first, optionally filtered to one channel and paginated.
+        """
+        pass
+
+    def sync(self, keys: set[str]) -> None:
+        """Force the given sessions' data to stable storage (fsync)."""
+        pass
+
+    def close(self) -> None:
+        """Release any resources held by the store."""
+        pass
+
+
+class JsonlSessionStore(SessionStore):
+    """
+    Sessions as JSONL files: a metadata line followed by one line per message.
+
+    In append-only mode a save writes just the new messages plus a trailing
+    metadata record (the last metadata record wins on load); the file is
+    compacted by a full rewrite every ``compact_every`` appends or when
+    messages were changed in place.
+
+    With ``lazy_load`` the file is read backwards and only the unconsolidated
+    tail is parsed; older messages stay on disk until they are needed.
+
+    Listing is served from an index (``.index`` in the sessions directory, a
+    last-entry-wins JSON-lines log) that is appended to on save. It is
+    checked once per process against each file's (mtime_ns, size), so only
+    files changed behind our back are re-read; entries appended by other
+    processes are picked up incrementally.
+
+    archive() moves a session's oldest messages into gzip segments under
+    ``archive/<session>/`` (listed in its ``index.json``). The active file
+    records how many messages were archived, and loads read them back from
+    the segments when the older history is needed.
+    """
+
+    INDEX_FILE = ".index"
+
+    def __init__(
+        self,
+        sessions_dir: Path,
+        append_only: bool = True,
+        compact_every: int = 100,
+        lazy_load: bool = True,
+    ):
+        self.sessions_dir = ensure_dir(sessions_dir)
+        self.legacy_sessions_dir = Path.home() / ".nanobot" / "sessions"
+        self.append_only = append_only
+        self.compact_every = compact_every
+        self.lazy_load = lazy_load
+        self._index_path = self.sessions_dir / self.INDEX_FILE
+        self._index: dict[str, dict[str, Any]] | None = None  # file name -> entry
+        self._index_bytes = 0  # Index log bytes already applied to self._index
+        self._index_appends = 0
+        self._index_lock = threading.RLock()  # Saves may run on a write-behind thread
+        self.archive_dir = self.sessions_dir / "archive"
+        self._archived: dict[str, int] = {}  # key -> messages moved to archive segments
+
+    def _get_session_path(self, key: str) -> Path:
+        """Get the file path for a session."""
+        safe_key = safe_filename(key.replace(":", "_"))
+        return self.sessions_dir / f"{safe_key}.jsonl"
+
+    def _get_legacy_session_path(self, key: str) -> Path:
+        """Legacy global session path (~/.nanobot/sessions/)."""
+        safe_key = safe_filename(key.replace(":", "_"))
+        return self.legacy_sessions_dir / f"{safe_key}.jsonl"
+
+    def load(self, key: str) -> Session | None:
+        """Load a session from disk."""
+        path = self._get_session_path(key)
+        if not path.exists():
+            legacy_path = self._get_legacy_session_path(key)
+            if legacy_path.exists():
+                try:
+                    shutil.move(str(legacy_path), str(path))
+                    logger.info("Migrated session {} from legacy path", key)
+                except Exception:
+                    logger.exception("Failed to migrate session {}", key)
+
+        if not path.exists():
+            return None
+
+        if self.lazy_load:
+            try:
+                if session := self._load_tail(key, path):
+                    return session
+            except Exception as e:
+                logger.debug("Lazy load of session {} failed, reading full file: {}", key, e)
+
+        try:
+            messages = []
+            metadata = {}
+            created_at = None
+            updated_at = None
+            last_consolidated = 0
+            archived = 0
+            metadata_records = 0
+            size = 0
+
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+
+                    data = json.loads(line)
+
+                    if data.get("_type") == "metadata":
+                        metadata_records += 1
+                        metadata = data.get("metadata", {})
+                        created_at = datetime.fromisoformat(data["created_at"]) if data.get("created_at") else None
+                        updated_at = datetime.fromisoformat(data["updated_at"]) if data.get("updated_at") else None
+                        last_consolidated = data.get("last_consolidated", 0)
+                        archived = data.get("archived", 0)
+                    else:
+                        messages.append(MessageRecord(data))
+                        size += len(line)
+
+            self._archived[key] = archived
+            if archived:
+                messages = list(self._iter_archive(key, archived)) + messages
+
+            return Session(
+                key=key,
+                messages=messages,
+                created_at=created_at or datetime.now(),
+                updated_at=updated_at or datetime.now(),
+                metadata=metadata,
+                last_consolidated=last_consolidated,
+                _saved_count=len(messages),
+                _saved_appends=max(0, metadata_records - 1),
+                _saved_consolidated=last_consolidated,
+                _size=size,
+            )
+        except Exception as e:
+            logger.warning("Failed to load session {}: {}", key, e)
+            return None
+
+    def _load_tail(self, key: str, path: Path) -> Session | None:
+        """Parse only the trailing metadata record and the unconsolidated messages."""
+        lines = self._reverse_lines(path)
+        try:
+            meta = json.loads(next(lines, b"{}"))
+            if meta.get("_type") != "metadata" or "message_count" not in meta:
+                return None  # Legacy file or interrupted append: needs a full read
+            total = meta["message_count"]
+            need = total - meta.get("last_consolidated", 0)
+            tail: list[MessageRecord] = []
+            records = 1
+            size = 0
+            while len(tail) < need:
+                line = next(lines, None)
+                if line is None:
+                    return None
+                data = json.loads(line)
+                if data.get("_type") == "metadata":
+                    records += 1
+                else:
+                    tail.append(MessageRecord(data))
+                    size += len(line)
+        finally:
+            lines.close()
+
+        tail.reverse()
+        offset = total - len(tail)
+        self._archived[key] = meta.get("archived", 0)
+        messages = LazyMessages(tail, offset, lambda: self._iter_all(key, path)) if offset else tail
+        return Session(
+            key=key,
+            messages=messages,
+            created_at=datetime.fromisoformat(meta["created_at"]) if meta.get("created_at") else datetime.now(),
+            updated_at=datetime.fromisoformat(meta["updated_at"]) if meta.get("updated_at") else datetime.now(),
+            metadata=meta.get("metadata", {}),
+            last_consolidated=meta.get("last_consolidated", 0),
+            _saved_count=total,
+            _saved_appends=records - 1,
+            _saved_consolidated=meta.get("last_consolidated", 0),
+            _size=size,
+        )
+
+    @staticmethod
+    def _iter_messages(path: Path) -> Iterator[MessageRecord]:
+        """Stream the message records of a session file from the start."""
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    data = json.loads(line)
+                    if data.get("_type") != "metadata":
+                        yield MessageRecord(data)
+
+    def _iter_all(self, key: str, path: Path) -> Iterator[MessageRecord]:
+        """Stream every message of a session: archived segments, then the active file."""
+        yield from self._iter_archive(key, self._archived.get(key, 0))
+        yield from self._iter_messages(path)
+
+    @staticmethod
+    def _reverse_lines(path: Path, chunk: int = 65536) -> Iterator[bytes]:
+        """Yield the non-empty lines of a file from last to first."""
+        with open(path, "rb") as f:
+            pos = f.seek(0, os.SEEK_END)
+            rest = b""
+            while pos > 0:
+                step = min(chunk, pos)
+                pos -= step
+                f.seek(pos)
+                lines = (f.read(step) + rest).split(b"\n")
+                rest = lines.pop(0)
+                for line in reversed(lines):
+                    if line.strip():
+                        yield line
+            if rest.strip():
+                yield rest
+
+    def _metadata_line(self, session: Session) -> str:
+        record = {
+            "_type": "metadata",
+            "key": session.key,
+            "created_at": session.created_at.isoformat(),
+            "updated_at": session.updated_at.isoformat(),
+            "metadata": session.metadata,
+            "last_consolidated": session.last_consolidated,
+            "message_count": len(session.messages),
+        }
+        if archived := self._archived.get(session.key, 0):
+            record["archived"] = archived
+        return json.dumps(record, ensure_ascii=False) + "\n"
+
+    def save(self, session: Session) -> None:
+        """Save a session to disk, appending only new messages when possible."""
+        path = self._get_session_path(session.key)
+        can_append = (
+            self.append_only
+            and not session._needs_rewrite
+            and 0 < session._saved_count <= len(session.messages)
+            and session._saved_appends < self.compact_every
+            and path.exists()
+        )
+        if can_append:
+            self._append(path, session)
+        else:
+            self._rewrite(path, session)
+        self._update_index(path, session)
+
+    def sync(self, keys: set[str]) -> None:
+        for key in keys:
+            fd = os.open(self._get_session_path(key), os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        # Rewrites replace files by rename, which is durable once the directory is synced
+        if keys and hasattr(os, "O_DIRECTORY"):
+            fd = os.open(self.sessions_dir, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def _append(self, path: Path, session: Session) -> None:
+        """Append new messages and a trailing metadata record."""
+        with open(path, "a", encoding="utf-8") as f:
+            for msg in session.messages[session._saved_count:]:
+                line = dump_message(msg)
+                f.write(line + "\n")
+                session._size += len(line)
+            f.write(self._metadata_line(session))
+        session._saved_appends += 1
+
+    def _rewrite(self, path: Path, session: Session) -> None:
+        """Rewrite (compact) the whole session file atomically."""
+        archived = self._archived.get(session.key, 0)
+        if len(session.messages) < archived:
+            # History was cleared: the archived prefix no longer belongs to the session
+            self._drop_archive(session.key)
+            archived = 0
+        tmp = path.with_suffix(".jsonl.tmp")
+        metadata_line = self._metadata_line(session)
+        # Only messages held in memory count towards the cache size
+        start = first_resident(session.messages)
+        if start > archived:
+            # Messages between the archive and the in-memory tail live only in the current file
+            messages = chain(islice(self._iter_messages(path), start - archived), session.messages[start:])
+        else:
+            messages = iter(session.messages[archived:])
+        size = 0
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(metadata_line)
+            for i, msg in enumerate(messages, archived):
+                line = dump_message(msg)
+                f.write(line + "\n")
+                if i >= start:
+                    size += len(line)
+            # Trailing copy lets lazy loads find the current metadata from the end
+            f.write(metadata_line)
+        os.replace(tmp, path)
+        session._size = size
+        session._saved_appends = 0
+
+    def _archive_path(self, key: str) -> Path:
+        return self.archive_dir / self._get_session_path(key).stem
+
+    def _archive_segments(self, key: str) -> list[dict[str, Any]]:
+        try:
+            data = json.loads((self._archive_path(key) / "index.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return []
+        return sorted(data.get("segments", []), key=lambda seg: seg["start"])
+
+    def _iter_archive(self, key: str, count: int) -> Iterator[MessageRecord]:
+        """Stream the first ``count`` archived messages of a session."""
+        pos = 0
+        for seg in self._archive_segments(key):
+            if pos >= count:
+                return
+            if seg["start"] != pos:
+                raise ValueError(f"archive of session {key} has a gap at message {pos}")
+            with gzip.open(self._archive_path(key) / seg["file"], "rt", encoding="utf-8") as f:
+                for line in f:
+                    if pos >= count:
+                        return
+                    if line.strip():
+                        yield load_message(line)
+                        pos += 1
+        if pos < count:
+            raise ValueError(f"archive of session {key} has {pos} messages, expected {count}")
+
+    def _drop_archive(self, key: str) -> None:
+        shutil.rmtree(self._archive_path(key), ignore_errors=True)
+        self._archived.pop(key, None)
+
+    def archive(self, key: str, upto: int) -> int:
+        """
+        Move a session's messages before index ``upto`` into a gzip segment.
+
+        Run this offline (no other process writing the session). Returns the
+        number of messages moved.
+        """
+        path = self._get_session_path(key)
+        if not path.exists():
+            return 0
+        meta: dict[str, Any] = {}
+        first_meta: dict[str, Any] = {}
+        in_file: list[str] = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                data = json.loads(line)
+                if data.get("_type") == "metadata":
+                    first_meta = first_meta or data
+                    meta = data
+                else:
+                    in_file.append(line)
+        archived = meta.get("archived", 0)
+        total = archived + len(in_file)
+        upto = min(upto, total)
+        moved = upto - archived
+        if moved <= 0:
+            return 0
+
+        # 1. Segment and index first; segments past the recorded count are ignored on load
+        seg_dir = ensure_dir(self._archive_path(key))
+        seg_name = f"{archived:010d}-{upto:010d}.jsonl.gz"
+        tmp = seg_dir / (seg_name + ".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            for line in in_file[:moved]:
+                f.write(line + "\n")
+        os.replace(tmp, seg_dir / seg_name)
+        segments = [seg for seg in self._archive_segments(key) if seg["start"] < archived]
+        segments.append({"file": seg_name, "start": archived, "end": upto})
+        tmp = seg_dir / "index.json.tmp"
+        tmp.write_text(json.dumps({"key": key, "segments": segments}), encoding="utf-8")
+        os.replace(tmp, seg_dir / "index.json")
+
+        # 2. Then drop the archived lines from the active file
+        meta = {**meta, "archived": upto, "message_count": total}
+        head = {**meta, "created_at": first_meta.get("created_at", meta.get("created_at"))}
+        tmp = path.with_suffix(".jsonl.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps(head, ensure_ascii=False) + "\n")
+            for line in in_file[moved:]:
+                f.write(line + "\n")
+            f.write(json.dumps(meta, ensure_ascii=False) + "\n")
+        os.replace(tmp, path)
+        self._archived[key] = upto
+        self._record_index(self._index_entry(path, path.stat(), meta, head["created_at"]))
+        return moved
+
+    def _read_last_metadata(self, path: Path) -> dict | None:
+        """Return the trailing metadata record of a session file, if any."""
+        lines = self._reverse_lines(path)
+        try:
+            data = json.loads(next(lines, b"{}"))
+        finally:
+            lines.close()
+        return data if data.get("_type") == "metadata" else None
+
+    @staticmethod
+    def _index_entry(path: Path, st: os.stat_result, meta: dict[str, Any], created_at: str | None) -> dict[str, Any]:
+        return {
+            "file": path.name,
+            "key": meta.get("key") or path.stem.replace("_", ":", 1),
+            "created_at": created_at,
+            "updated_at": meta.get("updated_at"),
+            "message_count": meta.get("message_count"),
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+        }
+
+    def _scan_file(self, path: Path, st: os.stat_result) -> dict[str, Any] | None:
+        """Build an index entry by reading a session file's metadata records."""
+        with open(path, encoding="utf-8") as f:
+            first_line = f.readline().strip()
+        if not first_line:
+            return None
+        first = json.loads(first_line)
+        if first.get("_type") != "metadata":
+            return None
+        # Appended saves leave the current metadata as the last line
+        last = self._read_last_metadata(path) or first
+        if "message_count" not in last:
+            last = {**last, "message_count": sum(1 for _ in self._iter_messages(path))}
+        return self._index_entry(path, st, last, first.get("created_at"))
+
+    def _read_index_log(self, index: dict[str, dict[str, Any]], start: int = 0) -> int:
+        """Apply index log entries from byte offset ``start``; returns the new offset."""
+        try:
+            with open(self._index_path, "rb") as f:
+                f.seek(start)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Partially written by another process; pick it up next time
+                    start += len(line)
+                    try:
+                        entry = json.loads(line)
+                        index[entry["file"]] = entry
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        except OSError:
+            pass
+        return start
+
+    def _load_index(self) -> dict[str, dict[str, Any]]:
+        """
+        Return the session index (call with _index_lock held).
+
+        The first call validates the on-disk index against the session files,
+        re-reading only files that changed. Later calls just apply entries
+        other processes appended since.
+        """
+        if self._index is not None:
+            try:
+                size = self._index_path.stat().st_size
+            except OSError:
+                size = 0
+            if size > self._index_bytes:
+                self._index_bytes = self._read_index_log(self._index, self._index_bytes)
+                return self._index
+            if size == self._index_bytes:
+                return self._index
+            self._index = None  # Compacted elsewhere: validate again
+
+        index: dict[str, dict[str, Any]] = {}
+        self._index_bytes = self._read_index_log(index)
+
+        current: dict[str, dict[str, Any]] = {}
+        for path in self.sessions_dir.glob("*.jsonl"):
+            try:
+                st = path.stat()
+                entry = index.get(path.name)
+                if not entry or (entry.get("mtime_ns"), entry.get("size")) != (st.st_mtime_ns, st.st_size):
+                    entry = self._scan_file(path, st)
+                if entry:
+                    current[path.name] = entry
+            except Exception:
+                continue
+
+        self._index = current
+        if current != index:
+            self._compact_index()
+        return current
+
+    def _compact_index(self) -> None:
+        tmp = self._index_path.with_name(self.INDEX_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for entry in (self._index or {}).values():
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            size = f.tell()
+        os.replace(tmp, self._index_path)
+        self._index_bytes = size
+        self._index_appends = 0
+
+    def _update_index(self, path: Path, session: Session) -> None:
+        """Record a saved session in the index."""
+        try:
+            entry = self._index_entry(path, path.stat(), {
+                "key": session.key,
+                "updated_at": session.updated_at.isoformat(),
+                "message_count": len(session.messages),
+            }, session.created_at.isoformat())
+            self._record_index(entry)
+        except OSError as e:
+            logger.warning("Failed to update session index for {}: {}", session.key, e)
+
+    def _record_index(self, entry: dict[str, Any]) -> None:
+        """Apply an index entry in memory and append it to the on-disk log."""
+        with self._index_lock:
+            if self._index is not None:
+                self._index[entry["file"]] = entry
+                if self._index_appends >= max(1000, 2 * len(self._index)):
+                    self._compact_index()
+                    return
+            with open(self._index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._index_appends += 1
+
+    def list_sessions(
+        self, channel: str | None = None, limit: int | None = None, offset: int = 0,
+    ) -> list[dict[str, Any]]:
+        """
+        List sessions from the index.
+
+        Args:
+            channel: Only include sessions whose key starts with "<channel>:".
+            limit: Maximum number of sessions to return.
+            offset: Number of sessions to skip (for pagination).
+
+        Returns:
+            List of session info dicts, most recently updated first.
+        """
+        with self._index_lock:
+            entries = list(self._load_index().values())
+        if channel is not None:
+            entries = [e for e in entries if e["key"].startswith(f"{channel}:")]
+        ordered = sorted(entries, key=lambda e: e.get("updated_at") or "", reverse=True)
+        end = None if limit is None else offset + limit
+        return [
+            {
+                "key": e["key"],
+                "created_at": e.get("created_at"),
+                "updated_at": e.get("updated_at"),
+                "message_count": e.get("message_count"),
+                "size": e.get("size"),
+                "path": str(self.sessions_dir / e["file"]),
+            }
+            for e in ordered[offset:end]
+        ]
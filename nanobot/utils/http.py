@@ -0,0 +1,89 @@
+"""Process-wide pooled HTTP clients shared by providers, tools and channels."""
+
+import asyncio
+import importlib.util
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Any
+from weakref import WeakKeyDictionary
+
+import httpx
+from loguru import logger
+
+
+def _no_cookies() -> CookieJar:
+    """A cookie jar that never stores anything."""
+    return CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+
+
+class HttpClientRegistry:
+    """
+    Named, long-lived ``httpx.AsyncClient`` instances with keep-alive pools.
+
+    Callers borrow a client with ``get(name)`` instead of opening one per
+    request, so DNS, TCP and TLS setup is paid once per connection rather
+    than once per call. Each name is its own connection pool with its own
+    limits; use one name per service (host) and a shared one for arbitrary
+    URLs. Because a client is shared by every session, its cookie jar
+    never stores cookies. Clients are bound to the event loop that created them, so the
+    registry keeps a set per loop. ``aclose()`` shuts the pools down.
+    """
+
+    def __init__(
+        self,
+        http2: bool = False,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry_s: float = 30.0,
+    ):
+        self._clients: WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, httpx.AsyncClient]] = (
+            WeakKeyDictionary()
+        )
+        self.configure(http2, max_connections, max_keepalive_connections, keepalive_expiry_s)
+
+    def configure(
+        self,
+        http2: bool = False,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry_s: float = 30.0,
+    ) -> None:
+        """Set pool options for clients created from now on."""
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry_s,
+        )
+
+    def get(self, name: str, **client_kwargs: Any) -> httpx.AsyncClient:
+        """
+        Return the pooled client called ``name``, creating it on first use.
+
+        ``client_kwargs`` (e.g. ``verify``, ``max_redirects``, ``timeout``)
+        only apply when the client is created; per-request options such as
+        ``timeout`` and ``follow_redirects`` belong on the request itself.
+        """
+        loop = asyncio.get_running_loop()
+        clients = self._clients.setdefault(loop, {})
+        client = clients.get(name)
+        if client is None or client.is_closed:
+            client_kwargs.setdefault("limits", self.limits)
+            client_kwargs.setdefault("http2", self.http2)
+            client_kwargs.setdefault("cookies", _no_cookies())
+            client = clients[name] = httpx.AsyncClient(**client_kwargs)
+        return client
+
+    async def aclose(self) -> None:
+        """Close the clients created on the running event loop."""
+        clients = self._clients.pop(asyncio.get_running_loop(), {})
+        for client in clients.values():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.debug("Error closing HTTP client: {}", e)
+
+
+http_clients = HttpClientRegistry()
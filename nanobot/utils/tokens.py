@@ -0,0 +1,78 @@
+"""Local token estimates for budgeting prompt history."""
+
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+# Rough per-message framing cost (role, separators) in chat formats
+MESSAGE_OVERHEAD_TOKENS = 4
+# Inline images are billed by size; assume a mid-sized one
+IMAGE_TOKENS = 800
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of a string without a tokenizer.
+
+    ASCII text averages about four characters per token; other scripts (CJK
+    in particular) are closer to one token per character.
+    """
+    if not text:
+        return 0
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def estimate_message_tokens(message: Mapping[str, Any]) -> int:
+    """Estimate the prompt tokens a chat message contributes."""
+    tokens = MESSAGE_OVERHEAD_TOKENS
+    content = message.get("content")
+    if isinstance(content, str):
+        tokens += estimate_tokens(content)
+    elif isinstance(content, list):
+        for block in content:
+            if not isinstance(block, dict):
+                continue
+            if block.get("type") == "image_url":
+                tokens += IMAGE_TOKENS
+            else:
+                tokens += estimate_tokens(block.get("text") or "")
+    for call in message.get("tool_calls") or ():
+        fn = call.get("function") or {}
+        tokens += MESSAGE_OVERHEAD_TOKENS + estimate_tokens(fn.get("name") or "")
+        tokens += estimate_tokens(fn.get("arguments") or "")
+    if name := message.get("name"):
+        tokens += estimate_tokens(name)
+    return tokens
+
+
+def estimate_prompt_tokens(messages: Iterable[Mapping[str, Any]]) -> int:
+    """Estimate the prompt tokens of a message list, reusing a PromptMessages running count."""
+    if (running := getattr(messages, "estimated_tokens", None)) is not None:
+        return running()
+    return sum(estimate_message_tokens(m) for m in messages)
+
+
+class TokenBudget:
+    """
+    Token budget for session history, calibrated against the provider.
+
+    Estimates are local and approximate; ``calibrate`` feeds back the
+    ``prompt_tokens`` a provider reported for a request and keeps a smoothed
+    ratio of real to estimated tokens, which scales the budget.
+    """
+
+    def __init__(self, max_tokens: int, smoothing: float = 0.3):
+        self.max_tokens = max_tokens
+        self.smoothing = smoothing
+        self.ratio = 1.0
+
+    def calibrate(self, estimated: int, prompt_tokens: int) -> None:
+        if estimated <= 0 or prompt_tokens <= 0:
+            return
+        observed = min(max(prompt_tokens / estimated, 0.25), 4.0)
+        self.ratio += self.smoothing * (observed - self.ratio)
+
+    @property
+    def history_tokens(self) -> int:
+        """The budget in estimated tokens."""
+        return int(self.max_tokens / self.ratio)
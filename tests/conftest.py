@@ -0,0 +1,112 @@
+"""Shared fixtures: a local mock chat-completions server with scriptable faults."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+_USAGE = {"prompt_tokens": 10, "completion_tokens": 1, "total_tokens": 11}
+
+
+class MockChatServer(ThreadingHTTPServer):
+    """
+    An OpenAI-style /chat/completions endpoint on 127.0.0.1.
+
+    Replies with ``reply`` after ``delay`` seconds, streaming when asked to.
+    Each request first takes the next scripted ``(status, delay_s, headers)``
+    from ``faults``; while ``down`` every request, including GET /models
+    health checks, gets a 503.
+    """
+
+    def __init__(self, reply: str = "ok", delay: float = 0.0):
+        super().__init__(("127.0.0.1", 0), _MockChatHandler)
+        self.reply = reply
+        self.delay = delay
+        self.down = False
+        self.faults: list[tuple[int, float, dict[str, str]]] = []
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def start(self) -> "MockChatServer":
+        threading.Thread(target=self.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        return self
+
+    def completion(self) -> bytes:
+        return json.dumps({
+            "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "mock",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": self.reply}}],
+            "usage": _USAGE,
+        }).encode()
+
+    def stream(self) -> bytes:
+        chunks = [
+            {"choices": [{"index": 0, "delta": {"role": "assistant", "content": self.reply}, "finish_reason": None}]},
+            {"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]},
+            {"choices": [], "usage": _USAGE},
+        ]
+        return b"".join(
+            b"data: " + json.dumps({"id": "chatcmpl-1", "object": "chat.completion.chunk", "created": 0,
+                                    "model": "mock", **chunk}).encode() + b"\n\n"
+            for chunk in chunks
+        ) + b"data: [DONE]\n\n"
+
+
+class _MockChatHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _reply(self, status: int, payload: bytes, ctype: str = "application/json", headers=None) -> None:
+        self.send_response(status)
+        for key, value in {"Content-Type": ctype, **(headers or {})}.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self) -> None:
+        self._reply(503 if self.server.down else 200, b'{"data": []}')
+
+    def do_POST(self) -> None:
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.requests += 1
+            status, delay, headers = server.faults.pop(0) if server.faults else (200, server.delay, {})
+        time.sleep(delay)
+        if server.down:
+            status = 503
+        if status != 200:
+            self._reply(status, json.dumps({"error": {"message": f"fault {status}"}}).encode(), headers=headers)
+        elif body.get("stream"):
+            self._reply(200, server.stream(), "text/event-stream", headers)
+        else:
+            self._reply(200, server.completion(), headers=headers)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def chat_server_factory():
+    """Start mock chat servers on demand; all are shut down after the test."""
+    servers: list[MockChatServer] = []
+
+    def _start(reply: str = "ok", delay: float = 0.0) -> MockChatServer:
+        servers.append(MockChatServer(reply, delay).start())
+        return servers[-1]
+
+    yield _start
+    for server in servers:
+        server.shutdown()
+
+
+@pytest.fixture
+def chat_server(chat_server_factory) -> MockChatServer:
+    return chat_server_factory()
@@ -0,0 +1,28 @@
+"""Tests for the Codex provider's prefix-stable prompt_cache_key."""
+
+from nanobot.providers.base import PromptMessages
+from nanobot.providers.openai_codex_provider import OpenAICodexProvider
+
+TOOLS = [{"type": "function", "function": {"name": "exec", "parameters": {}}}]
+
+
+def _messages(session: str, turns: int) -> PromptMessages:
+    messages = PromptMessages([{"role": "system", "content": "instructions"}], session_key=session)
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"q{i}"})
+        messages.append({"role": "assistant", "content": f"a{i}"})
+    return messages
+
+
+def test_key_is_stable_across_history_and_scoped_by_prefix() -> None:
+    provider = OpenAICodexProvider()
+    key = provider._prompt_cache_key(_messages("cli:1", 1), "instructions", TOOLS)
+
+    # Growing history (tool loop iterations, later turns) keeps the key
+    assert provider._prompt_cache_key(_messages("cli:1", 5), "instructions", TOOLS) == key
+    assert provider._prompt_cache_key(_messages("cli:1", 5), "instructions", list(TOOLS)) == key
+
+    assert provider._prompt_cache_key(_messages("cli:2", 1), "instructions", TOOLS) != key
+    assert provider._prompt_cache_key(_messages("cli:1", 1), "new instructions", TOOLS) != key
+    assert provider._prompt_cache_key(_messages("cli:1", 1), "instructions", None) != key
+    assert len(provider._cache_keys) == 2
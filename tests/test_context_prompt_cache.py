@@ -64,3 +64,102 @@ def test_runtime_context_is_separate_untrusted_user_message(tmp_path) -> None:
 
     assert messages[-1]["role"] == "user"
     assert messages[-1]["content"] == "Return exactly: OK"
+
+
+def test_system_prompt_is_cached_until_files_change(tmp_path) -> None:
+    """Unchanged workspace files should be served from the part cache."""
+    workspace = _make_workspace(tmp_path)
+    builder = ContextBuilder(workspace)
+
+    prompt1 = builder.build_system_prompt()
+    misses = builder.cache_info()["misses"]
+    prompt2 = builder.build_system_prompt()
+
+    assert prompt1 == prompt2
+    assert builder.cache_info()["misses"] == misses
+    assert builder.cache_info()["hits"] == 4
+
+    (workspace / "memory" / "MEMORY.md").write_text("User likes tea.", encoding="utf-8")
+    prompt3 = builder.build_system_prompt()
+    assert "User likes tea." in prompt3
+    assert builder.cache_info()["misses"] == misses + 1
+
+    (workspace / "SOUL.md").write_text("Be kind.", encoding="utf-8")
+    skill_dir = workspace / "skills" / "demo"
+    skill_dir.mkdir(parents=True)
+    (skill_dir / "SKILL.md").write_text("---\ndescription: Demo skill\n---\nbody", encoding="utf-8")
+    prompt4 = builder.build_system_prompt()
+    assert "Be kind." in prompt4
+    assert "Demo skill" in prompt4
+    assert 0 < builder.cache_info()["hit_rate"] < 1
+
+
+def test_system_segments_put_memory_last_with_breakpoints(tmp_path) -> None:
+    from nanobot.providers.litellm_provider import LiteLLMProvider
+
+    workspace = _make_workspace(tmp_path)
+    (workspace / "SOUL.md").write_text("Be kind.", encoding="utf-8")
+    builder = ContextBuilder(workspace)
+    (workspace / "memory" / "MEMORY.md").write_text("User likes tea.", encoding="utf-8")
+
+    segments = builder.build_system_segments()
+    assert len(segments) == 3
+    assert segments[0].startswith("# nanobot")
+    assert "Be kind." in segments[1]
+    assert "User likes tea." in segments[2]
+    assert builder.build_system_prompt() == "\n\n---\n\n".join(segments)
+
+    history = [{"role": "user" if i % 2 == 0 else "assistant", "content": f"m{i}"} for i in range(12)]
+    messages = builder.build_messages(history=history, current_message="hi")
+    assert messages.system_segments == segments
+    provider = LiteLLMProvider(default_model="anthropic/claude-opus-4-5")
+    annotated, _ = provider._apply_cache_control(messages, None)
+    blocks = annotated[0]["content"]
+    assert "".join(b["text"] for b in blocks) == messages[0]["content"]
+    # Two of the four breakpoints roll over history; the least stable segments keep theirs
+    assert [b.get("cache_control") for b in blocks] == [None, {"type": "ephemeral"}, {"type": "ephemeral"}]
+    assert [i for i, m in enumerate(annotated) if isinstance(m["content"], list) and i] == [8, 14]
+    annotated, _ = provider._apply_cache_control(messages, None, limit=5)
+    assert all("cache_control" in b for b in annotated[0]["content"])
+
+
+def test_parse_usage_and_cache_stats() -> None:
+    from types import SimpleNamespace
+
+    from nanobot.providers.base import PromptCacheStats, parse_usage
+
+    openai = SimpleNamespace(prompt_tokens=100, completion_tokens=5, total_tokens=105,
+                             prompt_tokens_details=SimpleNamespace(cached_tokens=80))
+    anthropic = SimpleNamespace(prompt_tokens=100, completion_tokens=5, total_tokens=105,
+                                cache_read_input_tokens=0, cache_creation_input_tokens=90)
+    stats = PromptCacheStats()
+    stats.record(parse_usage(openai))
+    stats.record(parse_usage(anthropic))
+    stats.record({})
+
+    info = stats.info()
+    assert info["requests"] == 2
+    assert info["cached_tokens"] == 80
+    assert info["cache_creation_tokens"] == 90
+    assert info["hit_rate"] == 0.4
+
+
+def test_skills_part_is_rebuilt_when_a_requirement_becomes_met(tmp_path, monkeypatch) -> None:
+    """Installing a missing tool or setting an env var should refresh skill availability."""
+    import nanobot.agent.skills as skills_module
+
+    workspace = _make_workspace(tmp_path)
+    skill_dir = workspace / "skills" / "needs-env"
+    skill_dir.mkdir(parents=True)
+    (skill_dir / "SKILL.md").write_text(
+        '---\ndescription: Needs a token\nmetadata: {"nanobot": {"requires": {"env": ["DEMO_TOKEN"]}}}\n---\nbody',
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(skills_module, "REQUIREMENT_TTL_S", 0.0)
+    monkeypatch.delenv("DEMO_TOKEN", raising=False)
+    builder = ContextBuilder(workspace)
+
+    assert "<requires>ENV: DEMO_TOKEN</requires>" in builder.build_system_prompt()
+
+    monkeypatch.setenv("DEMO_TOKEN", "secret")
+    assert "ENV: DEMO_TOKEN" not in builder.build_system_prompt()
@@ -0,0 +1,85 @@
+"""Tests for the direct OpenAI-compatible path driven by the provider registry."""
+
+import pytest
+
+from nanobot.cli.commands import _make_base_provider
+from nanobot.config.schema import Config
+from nanobot.providers.custom_provider import CustomProvider
+from nanobot.providers.litellm_provider import LiteLLMProvider
+from nanobot.providers.registry import find_by_name
+from nanobot.utils.http import http_clients
+
+
+def _config(model: str, provider: str, **fields) -> Config:
+    config = Config()
+    config.agents.defaults.model = model
+    for key, value in {"api_key": "sk-test", **fields}.items():
+        setattr(getattr(config.providers, provider), key, value)
+    return config
+
+
+def test_compatible_specs_route_to_direct_provider() -> None:
+    provider = _make_base_provider(_config("deepseek/deepseek-chat", "deepseek"))
+
+    assert isinstance(provider, CustomProvider)
+    assert provider.spec.name == "deepseek"
+    assert provider.api_base == "https://api.deepseek.com/v1"
+    assert provider._build_kwargs([{"role": "user", "content": "hi"}], None, None, 10, 0.5)["model"] == "deepseek-chat"
+
+
+def test_other_apis_stay_on_litellm() -> None:
+    assert isinstance(_make_base_provider(_config("anthropic/claude-opus-4-5", "anthropic")), LiteLLMProvider)
+    assert isinstance(_make_base_provider(_config("gemini-2.0-flash", "gemini")), LiteLLMProvider)
+    # vLLM without an api_base has nowhere to go directly
+    assert isinstance(_make_base_provider(_config("vllm/llama", "vllm")), LiteLLMProvider)
+    local = _make_base_provider(_config("vllm/llama", "vllm", api_base="http://localhost:8000/v1"))
+    assert isinstance(local, CustomProvider)
+    assert local._build_kwargs([], None, None, 10, 0.5)["model"] == "llama"
+
+
+def test_direct_model_names_drop_litellm_routing_prefixes() -> None:
+    assert find_by_name("openrouter").direct_model("openrouter/anthropic/claude-3") == "anthropic/claude-3"
+    assert find_by_name("openrouter").direct_model("anthropic/claude-3") == "anthropic/claude-3"
+    assert find_by_name("aihubmix").direct_model("anthropic/claude-3") == "claude-3"
+    assert find_by_name("siliconflow").direct_model("Qwen/Qwen2.5-7B") == "Qwen/Qwen2.5-7B"
+    assert find_by_name("vllm").direct_model("hosted_vllm/llama") == "llama"
+
+
+def test_gateway_applies_overrides_and_cache_control() -> None:
+    provider = _make_base_provider(_config("moonshotai/kimi-k2.5", "openrouter"))
+    assert isinstance(provider, CustomProvider)
+
+    messages = [{"role": "system", "content": "sys"}, {"role": "user", "content": "hi"}]
+    kwargs = provider._build_kwargs(messages, [{"name": "t"}], None, 10, 0.5)
+    assert kwargs["temperature"] == 1.0
+    assert kwargs["messages"][0]["content"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert kwargs["tools"][-1]["cache_control"] == {"type": "ephemeral"}
+    # The caller's messages are not modified
+    assert messages[0]["content"] == "sys"
+
+
+def test_plain_lists_are_sanitized_and_drop_params_removed() -> None:
+    provider = _make_base_provider(_config("groq/llama-3.3-70b-versatile", "groq"))
+    messages = [
+        {"role": "user", "content": "hi", "timestamp": "2026-01-01T00:00:00"},
+        {"role": "assistant", "content": "", "reasoning_content": "hmm", "tools_used": ["x"]},
+    ]
+
+    sent = provider._build_kwargs(messages, None, None, 10, 0.5)["messages"]
+
+    assert sent == [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "(empty)"}]
+    # Providers that accept reasoning_content still get it
+    deepseek = _make_base_provider(_config("deepseek/deepseek-chat", "deepseek"))
+    assert deepseek._build_kwargs(messages, None, None, 10, 0.5)["messages"][1]["reasoning_content"] == "hmm"
+
+
+@pytest.mark.asyncio
+async def test_sdk_client_uses_the_pooled_http_client() -> None:
+    provider = _make_base_provider(_config("deepseek/deepseek-chat", "deepseek"))
+    try:
+        client = provider._client
+        assert client is provider._client
+        assert client._client is http_clients.get("llm:https://api.deepseek.com/v1")
+        assert str(client.base_url).rstrip("/") == "https://api.deepseek.com/v1"
+    finally:
+        await http_clients.aclose()
@@ -0,0 +1,82 @@
+"""Tests for the token-budgeted history window."""
+
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.events import InboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.base import LLMResponse
+from nanobot.session.manager import Session
+from nanobot.utils.tokens import TokenBudget, estimate_message_tokens, estimate_tokens
+
+
+def test_estimates() -> None:
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("a" * 400) == 100
+    assert estimate_tokens("你好") == 2
+    call = {"id": "c1", "type": "function", "function": {"name": "exec", "arguments": '{"cmd": "ls"}'}}
+    assert estimate_message_tokens({"role": "assistant", "content": None, "tool_calls": [call]}) > 8
+    image = {"role": "user", "content": [{"type": "image_url", "image_url": {"url": "x"}}]}
+    assert estimate_message_tokens(image) > estimate_message_tokens({"role": "user", "content": "x"})
+
+
+def test_history_fills_budget_from_newest_and_aligns_to_user() -> None:
+    session = Session(key="cli:direct")
+    session.add_message("user", "question")
+    session.add_message("assistant", "x" * 4000)  # ~1000 tokens
+    session.add_message("user", "short")
+    session.add_message("assistant", "reply")
+
+    assert len(session.get_history(max_tokens=100_000)) == 4
+    assert [m["content"] for m in session.get_history(max_tokens=200)] == ["short", "reply"]
+    # The window never starts on a non-user message
+    assert [m["content"] for m in session.get_history(max_tokens=1020)] == ["short", "reply"]
+    assert session.fit_tokens(1020) == 3
+    assert session.history_tokens() == sum(m.tokens for m in session.messages)
+
+
+def test_budget_calibration_scales_history_tokens() -> None:
+    budget = TokenBudget(1000, smoothing=1.0)
+    budget.calibrate(estimated=500, prompt_tokens=1000)
+    assert budget.history_tokens == 500
+    budget.calibrate(estimated=0, prompt_tokens=1000)  # Ignored
+    assert budget.ratio == 2.0
+
+
+@pytest.mark.asyncio
+async def test_loop_consolidates_by_tokens_and_calibrates(tmp_path: Path) -> None:
+    provider = MagicMock()
+    provider.get_default_model.return_value = "test-model"
+    loop = AgentLoop(
+        bus=MessageBus(), provider=provider, workspace=tmp_path, model="test-model",
+        memory_window=100, history_max_tokens=500,
+    )
+    loop.provider.chat = AsyncMock(return_value=LLMResponse(
+        content="ok", usage={"prompt_tokens": 10_000, "completion_tokens": 1, "total_tokens": 10_001},
+    ))
+    loop.tools.get_definitions = MagicMock(return_value=[])
+    consolidate = AsyncMock(return_value=True)
+    loop._consolidate_memory = consolidate  # type: ignore[method-assign]
+
+    session = loop.sessions.get_or_create("cli:test")
+    session.add_message("user", "hi")
+    session.add_message("assistant", "y" * 4000)  # Few messages, but over the token budget
+    loop.sessions.save(session)
+
+    await loop._process_message(InboundMessage(channel="cli", sender_id="u", chat_id="test", content="hello"))
+    for task in list(loop._consolidation_tasks):
+        await task
+
+    consolidate.assert_awaited_once()
+    assert loop.token_budget.ratio > 1.0
+    assert loop.token_budget.history_tokens < 500
+
+
+def test_token_budget_is_opt_in(tmp_path: Path) -> None:
+    from nanobot.config.schema import Config
+
+    assert Config().agents.defaults.history_max_tokens == 0
+    assert AgentLoop(bus=MessageBus(), provider=MagicMock(), workspace=tmp_path, model="m").token_budget is None
@@ -0,0 +1,70 @@
+"""Tests for the shared pooled HTTP client registry."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from nanobot.agent.tools.web import WebSearchTool
+from nanobot.utils.http import HttpClientRegistry, http_clients
+
+
+@pytest.mark.asyncio
+async def test_clients_are_reused_per_name_and_closed() -> None:
+    registry = HttpClientRegistry(max_connections=5)
+    client = registry.get("a", timeout=5.0)
+    assert registry.get("a") is client
+    assert registry.get("b") is not client
+    assert client.timeout.connect == 5.0
+
+    await registry.aclose()
+    assert client.is_closed
+    assert registry.get("a") is not client
+    await registry.aclose()
+
+
+def test_clients_are_per_event_loop() -> None:
+    registry = HttpClientRegistry()
+
+    async def _get() -> httpx.AsyncClient:
+        return registry.get("a")
+
+    first = asyncio.run(_get())
+    second = asyncio.run(_get())
+    assert first is not second
+
+
+@pytest.mark.asyncio
+async def test_web_search_borrows_the_pooled_client() -> None:
+    requests: list[httpx.Request] = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"web": {"results": [{"title": "T", "url": "https://x"}]}})
+
+    http_clients.get("brave", transport=httpx.MockTransport(_handler))
+    try:
+        tool = WebSearchTool(api_key="k")
+        assert "1. T" in await tool.execute("q")
+        assert "1. T" in await tool.execute("q")
+        assert len(requests) == 2
+    finally:
+        await http_clients.aclose()
+
+
+@pytest.mark.asyncio
+async def test_pooled_clients_do_not_carry_cookies_between_requests() -> None:
+    seen: list[str | None] = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers.get("cookie"))
+        return httpx.Response(200, headers={"Set-Cookie": "sid=user-a; Path=/"}, text="ok")
+
+    registry = HttpClientRegistry()
+    client = registry.get("web", transport=httpx.MockTransport(_handler))
+    await client.get("https://example.com/a")
+    await client.get("https://example.com/b")
+
+    assert seen == [None, None]
+    assert not client.cookies
+    await registry.aclose()
@@ -0,0 +1,76 @@
+"""Tests for LoadBalancedProvider against several mock chat servers (see conftest)."""
+
+import asyncio
+
+import pytest
+
+from nanobot.cli.commands import _make_base_provider
+from nanobot.config.schema import Config
+from nanobot.providers.balancer import LoadBalancedProvider
+from nanobot.providers.base import PromptMessages
+from nanobot.providers.custom_provider import CustomProvider
+
+
+@pytest.fixture
+def replicas(chat_server_factory):
+    return [chat_server_factory("a"), chat_server_factory("b")]
+
+
+def _balancer(replicas, **kwargs) -> LoadBalancedProvider:
+    backends = [CustomProvider(api_key="sk", api_base=r.base, default_model="mock") for r in replicas]
+    return LoadBalancedProvider(backends, **kwargs)
+
+
+def _session(key: str) -> PromptMessages:
+    return PromptMessages([{"role": "user", "content": "hi"}], session_key=key)
+
+
+async def test_sessions_stick_to_one_replica(replicas) -> None:
+    provider = _balancer(replicas)
+
+    answers = {(await provider.chat(_session("cli:a"))).content for _ in range(5)}
+    assert len(answers) == 1
+
+    spread = {(await provider.chat(_session(f"cli:{i}"))).content for i in range(20)}
+    assert spread == {"a", "b"}
+
+
+async def test_calls_without_session_go_to_least_outstanding(replicas) -> None:
+    for replica in replicas:
+        replica.delay = 0.1
+    provider = _balancer(replicas)
+
+    answers = await asyncio.gather(*(provider.chat([{"role": "user", "content": "hi"}]) for _ in range(4)))
+
+    assert sorted(r.content for r in answers) == ["a", "a", "b", "b"]
+
+
+async def test_failing_replica_is_ejected_and_readmitted(replicas) -> None:
+    provider = _balancer(replicas, eject_after=2, health_check_interval_s=0)
+    key = next(f"cli:{i}" for i in range(100) if provider._ranked(f"cli:{i}")[0].name == replicas[0].base)
+    replicas[0].down = True
+
+    answers = [(await provider.chat(_session(key))).content for _ in range(4)]
+
+    assert answers == ["b"] * 4
+    assert replicas[0].requests == 2  # Ejected after two failures, then skipped
+    assert provider.info()[replicas[0].base]["ejected"]
+
+    await provider.check_health()
+    assert provider.info()[replicas[0].base]["ejected"]
+    replicas[0].down = False
+    await provider.check_health()
+    assert (await provider.chat(_session(key))).content == "a"
+
+
+def test_api_bases_build_a_balanced_provider() -> None:
+    config = Config()
+    config.agents.defaults.model = "vllm/llama"
+    config.providers.vllm.api_key = "sk"
+    config.providers.vllm.api_bases = ["http://gpu1:8000/v1", "http://gpu2:8000/v1"]
+
+    provider = _make_base_provider(config)
+
+    assert isinstance(provider, LoadBalancedProvider)
+    assert [b.name for b in provider.backends] == config.providers.vllm.api_bases
+    assert all(isinstance(b.provider, CustomProvider) for b in provider.backends)
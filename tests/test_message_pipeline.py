@@ -0,0 +1,113 @@
+"""Tests for the incremental message pipeline: sanitize once, cached tool definitions."""
+
+from types import SimpleNamespace
+from typing import Any
+
+from nanobot.agent.tools.base import Tool
+from nanobot.agent.tools.registry import ToolRegistry
+from nanobot.providers.base import PromptMessages, sanitize_message
+from nanobot.providers.litellm_provider import LiteLLMProvider
+from nanobot.session.manager import Session
+
+
+class _EchoTool(Tool):
+    def __init__(self, name: str):
+        self._name = name
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def description(self) -> str:
+        return "echo"
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {"type": "object", "properties": {}}
+
+    async def execute(self, **kwargs: Any) -> str:
+        return "ok"
+
+
+def test_sanitize_message_copies_only_when_needed() -> None:
+    clean = {"role": "user", "content": "hi"}
+    assert sanitize_message(clean) is clean
+    assert sanitize_message({"role": "tool", "tool_call_id": "c", "content": ""})["content"] == "(empty)"
+    assert sanitize_message({"role": "assistant", "tool_calls": [{"id": "c"}], "timestamp": "t"}) == {
+        "role": "assistant", "tool_calls": [{"id": "c"}], "content": None,
+    }
+
+
+def test_prompt_messages_sanitize_on_append() -> None:
+    messages = PromptMessages([{"role": "system", "content": "sys"}, {"role": "user", "content": "hi"}])
+    messages.append({"role": "assistant", "content": "", "tool_calls": [{"id": "c"}], "extra": 1})
+    assert messages[-1] == {"role": "assistant", "content": None, "tool_calls": [{"id": "c"}]}
+
+    provider = LiteLLMProvider(default_model="anthropic/claude-opus-4-5")
+    kwargs = provider._build_kwargs(messages, None, None, 100, 0.1)
+    # Messages are sent as shallow copies; only breakpoint messages are rewritten
+    assert kwargs["messages"][0] is not messages[0] and "cache_control" not in str(messages[0])
+    assert kwargs["messages"][2] == messages[2] and kwargs["messages"][2] is not messages[2]
+
+    plain = provider._build_kwargs(list(messages), None, "openai/gpt-4o", 100, 0.1)
+    assert plain["messages"] == list(messages)
+
+
+def test_registry_caches_definitions_until_tools_change() -> None:
+    registry = ToolRegistry()
+    registry.register(_EchoTool("a"))
+    first = registry.get_definitions()
+    assert registry.get_definitions() is first
+
+    provider = LiteLLMProvider(default_model="anthropic/claude-opus-4-5")
+    _, tools = provider._apply_cache_control([], first)
+    assert provider._apply_cache_control([], first)[1] is tools
+    assert "cache_control" not in first[-1]
+
+    registry.register(_EchoTool("b"))
+    assert [d["function"]["name"] for d in registry.get_definitions()] == ["a", "b"]
+    registry.unregister("a")
+    assert [d["function"]["name"] for d in registry.get_definitions()] == ["b"]
+    # Order is by name, not registration (MCP tools arrive in connection order)
+    registry.register(_EchoTool("a"))
+    assert [d["function"]["name"] for d in registry.get_definitions()] == ["a", "b"]
+
+
+def test_history_breakpoints_roll_forward_within_the_limit() -> None:
+    provider = LiteLLMProvider(default_model="anthropic/claude-opus-4-5")
+    messages = PromptMessages([{"role": "system", "content": "sys"}, {"role": "user", "content": "go"}])
+    anchors = []
+    for i in range(12):
+        messages.append({"role": "assistant", "content": None, "tool_calls": [{"id": f"c{i}"}]})
+        messages.append({"role": "tool", "tool_call_id": f"c{i}", "name": "exec", "content": f"r{i}"})
+        annotated, tools = provider._apply_cache_control(messages, [{"name": "t"}], limit=4)
+        marked = [j for j, m in enumerate(annotated) if isinstance(m["content"], list)]
+        breakpoints = len(marked) + ("cache_control" in tools[-1])
+        assert breakpoints <= 4
+        assert marked[-1] == len(messages) - 1  # The newest tool result
+        anchors.append(marked[1:-1])
+    # Anchors sit on fixed positions and only move forward a stride at a time
+    assert anchors[-1] == [23] and anchors[3] == [7]
+
+
+async def test_provider_edits_do_not_leak_into_session_history(monkeypatch) -> None:
+    session = Session(key="cli:direct")
+    session.add_message("user", "question")
+    session.add_message("assistant", "answer")
+    before = session.get_history()
+
+    async def _mutating_acompletion(**kwargs):
+        for m in kwargs["messages"]:
+            m["content"] = "rewritten"
+        message = SimpleNamespace(content="ok", tool_calls=None, reasoning_content=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")], usage=None)
+
+    monkeypatch.setattr("nanobot.providers.litellm_provider.acompletion", _mutating_acompletion)
+    provider = LiteLLMProvider(default_model="openai/gpt-4o")
+    messages = PromptMessages([{"role": "system", "content": "sys"}, *session.get_history()])
+
+    await provider.chat(messages)
+
+    assert session.get_history() == before
+    assert [m["content"] for m in messages[1:]] == ["question", "answer"]
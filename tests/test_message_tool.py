@@ -1,3 +1,5 @@
+import asyncio
+
 import pytest
 
 from nanobot.agent.tools.message import MessageTool
@@ -8,3 +10,28 @@ async def test_message_tool_returns_error_when_no_target_context() -> None:
     tool = MessageTool()
     result = await tool.execute(content="test")
     assert result == "Error: No target channel/chat specified"
+
+
+@pytest.mark.asyncio
+async def test_message_tool_context_is_per_turn() -> None:
+    sent = []
+
+    async def _send(msg) -> None:
+        sent.append((msg.channel, msg.chat_id))
+
+    tool = MessageTool(send_callback=_send)
+
+    async def _turn(channel: str, chat_id: str) -> bool:
+        tool.set_context(channel, chat_id)
+        tool.start_turn()
+        await asyncio.sleep(0)
+        await tool.execute(content="hi")
+        return tool._sent_in_turn
+
+    results = await asyncio.gather(
+        asyncio.create_task(_turn("telegram", "1")),
+        asyncio.create_task(_turn("discord", "2")),
+    )
+    assert results == [True, True]
+    assert sorted(sent) == [("discord", "2"), ("telegram", "1")]
+    assert not tool._sent_in_turn
@@ -0,0 +1,63 @@
+"""Tests for per-task model routing (agents.routing)."""
+
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.queue import MessageBus
+from nanobot.cli.commands import _agent_routes, _route_provider
+from nanobot.config.schema import Config, ModelRouteConfig
+from nanobot.providers.custom_provider import CustomProvider
+
+
+def _config() -> Config:
+    config = Config()
+    config.agents.defaults.model = "deepseek/deepseek-chat"
+    config.providers.deepseek.api_key = "sk-deepseek"
+    config.providers.groq.api_key = "sk-groq"
+    return config
+
+
+def test_unset_routes_use_the_main_provider_and_model() -> None:
+    main = object()
+    routes = _agent_routes(_config(), main)
+
+    assert routes["consolidation_provider"] is routes["subagent_provider"] is main
+    assert routes["consolidation_model"] == routes["subagent_model"] == "deepseek/deepseek-chat"
+
+
+def test_route_to_another_model_of_the_same_provider_reuses_it() -> None:
+    main = object()
+    route = ModelRouteConfig(model="deepseek/deepseek-reasoner")
+
+    assert _route_provider(_config(), route, main) == (main, "deepseek/deepseek-reasoner")
+
+
+def test_route_to_another_provider_builds_its_own() -> None:
+    route = ModelRouteConfig(model="llama-3.1-8b-instant", provider="groq")
+
+    provider, model = _route_provider(_config(), route, object())
+
+    assert model == "llama-3.1-8b-instant"
+    inner = provider.provider  # RetryingProvider around the direct provider
+    assert isinstance(inner, CustomProvider)
+    assert inner.spec.name == "groq"
+    assert inner.api_key == "sk-groq"
+
+
+async def test_loop_sends_consolidation_and_subagents_to_their_routes(tmp_path: Path) -> None:
+    main, cheap = MagicMock(), MagicMock()
+    main.get_default_model.return_value = "big-model"
+    loop = AgentLoop(
+        bus=MessageBus(), provider=main, workspace=tmp_path,
+        consolidation_provider=cheap, consolidation_model="small-model",
+        subagent_provider=cheap, subagent_model="mid-model",
+    )
+    session = loop.sessions.get_or_create("cli:test")
+
+    with patch("nanobot.agent.loop.MemoryStore.consolidate", new=AsyncMock(return_value=True)) as consolidate:
+        await loop._consolidate_memory(session)
+
+    assert consolidate.await_args.args[1:3] == (cheap, "small-model")
+    assert loop.subagents.provider is cheap and loop.subagents.model == "mid-model"
+    assert loop.model == "big-model"
@@ -0,0 +1,117 @@
+"""Tests for the provider fallback chain (agents.fallback)."""
+
+import asyncio
+
+from nanobot.cli.commands import _make_provider, _route_provider
+from nanobot.config.schema import Config, ModelRouteConfig
+from nanobot.providers.base import LLMProvider, LLMResponse, LLMStreamEvent
+from nanobot.providers.custom_provider import CustomProvider
+from nanobot.providers.fallback import FallbackProvider, Tier
+
+
+class _Scripted(LLMProvider):
+    def __init__(self, content: str = "ok", error: bool = False, delay: float = 0.0):
+        super().__init__()
+        self.content = content
+        self.error = error
+        self.delay = delay
+        self.models: list[str] = []
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7) -> LLMResponse:
+        self.models.append(model)
+        await asyncio.sleep(self.delay)
+        if self.error:
+            return LLMResponse(content="Error calling LLM: down", finish_reason="error")
+        return LLMResponse(content=self.content)
+
+    def get_default_model(self) -> str:
+        return "scripted"
+
+
+_MSGS = [{"role": "user", "content": "hi"}]
+
+
+async def test_errors_fall_through_to_the_next_tier() -> None:
+    primary, backup = _Scripted(error=True), _Scripted("from backup")
+    provider = FallbackProvider([Tier(primary, "big"), Tier(backup, "small")])
+
+    response = await provider.chat(_MSGS, model="big-v2")
+
+    assert response.content == "from backup"
+    # The first tier runs the requested model, later tiers their own
+    assert primary.models == ["big-v2"] and backup.models == ["small"]
+    assert provider.info() == {
+        "big": {"served": 0, "failures": 1, "timeouts": 0},
+        "small": {"served": 1, "failures": 0, "timeouts": 0},
+    }
+
+
+async def test_deadline_moves_on_and_last_error_is_returned() -> None:
+    provider = FallbackProvider(
+        [Tier(_Scripted(delay=1.0), "slow"), Tier(_Scripted(error=True), "broken")], deadline_s=0.05,
+    )
+
+    response = await provider.chat(_MSGS)
+
+    assert response.finish_reason == "error"
+    assert provider.info()["slow"]["timeouts"] == 1
+    assert provider.info()["broken"]["failures"] == 1
+
+
+async def test_stream_falls_back_before_output() -> None:
+    provider = FallbackProvider([Tier(_Scripted(error=True), "a"), Tier(_Scripted("streamed"), "b")])
+
+    events: list[LLMStreamEvent] = [e async for e in provider.chat_stream(_MSGS)]
+
+    assert [e.content for e in events] == ["streamed"]
+    assert events[-1].response.content == "streamed"
+    assert provider.info()["b"]["served"] == 1
+
+
+def test_make_provider_builds_a_tier_per_chain_entry() -> None:
+    config = Config()
+    config.agents.defaults.model = "deepseek/deepseek-chat"
+    config.providers.deepseek.api_key = "sk-deepseek"
+    config.providers.groq.api_key = "sk-groq"
+    config.agents.fallback.chain = [ModelRouteConfig(model="groq/llama-3.3-70b-versatile", provider="groq")]
+    config.agents.fallback.deadline_s = 20
+
+    provider = _make_provider(config)
+
+    assert isinstance(provider, FallbackProvider)
+    assert provider.deadline_s == 20
+    assert [t.label for t in provider.tiers] == [
+        "deepseek:deepseek/deepseek-chat", "groq:groq/llama-3.3-70b-versatile",
+    ]
+    backup = provider.tiers[1].provider.provider  # Inside the retry layer
+    assert isinstance(backup, CustomProvider) and backup.spec.name == "groq"
+    # Registry adaptation is per target: groq's endpoint gets the bare model name
+    assert backup._build_kwargs(_MSGS, None, provider.tiers[1].model, 10, 0.1)["model"] == "llama-3.3-70b-versatile"
+
+
+async def test_empty_stream_falls_through() -> None:
+    class _Empty(_Scripted):
+        async def chat_stream(self, *args, **kwargs):
+            return
+            yield
+
+    provider = FallbackProvider([Tier(_Empty(), "empty"), Tier(_Scripted("ok"), "b")])
+
+    events = [e async for e in provider.chat_stream(_MSGS)]
+
+    assert events[-1].response.content == "ok"
+    assert provider.info()["empty"] == {"served": 0, "failures": 1, "timeouts": 0}
+
+
+def test_routes_to_other_models_do_not_inherit_the_chain() -> None:
+    config = Config()
+    config.agents.defaults.model = "deepseek/deepseek-chat"
+    config.providers.deepseek.api_key = "sk-deepseek"
+    config.providers.groq.api_key = "sk-groq"
+    config.agents.fallback.chain = [ModelRouteConfig(model="groq/llama-3.3-70b-versatile", provider="groq")]
+    main = _make_provider(config)
+
+    provider, model = _route_provider(config, ModelRouteConfig(model="deepseek/deepseek-reasoner"), main)
+    assert provider is main.tiers[0].provider and model == "deepseek/deepseek-reasoner"
+    # An unset route is the main model and keeps its fallback
+    assert _route_provider(config, ModelRouteConfig(), main) == (main, "deepseek/deepseek-chat")
@@ -0,0 +1,80 @@
+"""Tests for RetryingProvider against the fault-injecting mock chat server (see conftest)."""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from nanobot.providers.custom_provider import CustomProvider
+from nanobot.providers.retry import RetryingProvider, is_retryable, retry_after
+
+
+def _provider(server, **kwargs) -> RetryingProvider:
+    inner = CustomProvider(api_key="sk-test", api_base=server.base, default_model="mock")
+    return RetryingProvider(inner, base_delay_s=0.01, **kwargs)
+
+
+async def test_transient_errors_are_retried(chat_server) -> None:
+    chat_server.faults = [(503, 0, {}), (429, 0, {"Retry-After": "0.05"})]
+    provider = _provider(chat_server)
+
+    start = time.perf_counter()
+    response = await provider.chat([{"role": "user", "content": "hi"}])
+
+    assert response.content == "ok"
+    assert chat_server.requests == 3
+    assert time.perf_counter() - start >= 0.05
+    assert provider.stats.info()["retries"] == 2
+    assert provider.stats.info()["errors"] == 2
+
+
+@pytest.mark.parametrize(("faults", "requests"), [
+    pytest.param([(400, 0, {})], 1, id="client-error"),
+    pytest.param([(500, 0, {})] * 3, 3, id="attempts-exhausted"),
+])
+async def test_unrecoverable_errors_return_the_error(chat_server, faults, requests) -> None:
+    chat_server.faults = faults
+    response = await _provider(chat_server).chat([{"role": "user", "content": "hi"}])
+    assert response.finish_reason == "error" and chat_server.requests == requests
+
+
+async def test_hedged_request_wins_over_a_slow_one(chat_server) -> None:
+    chat_server.faults = [(200, 1.0, {})]
+    provider = _provider(chat_server, hedge=True, hedge_min_delay_s=0.05, hedge_min_samples=0)
+
+    start = time.perf_counter()
+    response = await provider.chat([{"role": "user", "content": "hi"}])
+
+    assert response.content == "ok"
+    assert time.perf_counter() - start < 0.9
+    assert chat_server.requests == 2
+    assert provider.stats.hedges == provider.stats.hedge_wins == 1
+
+
+async def test_stream_retries_only_before_output(chat_server) -> None:
+    chat_server.faults = [(502, 0, {})]
+    provider = _provider(chat_server)
+
+    events = [event async for event in provider.chat_stream([{"role": "user", "content": "hi"}])]
+
+    assert [e.content for e in events if e.content] == ["ok"]
+    assert events[-1].response.content == "ok"
+    assert chat_server.requests == 2
+
+
+def test_error_classification() -> None:
+    request = httpx.Request("POST", "http://x")
+
+    def status_error(status: int, headers: dict[str, str] | None = None) -> httpx.HTTPStatusError:
+        response = httpx.Response(status, headers=headers, request=request)
+        return httpx.HTTPStatusError("boom", request=request, response=response)
+
+    assert is_retryable(status_error(529))
+    assert not is_retryable(status_error(401))
+    assert is_retryable(httpx.ConnectTimeout("slow"))
+    assert is_retryable(asyncio.TimeoutError())
+    assert not is_retryable(ValueError("bad"))
+    assert retry_after(status_error(429, {"Retry-After": "3"})) == 3.0
+    assert retry_after(status_error(429, {"retry-after-ms": "250"})) == 0.25
+    assert retry_after(status_error(429)) is None
@@ -0,0 +1,242 @@
+"""Tests for streaming chat: chunk assembly, Codex SSE events and bus deltas."""
+
+import json
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.events import InboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.config.schema import ChannelsConfig
+from nanobot.providers.base import (
+    ChatStreamAssembler,
+    LLMProvider,
+    LLMResponse,
+    LLMStreamEvent,
+)
+from nanobot.providers.openai_codex_provider import _consume_sse, _stream_sse
+
+
+def _chunk(content=None, tool_calls=None, finish_reason=None, usage=None):
+    delta = SimpleNamespace(content=content, tool_calls=tool_calls)
+    choice = SimpleNamespace(delta=delta, finish_reason=finish_reason)
+    return SimpleNamespace(choices=[choice], usage=usage)
+
+
+def _tc_delta(index, id=None, name=None, arguments=None):
+    return SimpleNamespace(index=index, id=id, function=SimpleNamespace(name=name, arguments=arguments))
+
+
+def test_assembler_collects_text_and_tool_calls() -> None:
+    asm = ChatStreamAssembler()
+    events = [
+        *asm.feed(_chunk(content="Hel")),
+        *asm.feed(_chunk(content="lo")),
+        *asm.feed(_chunk(tool_calls=[_tc_delta(0, id="call_1", name="read_file", arguments='{"pa')])),
+        *asm.feed(_chunk(tool_calls=[_tc_delta(0, arguments='th": "a.txt"}')])),
+        *asm.feed(_chunk(finish_reason="tool_calls")),
+        *asm.feed(SimpleNamespace(choices=[], usage=SimpleNamespace(
+            prompt_tokens=10, completion_tokens=5, total_tokens=15))),
+    ]
+
+    assert [e.content for e in events if e.content] == ["Hel", "lo"]
+    assert events[-1].tool_call.arguments == {"path": "a.txt"}
+    result = asm.result()
+    assert result.content == "Hello"
+    assert result.finish_reason == "tool_calls"
+    assert result.usage["total_tokens"] == 15
+    assert result.tool_calls == [events[-1].tool_call]
+    assert result.tool_calls[0].id == "call_1"
+
+
+# Two tool calls with their arguments split across chunks; the first is
+# complete when the second's index starts, the second on finish_reason
+_TOOL_CALL_CHUNKS = [
+    _chunk(content="Let me look"),
+    _chunk(tool_calls=[_tc_delta(0, id="call_1", name="read_file", arguments='{"path"')]),
+    _chunk(tool_calls=[_tc_delta(0, arguments=': "a.txt"}')]),
+    _chunk(tool_calls=[_tc_delta(1, id="call_2", name="list_dir", arguments='{"pa')]),
+    _chunk(tool_calls=[_tc_delta(1, arguments='th": "."}')]),
+    _chunk(finish_reason="tool_calls"),
+]
+
+
+def _assert_tool_calls_streamed(events: list[LLMStreamEvent]) -> None:
+    kinds = ["text" if e.content else "call" if e.tool_call else "final" for e in events]
+    assert kinds == ["text", "call", "call", "final"]
+    assert [(e.tool_call.id, e.tool_call.arguments) for e in events[1:3]] == [
+        ("call_1", {"path": "a.txt"}), ("call_2", {"path": "."}),
+    ]
+    assert events[-1].response.tool_calls == [events[1].tool_call, events[2].tool_call]
+
+
+async def _chunks(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.mark.asyncio
+async def test_litellm_stream_emits_tool_calls_as_they_complete(monkeypatch) -> None:
+    from nanobot.providers.litellm_provider import LiteLLMProvider
+
+    async def _acompletion(**kwargs):
+        return _chunks(_TOOL_CALL_CHUNKS)
+
+    monkeypatch.setattr("nanobot.providers.litellm_provider.acompletion", _acompletion)
+    provider = LiteLLMProvider(default_model="openai/gpt-4o")
+
+    _assert_tool_calls_streamed([e async for e in provider.chat_stream([{"role": "user", "content": "hi"}])])
+
+
+@pytest.mark.asyncio
+async def test_custom_stream_emits_tool_calls_as_they_complete(monkeypatch) -> None:
+    from nanobot.providers.custom_provider import CustomProvider
+
+    provider = CustomProvider(api_key="k", api_base="http://127.0.0.1:1/v1", default_model="m")
+
+    async def _create(body):
+        return _chunks(_TOOL_CALL_CHUNKS[:-1])  # No finish_reason: flushed at the end
+
+    monkeypatch.setattr(provider, "_create", _create)
+
+    _assert_tool_calls_streamed([e async for e in provider.chat_stream([{"role": "user", "content": "hi"}])])
+
+
+class _FakeSSE:
+    def __init__(self, events: list[dict]):
+        self._lines = []
+        for ev in events:
+            self._lines += [f"data: {json.dumps(ev)}", ""]
+
+    async def aiter_lines(self):
+        for line in self._lines:
+            yield line
+
+
+_CODEX_EVENTS = [
+    {"type": "response.output_text.delta", "delta": "Hi "},
+    {"type": "response.output_text.delta", "delta": "there"},
+    {"type": "response.output_item.added",
+     "item": {"type": "function_call", "call_id": "c1", "id": "fc1", "name": "list_dir"}},
+    {"type": "response.function_call_arguments.done", "call_id": "c1", "arguments": '{"path": "."}'},
+    {"type": "response.output_item.done", "item": {"type": "function_call", "call_id": "c1"}},
+    {"type": "response.completed", "response": {"status": "completed"}},
+]
+
+
+@pytest.mark.asyncio
+async def test_codex_sse_streams_deltas_then_response() -> None:
+    events = [e async for e in _stream_sse(_FakeSSE(_CODEX_EVENTS))]
+
+    assert [e.content for e in events if e.content] == ["Hi ", "there"]
+    assert events[-2].tool_call is not None and events[-2].tool_call.name == "list_dir"
+    final = events[-1].response
+    assert final is not None
+    assert final.content == "Hi there"
+    assert final.tool_calls[0].arguments == {"path": "."}
+
+
+@pytest.mark.asyncio
+async def test_codex_consume_sse_keeps_buffered_contract() -> None:
+    content, tool_calls, finish_reason = await _consume_sse(_FakeSSE(_CODEX_EVENTS))
+    assert content == "Hi there"
+    assert tool_calls[0].id == "c1|fc1"
+    assert finish_reason == "stop"
+
+
+class _StaticProvider(LLMProvider):
+    def __init__(self, response: LLMResponse):
+        super().__init__()
+        self._response = response
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+        return self._response
+
+    def get_default_model(self) -> str:
+        return "static"
+
+
+@pytest.mark.asyncio
+async def test_default_chat_stream_falls_back_to_chat() -> None:
+    provider = _StaticProvider(LLMResponse(content="done"))
+    events = [e async for e in provider.chat_stream(messages=[])]
+    assert len(events) == 1
+    assert events[0].content == "done"
+    assert events[0].response.content == "done"
+
+    provider = _StaticProvider(LLMResponse(content="Error calling LLM: x", finish_reason="error"))
+    events = [e async for e in provider.chat_stream(messages=[])]
+    assert events[0].content == ""
+
+
+@pytest.mark.asyncio
+async def test_agent_loop_publishes_deltas_when_enabled(tmp_path: Path) -> None:
+    bus = MessageBus()
+    provider = MagicMock()
+    provider.get_default_model.return_value = "test-model"
+
+    async def _stream(**kwargs):
+        yield LLMStreamEvent(content="Hel")
+        yield LLMStreamEvent(content="lo")
+        yield LLMStreamEvent(response=LLMResponse(content="Hello"))
+
+    provider.chat_stream = _stream
+    provider.chat = AsyncMock()
+    loop = AgentLoop(
+        bus=bus, provider=provider, workspace=tmp_path, model="test-model",
+        channels_config=ChannelsConfig(send_deltas=True),
+    )
+    loop.tools.get_definitions = MagicMock(return_value=[])
+
+    msg = InboundMessage(channel="telegram", sender_id="u", chat_id="1", content="hi")
+    result = await loop._process_message(msg)
+
+    assert result is not None and result.content == "Hello"
+    provider.chat.assert_not_called()
+    published = []
+    while bus.outbound_size:
+        published.append(await bus.consume_outbound())
+    deltas = [m for m in published if m.metadata.get("_stream_delta")]
+    assert [m.content for m in deltas] == ["Hel", "lo", ""]
+    assert deltas[-1].metadata["_stream_end"] is True
+    assert deltas[-1].metadata["_stream_discard"] is False
+
+
+def test_think_filter_drops_blocks_split_across_deltas() -> None:
+    from nanobot.agent.loop import _ThinkFilter
+
+    visible = _ThinkFilter()
+    chunks = ["<thi", "nk>plan ", "the reply</th", "ink>\n\nHel", "lo <", "b>world</b>"]
+
+    assert [visible.feed(c) for c in chunks] == ["", "", "", "Hel", "lo ", "<b>world</b>"]
+
+
+@pytest.mark.asyncio
+async def test_tool_call_iterations_are_marked_for_discard(tmp_path: Path) -> None:
+    from nanobot.providers.base import ToolCallRequest
+
+    provider = MagicMock()
+    provider.get_default_model.return_value = "test-model"
+    calls = iter([
+        LLMResponse(content="Checking", tool_calls=[ToolCallRequest(id="1", name="list_dir", arguments={"path": "."})]),
+        LLMResponse(content="Done"),
+    ])
+
+    async def _stream(**kwargs):
+        response = next(calls)
+        yield LLMStreamEvent(content=response.content)
+        yield LLMStreamEvent(response=response)
+
+    provider.chat_stream = _stream
+    loop = AgentLoop(bus=MessageBus(), provider=provider, workspace=tmp_path, model="test-model",
+                     channels_config=ChannelsConfig(send_deltas=True))
+    deltas = []
+
+    async def _on_delta(content: str, *, end: bool = False, discard: bool = False) -> None:
+        deltas.append((content, end, discard))
+
+    assert await loop.process_direct("hi", on_delta=_on_delta) == "Done"
+    assert deltas == [("Checking", False, False), ("", True, True), ("Done", False, False), ("", True, False)]
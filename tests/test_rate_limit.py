@@ -0,0 +1,116 @@
+"""Tests for client-side rate limiting of LLM providers."""
+
+import asyncio
+import time
+
+import httpx
+
+from nanobot.cli.commands import _make_provider
+from nanobot.config.schema import Config, RateLimitConfig
+from nanobot.providers.base import LLMProvider, LLMResponse, PromptMessages
+from nanobot.providers.ratelimit import RateLimitedProvider, RateLimiter
+from nanobot.providers.retry import RetryingProvider
+
+
+class _FakeProvider(LLMProvider):
+    def __init__(self, delay: float = 0.0, usage: dict | None = None, error: Exception | None = None):
+        super().__init__()
+        self.delay = delay
+        self.usage = usage or {}
+        self.error = error
+        self.active = 0
+        self.peak = 0
+        self.order: list[str] = []
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7) -> LLMResponse:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        self.order.append(messages[0]["content"])
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        if self.error:
+            return LLMResponse(content="Error", finish_reason="error", error=self.error)
+        return LLMResponse(content="ok", usage=dict(self.usage))
+
+    def get_default_model(self) -> str:
+        return "fake-model"
+
+
+def _msg(text: str) -> list[dict]:
+    return [{"role": "user", "content": text}]
+
+
+async def test_max_in_flight_queues_callers_in_order() -> None:
+    inner = _FakeProvider(delay=0.02)
+    provider = RateLimitedProvider(inner, {"fake-model": RateLimiter(max_in_flight=1)})
+
+    responses = await asyncio.gather(*(provider.chat(_msg(str(i))) for i in range(4)))
+
+    assert inner.peak == 1
+    assert inner.order == ["0", "1", "2", "3"]
+    # Queue wait is reported on the response, separate from model latency
+    assert responses[0].queue_wait_s < 0.01 < responses[3].queue_wait_s
+
+
+async def test_request_bucket_delays_when_empty() -> None:
+    limiter = RateLimiter(rpm=600)
+    limiter._requests = 0.0
+    provider = RateLimitedProvider(_FakeProvider(), {"fake": limiter}, provider_name="fake")
+
+    start = time.perf_counter()
+    response = await provider.chat(_msg("hi"))
+
+    assert time.perf_counter() - start >= 0.09
+    assert response.queue_wait_s >= 0.09
+    assert limiter.info()["waits"] == 1
+
+
+async def test_token_estimate_is_reconciled_with_usage() -> None:
+    limiter = RateLimiter(tpm=100_000)
+    provider = RateLimitedProvider(_FakeProvider(usage={"total_tokens": 50}), {"fake-model": limiter})
+
+    await provider.chat(_msg("hi"), max_tokens=4000)
+
+    # Debited ~4000 up front, credited back to what was actually used
+    assert 100_000 - 60 < limiter._tokens <= 100_000 - 50
+
+
+def test_prompt_messages_are_estimated_once_per_message(monkeypatch) -> None:
+    import nanobot.providers.base as base
+
+    counted = []
+    monkeypatch.setattr(base, "estimate_message_tokens", lambda m: counted.append(m) or 10)
+    provider = RateLimitedProvider(_FakeProvider(), {})
+    messages = PromptMessages([{"role": "system", "content": "s"}, {"role": "user", "content": "hi"}])
+
+    assert provider._estimate(messages, None, 100) == 120
+    messages.append({"role": "assistant", "content": "ok"})
+    assert provider._estimate(messages, None, 100) == 130
+    assert len(counted) == 3
+
+
+async def test_rate_limited_response_pauses_the_limiter() -> None:
+    request = httpx.Request("POST", "http://x")
+    error = httpx.HTTPStatusError(
+        "429", request=request, response=httpx.Response(429, headers={"Retry-After": "5"}, request=request),
+    )
+    limiter = RateLimiter(max_in_flight=2)
+    provider = RateLimitedProvider(_FakeProvider(error=error), {"fake-model": limiter})
+
+    await provider.chat(_msg("hi"))
+
+    assert limiter._delay(1, time.monotonic()) > 4
+
+
+def test_make_provider_shares_limiters_and_retries_outside() -> None:
+    config = Config()
+    config.agents.defaults.model = "deepseek/deepseek-chat"
+    config.providers.deepseek.api_key = "sk-test"
+    config.rate_limits = {"deepseek": RateLimitConfig(rpm=60, max_in_flight=4)}
+
+    first, second = _make_provider(config), _make_provider(config)
+
+    assert isinstance(first, RetryingProvider)
+    assert isinstance(first.provider, RateLimitedProvider)
+    assert first.provider.limiter_for(None) is second.provider.limiter_for(None)
+    assert first.provider.limiter_for(None).max_in_flight == 4
@@ -0,0 +1,62 @@
+"""Tests for the bounded session cache in SessionManager."""
+
+from pathlib import Path
+
+from nanobot.session.manager import SessionManager
+
+
+def _saved(manager: SessionManager, key: str, text: str = "hello") -> None:
+    session = manager.get_or_create(key)
+    session.add_message("user", text)
+    manager.save(session)
+
+
+def test_lru_evicts_oldest_session_and_counts(tmp_path: Path) -> None:
+    manager = SessionManager(tmp_path, cache_max_sessions=2)
+    for key in ("a:1", "b:1", "c:1"):
+        _saved(manager, key)
+
+    assert list(manager._cache) == ["b:1", "c:1"]
+    info = manager.cache_info()
+    assert info["evictions"] == 1
+    assert info["misses"] == 3
+
+    # Evicted sessions reload from disk
+    assert [m["content"] for m in manager.get_or_create("a:1").messages] == ["hello"]
+    assert manager.cache_info()["misses"] == 4
+    manager.get_or_create("a:1")
+    assert manager.cache_info()["hits"] == 1
+
+
+def test_pinned_and_dirty_sessions_are_not_evicted(tmp_path: Path) -> None:
+    manager = SessionManager(tmp_path, cache_max_sessions=1)
+    _saved(manager, "a:1")
+    with manager.pinned("a:1"):
+        _saved(manager, "b:1")
+        assert "a:1" in manager._cache
+    # Unpinning enforces the limit again
+    assert list(manager._cache) == ["b:1"]
+
+    dirty = manager.get_or_create("a:1")
+    dirty.add_message("user", "unsaved")
+    manager.get_or_create("c:1")
+    assert manager._cache["a:1"] is dirty
+
+    dirty.last_consolidated = 1
+    manager.save(dirty)
+    dirty.last_consolidated = 2
+    assert dirty.dirty
+
+
+def test_byte_budget_and_ttl(tmp_path: Path) -> None:
+    manager = SessionManager(tmp_path, cache_max_bytes=300)
+    _saved(manager, "a:1", "x" * 150)
+    _saved(manager, "b:1", "y" * 150)
+    assert list(manager._cache) == ["b:1"]
+    assert 150 < manager.cache_info()["bytes"] <= 300
+
+    manager = SessionManager(tmp_path, cache_ttl_s=60)
+    _saved(manager, "a:1")
+    manager._last_used["a:1"] -= 120
+    manager.get_or_create("b:1")
+    assert "a:1" not in manager._cache
@@ -0,0 +1,75 @@
+"""Tests for the JSONL session index behind list_sessions."""
+
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+from nanobot.session.manager import SessionManager
+from nanobot.session.sqlite_store import SqliteSessionStore
+from nanobot.session.store import JsonlSessionStore
+
+
+def _populate(manager: SessionManager) -> None:
+    for key in ("telegram:1", "slack:a", "telegram:2", "telegram:3"):
+        session = manager.get_or_create(key)
+        session.add_message("user", f"hi {key}")
+        manager.save(session)
+
+
+def test_list_sessions_filters_and_paginates(tmp_path: Path) -> None:
+    manager = SessionManager(tmp_path)
+    _populate(manager)
+
+    keys = [s["key"] for s in manager.list_sessions()]
+    assert keys == ["telegram:3", "telegram:2", "slack:a", "telegram:1"]
+    assert [s["key"] for s in manager.list_sessions(channel="telegram", limit=2)] == ["telegram:3", "telegram:2"]
+    assert [s["key"] for s in manager.list_sessions(channel="telegram", limit=2, offset=2)] == ["telegram:1"]
+    assert manager.list_sessions(channel="slack")[0]["message_count"] == 1
+
+    sqlite = SessionManager(tmp_path / "db", store=SqliteSessionStore(tmp_path / "db" / "sessions.db"))
+    _populate(sqlite)
+    assert [s["key"] for s in sqlite.list_sessions(channel="telegram", limit=2, offset=1)] == ["telegram:2", "telegram:1"]
+    sqlite.close()
+
+
+def test_index_is_reused_by_new_store_without_reading_sessions(tmp_path: Path) -> None:
+    _populate(SessionManager(tmp_path))
+
+    store = JsonlSessionStore(tmp_path / "sessions")
+    with patch.object(store, "_scan_file", side_effect=AssertionError("session file read")):
+        assert len(store.list_sessions()) == 4
+
+
+def test_index_rebuilds_missing_and_stale_entries(tmp_path: Path) -> None:
+    manager = SessionManager(tmp_path)
+    _populate(manager)
+    sessions_dir = tmp_path / "sessions"
+
+    (sessions_dir / JsonlSessionStore.INDEX_FILE).unlink()
+    assert len(JsonlSessionStore(sessions_dir).list_sessions()) == 4
+
+    # A file changed by something other than this store is re-read
+    path = sessions_dir / "slack_a.jsonl"
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"role": "assistant", "content": "later"}) + "\n")
+        f.write(json.dumps({"_type": "metadata", "key": "slack:a", "updated_at": "2999-01-01T00:00:00",
+                            "message_count": 2}) + "\n")
+    (sessions_dir / "telegram_1.jsonl").unlink()
+
+    listed = JsonlSessionStore(sessions_dir).list_sessions()
+    assert [s["key"] for s in listed][0] == "slack:a"
+    assert listed[0]["message_count"] == 2
+    assert "telegram:1" not in {s["key"] for s in listed}
+
+
+def test_index_picks_up_saves_from_other_processes(tmp_path: Path) -> None:
+    first = SessionManager(tmp_path)
+    _populate(first)
+    assert len(first.list_sessions()) == 4
+
+    other = SessionManager(tmp_path)
+    session = other.get_or_create("discord:9")
+    session.add_message("user", "hello")
+    other.save(session)
+
+    assert first.list_sessions()[0]["key"] == "discord:9"
@@ -0,0 +1,62 @@
+"""Tests for compact message records and the cached history view."""
+
+import json
+from pathlib import Path
+
+from nanobot.session.manager import MessageRecord, Session, SessionManager, dump_message
+
+
+def test_message_record_round_trips_and_compares_to_dict() -> None:
+    data = {
+        "role": "assistant",
+        "content": None,
+        "tool_calls": [{"id": "c1", "type": "function", "function": {"name": "x", "arguments": "{}"}}],
+        "timestamp": "2026-01-02T03:04:05.123456",
+        "tools_used": ["x"],
+    }
+    record = MessageRecord(data)
+
+    assert record == data
+    assert record.to_dict() == data
+    assert "content" in record and "name" not in record
+    assert record.get("name") is None
+    assert json.loads(dump_message(record)) == data
+    assert MessageRecord.from_dict(record) is record
+
+    # Timestamps that do not round-trip through datetime are kept verbatim
+    for ts in ("2026-01-02T03:04:05", "2026-01-02T03:04:05+00:00", "yesterday"):
+        assert MessageRecord({"role": "user", "timestamp": ts})["timestamp"] == ts
+
+
+def test_history_view_is_extended_and_trimmed() -> None:
+    session = Session(key="cli:direct")
+    for i in range(4):
+        session.add_message("user" if i % 2 == 0 else "assistant", f"m{i}")
+    first = session.get_history()
+    assert [m["content"] for m in first] == ["m0", "m1", "m2", "m3"]
+
+    session.add_message("user", "m4")
+    second = session.get_history()
+    assert second[0] is first[0]  # Entries are built once
+    assert [m["content"] for m in second] == ["m0", "m1", "m2", "m3", "m4"]
+
+    session.last_consolidated = 3
+    assert [m["content"] for m in session.get_history()] == ["m4"]
+    assert [m["content"] for m in session.get_history(max_messages=2)] == ["m4"]
+
+    session.clear()
+    session.add_message("user", "fresh")
+    assert [m["content"] for m in session.get_history()] == ["fresh"]
+
+
+def test_loaded_sessions_hold_records(tmp_path: Path) -> None:
+    manager = SessionManager(tmp_path)
+    session = manager.get_or_create("telegram:1")
+    session.add_message("user", "hello", media=["a.png"])
+    manager.save(session)
+    manager.invalidate(session.key)
+
+    loaded = manager.get_or_create("telegram:1")
+    assert isinstance(loaded.messages[0], MessageRecord)
+    assert loaded.messages[0]["media"] == ["a.png"]
+    assert loaded.messages[0] == session.messages[0]
@@ -0,0 +1,208 @@
+"""Tests for session persistence: append-only saves, compaction, lazy loading and archival."""
+
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+from typer.testing import CliRunner
+
+from nanobot.cli.commands import app
+from nanobot.config.schema import Config
+from nanobot.session.manager import LazyMessages, SessionManager
+from nanobot.session.store import JsonlSessionStore
+
+
+def _lines(path: Path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+
+def test_save_appends_only_new_messages(tmp_path: Path) -> None:
+    manager = SessionManager(tmp_path)
+    session = manager.get_or_create("telegram:1")
+    session.add_message("user", "hello")
+    manager.save(session)
+    path = manager.store._get_session_path(session.key)
+    assert len(_lines(path)) == 3  # metadata + message + trailing metadata
+
+    session.add_message("assistant", "hi")
+    session.last_consolidated = 1
+    manager.save(session)
+
+    records = _lines(path)
+    assert [r.get("content") for r in records if r.get("_type") != "metadata"] == ["hello", "hi"]
+    assert records[-1]["_type"] == "metadata"
+    assert records[-1]["last_consolidated"] == 1
+
+    manager.invalidate(session.key)
+    loaded = manager.get_or_create(session.key)
+    assert [m["content"] for m in loaded.messages] == ["hello", "hi"]
+    assert loaded.last_consolidated == 1
+
+
+def test_compaction_and_clear_rewrite_file(tmp_path: Path) -> None:
+    manager = SessionManager(tmp_path, store=JsonlSessionStore(tmp_path / "sessions", compact_every=3))
+    session = manager.get_or_create("cli:direct")
+    path = manager.store._get_session_path(session.key)
+    for i in range(5):
+        session.add_message("user", f"msg{i}")
+        manager.save(session)
+
+    # Saves: rewrite, append, append, append, rewrite (compaction)
+    records = _lines(path)
+    assert [i for i, r in enumerate(records) if r.get("_type") == "metadata"] == [0, 6]
+    assert len(records) == 7
+
+    session.clear()
+    session.add_message("user", "fresh")
+    manager.save(session)
+    records = _lines(path)
+    assert [r.get("content") for r in records[1:-1]] == ["fresh"]
+
+
+def test_rewrite_mode_when_append_disabled(tmp_path: Path) -> None:
+    manager = SessionManager(tmp_path, store=JsonlSessionStore(tmp_path / "sessions", append_only=False))
+    session = manager.get_or_create("cli:direct")
+    for i in range(3):
+        session.add_message("user", f"msg{i}")
+        manager.save(session)
+
+    records = _lines(manager.store._get_session_path(session.key))
+    assert records[0]["_type"] == records[-1]["_type"] == "metadata"
+    assert len(records) == 5
+
+
+def test_list_sessions_reports_appended_updated_at(tmp_path: Path) -> None:
+    manager = SessionManager(tmp_path)
+    session = manager.get_or_create("telegram:1")
+    session.add_message("user", "hello")
+    manager.save(session)
+    first = manager.list_sessions()[0]["updated_at"]
+
+    session.add_message("assistant", "hi")
+    manager.save(session)
+    listed = manager.list_sessions()[0]
+    assert listed["key"] == "telegram:1"
+    assert listed["updated_at"] == session.updated_at.isoformat()
+    assert listed["updated_at"] >= first
+
+
+def _seeded(tmp_path: Path, count: int, consolidated: int) -> SessionManager:
+    manager = SessionManager(tmp_path)
+    session = manager.get_or_create("telegram:1")
+    for i in range(count):
+        session.add_message("user" if i % 2 == 0 else "assistant", f"m{i}")
+        manager.save(session)
+    session.last_consolidated = consolidated
+    manager.save(session)
+    manager.invalidate(session.key)
+    return manager
+
+
+def test_lazy_load_parses_only_unconsolidated_tail(tmp_path: Path) -> None:
+    manager = _seeded(tmp_path, count=10, consolidated=6)
+    session = manager.get_or_create("telegram:1")
+
+    assert isinstance(session.messages, LazyMessages)
+    assert not session.messages.loaded
+    assert len(session.messages) == 10
+    assert [m["content"] for m in session.get_history()] == ["m6", "m7", "m8", "m9"]
+    assert not session.messages.loaded
+
+    # Appending and saving keeps the prefix on disk
+    session.add_message("user", "m10")
+    manager.save(session)
+    assert not session.messages.loaded
+    manager.invalidate(session.key)
+    assert len(manager.get_or_create("telegram:1").messages) == 11
+
+
+def test_lazy_messages_page_in_on_demand(tmp_path: Path) -> None:
+    manager = _seeded(tmp_path, count=6, consolidated=4)
+    session = manager.get_or_create("telegram:1")
+
+    # Iteration streams the prefix without keeping it
+    assert [m["content"] for m in session.messages] == [f"m{i}" for i in range(6)]
+    assert not session.messages.loaded
+
+    assert session.messages[1]["content"] == "m1"
+    assert session.messages.loaded
+    assert session.messages == [m for m in session.messages]
+
+
+def test_lazy_load_falls_back_for_legacy_files(tmp_path: Path) -> None:
+    manager = SessionManager(tmp_path)
+    path = manager.store._get_session_path("cli:old")
+    path.write_text(
+        json.dumps({"_type": "metadata", "key": "cli:old", "created_at": "2025-01-01T00:00:00",
+                    "metadata": {}, "last_consolidated": 1}) + "\n"
+        + json.dumps({"role": "user", "content": "a"}) + "\n"
+        + json.dumps({"role": "assistant", "content": "b"}) + "\n",
+        encoding="utf-8",
+    )
+
+    session = manager.get_or_create("cli:old")
+    assert isinstance(session.messages, list)
+    assert session.last_consolidated == 1
+    assert len(session.messages) == 2
+
+
+def test_archive_moves_consolidated_prefix_to_gzip_segments(tmp_path: Path) -> None:
+    manager = _seeded(tmp_path, count=10, consolidated=6)
+    store = manager.store
+    path = store._get_session_path("telegram:1")
+
+    assert store.archive("telegram:1", 6) == 6
+    assert [r.get("content") for r in _lines(path) if r.get("_type") != "metadata"] == ["m6", "m7", "m8", "m9"]
+    assert list((tmp_path / "sessions" / "archive" / "telegram_1").glob("*.jsonl.gz"))
+
+    # Fresh manager: tail from the active file, prefix transparently from the archive
+    manager = SessionManager(tmp_path)
+    session = manager.get_or_create("telegram:1")
+    assert [m["content"] for m in session.get_history()] == ["m6", "m7", "m8", "m9"]
+    assert [m["content"] for m in session.messages] == [f"m{i}" for i in range(10)]
+
+    # Appends and compaction keep the archive out of the active file
+    session.add_message("user", "m10")
+    manager.save(session)
+    session._saved_appends = manager.store.compact_every
+    session.add_message("assistant", "m11")
+    manager.save(session)
+    assert len([r for r in _lines(path) if r.get("_type") != "metadata"]) == 6
+    manager.invalidate("telegram:1")
+    assert len(manager.get_or_create("telegram:1").messages) == 12
+
+    full = SessionManager(tmp_path, store=JsonlSessionStore(tmp_path / "sessions", lazy_load=False))
+    assert [m["content"] for m in full.get_or_create("telegram:1").messages][:2] == ["m0", "m1"]
+    assert manager.list_sessions()[0]["message_count"] == 12
+
+
+def test_clear_drops_archive(tmp_path: Path) -> None:
+    manager = _seeded(tmp_path, count=4, consolidated=4)
+    manager.store.archive("telegram:1", 4)
+    manager = SessionManager(tmp_path)
+    session = manager.get_or_create("telegram:1")
+    session.clear()
+    manager.save(session)
+
+    assert not (tmp_path / "sessions" / "archive" / "telegram_1").exists()
+    manager.invalidate("telegram:1")
+    assert manager.get_or_create("telegram:1").messages == []
+
+
+def test_sessions_compact_command_archives_idle_and_consolidated(tmp_path: Path) -> None:
+    manager = _seeded(tmp_path, count=6, consolidated=2)
+    idle = manager.get_or_create("slack:old")
+    idle.add_message("user", "long ago")
+    idle.updated_at = idle.updated_at.replace(year=2000)
+    manager.save(idle)
+
+    config = Config()
+    config.agents.defaults.workspace = str(tmp_path)
+    with patch("nanobot.config.loader.load_config", return_value=config):
+        result = CliRunner().invoke(app, ["sessions", "compact"])
+
+    assert result.exit_code == 0, result.output
+    assert "Archived 3 message(s) from 2 session(s)" in result.output
+    manager = SessionManager(tmp_path)
+    assert [m["content"] for m in manager.get_or_create("slack:old").get_history()] == ["long ago"]
+    assert len(manager.get_or_create("telegram:1").messages) == 6
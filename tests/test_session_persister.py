@@ -0,0 +1,148 @@
+"""Tests for write-behind session persistence."""
+
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from nanobot.session.manager import LazyMessages, MessagesSnapshot, SessionManager
+from nanobot.session.persister import SessionPersister
+from nanobot.session.store import JsonlSessionStore, first_resident
+
+
+class _GatedStore(JsonlSessionStore):
+    """Store whose writes block until released, recording each save."""
+
+    def __init__(self, sessions_dir: Path):
+        super().__init__(sessions_dir)
+        self.gate = threading.Event()
+        self.saved: list[int] = []
+        self.synced: list[set[str]] = []
+
+    def save(self, session) -> None:
+        self.gate.wait(5)
+        self.saved.append(len(session.messages))
+        super().save(session)
+
+    def sync(self, keys) -> None:
+        self.synced.append(set(keys))
+        super().sync(keys)
+
+
+def test_saves_are_coalesced_and_flushed_on_close(tmp_path: Path) -> None:
+    store = _GatedStore(tmp_path / "sessions")
+    manager = SessionManager(tmp_path, store=store, write_behind=True)
+    session = manager.get_or_create("telegram:1")
+
+    session.add_message("user", "m0")
+    manager.save(session)  # Picked up by the writer, blocked on the gate
+    for i in range(1, 4):
+        session.add_message("user", f"m{i}")
+        manager.save(session)  # Coalesced into one pending write
+    assert store.saved == []
+
+    store.gate.set()
+    manager.close()
+    assert store.saved[-1] == 4
+    assert len(store.saved) <= 2
+
+    reloaded = SessionManager(tmp_path).get_or_create("telegram:1")
+    assert [m["content"] for m in reloaded.messages] == ["m0", "m1", "m2", "m3"]
+
+
+def test_pending_sessions_are_not_evicted_or_reloaded_stale(tmp_path: Path) -> None:
+    store = _GatedStore(tmp_path / "sessions")
+    manager = SessionManager(tmp_path, store=store, write_behind=True, cache_max_sessions=1)
+    session = manager.get_or_create("telegram:1")
+    session.add_message("user", "hello")
+    manager.save(session)
+
+    manager.get_or_create("telegram:2")
+    assert "telegram:1" in manager._cache
+
+    manager.invalidate("telegram:1")
+    # The queued write has not landed: the live session is served, not the empty file
+    assert manager.get_or_create("telegram:1") is session
+    store.gate.set()
+    manager.close()
+
+
+async def test_loop_stays_responsive_while_a_write_is_pending(tmp_path: Path) -> None:
+    store = _GatedStore(tmp_path / "sessions")
+    manager = SessionManager(tmp_path, store=store, write_behind=True)
+    session = manager.get_or_create("telegram:1")
+    session.add_message("user", "hello")
+    manager.save(session)  # Blocked on the gate for up to 5s
+    manager.invalidate("telegram:1")  # As /new does after clearing
+
+    ticks = 0
+
+    async def _tick() -> None:
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    ticker = asyncio.create_task(_tick())
+    await asyncio.sleep(0.05)
+    start = time.monotonic()
+    reloaded = manager.get_or_create("telegram:1")
+    assert time.monotonic() - start < 0.5
+    before = ticks
+    await asyncio.sleep(0.05)
+    assert ticks > before
+    ticker.cancel()
+
+    assert reloaded is session and store.saved == []
+    store.gate.set()
+    manager.close()
+    assert store.saved == [1]
+
+
+def test_fsync_always_syncs_each_write(tmp_path: Path) -> None:
+    store = _GatedStore(tmp_path / "sessions")
+    store.gate.set()
+    manager = SessionManager(tmp_path, store=store, write_behind=True, fsync="always")
+    session = manager.get_or_create("cli:direct")
+    session.add_message("user", "hi")
+    manager.save(session)
+    manager.flush()
+    manager.close()
+    assert store.synced == [{"cli:direct"}]
+
+    with pytest.raises(ValueError):
+        SessionPersister(store, fsync="sometimes")
+
+
+def test_snapshot_copies_only_the_unsaved_tail() -> None:
+    live = [{"content": f"m{i}"} for i in range(4)]
+    snapshot = MessagesSnapshot(live, unsaved_from=3)
+
+    live.append({"content": "later"})
+
+    assert len(snapshot) == 4
+    assert snapshot._tail == [live[3]]
+    assert [m["content"] for m in snapshot[2:]] == ["m2", "m3"]
+    assert snapshot[-1] is live[3] and snapshot[0] is live[0]
+
+
+def test_snapshot_of_lazy_messages_keeps_the_prefix_on_disk() -> None:
+    reads: list[int] = []
+
+    def _loader():
+        for i in range(2):
+            reads.append(i)
+            yield {"content": f"disk{i}"}
+
+    live = LazyMessages([{"content": "m2"}], offset=2, loader=_loader)
+    snapshot = MessagesSnapshot(live, unsaved_from=3)
+    live.append({"content": "m3"})
+    live[0]  # Paging in the live list does not disturb the snapshot
+
+    assert first_resident(snapshot) == 2
+    assert snapshot[2:] == [{"content": "m2"}]
+    reads.clear()
+    assert [m["content"] for m in snapshot] == ["disk0", "disk1", "m2"]
+    assert reads == [0, 1]
@@ -0,0 +1,82 @@
+"""Tests for the indexed SkillsLoader."""
+
+import os
+import shutil
+from pathlib import Path
+
+import nanobot.agent.skills as skills_module
+from nanobot.agent.skills import SkillsLoader
+
+
+def _write_skill(root: Path, name: str, frontmatter: str, body: str = "Body") -> Path:
+    skill_dir = root / name
+    skill_dir.mkdir(parents=True, exist_ok=True)
+    path = skill_dir / "SKILL.md"
+    path.write_text(f"---\n{frontmatter}\n---\n{body}", encoding="utf-8")
+    return path
+
+
+def _make_loader(tmp_path: Path) -> tuple[SkillsLoader, Path, Path]:
+    workspace = tmp_path / "workspace"
+    builtin = tmp_path / "builtin"
+    builtin.mkdir(parents=True)
+    (workspace / "skills").mkdir(parents=True)
+    return SkillsLoader(workspace, builtin_skills_dir=builtin), workspace / "skills", builtin
+
+
+def test_skill_files_are_parsed_once(tmp_path, monkeypatch) -> None:
+    loader, ws_skills, builtin = _make_loader(tmp_path)
+    _write_skill(ws_skills, "alpha", 'description: Alpha skill\nmetadata: {"nanobot": {"always": true}}')
+    _write_skill(builtin, "beta", "description: Beta skill")
+
+    reads: list[Path] = []
+    original = Path.read_text
+
+    def _counting_read(self, *args, **kwargs):
+        reads.append(self)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "read_text", _counting_read)
+
+    summary = loader.build_skills_summary()
+    always = loader.get_always_skills()
+    context = loader.load_skills_for_context(always)
+    loader.build_skills_summary()
+
+    assert "Alpha skill" in summary and "Beta skill" in summary
+    assert always == ["alpha"]
+    assert context == "### Skill: alpha\n\nBody"
+    assert len(reads) == 2
+
+
+def test_workspace_skill_overrides_builtin_and_changes_are_picked_up(tmp_path) -> None:
+    loader, ws_skills, builtin = _make_loader(tmp_path)
+    _write_skill(builtin, "shared", "description: Builtin version")
+    assert loader.get_skill_metadata("shared")["description"] == "Builtin version"
+
+    path = _write_skill(ws_skills, "shared", "description: Workspace version")
+    skills = loader.list_skills(filter_unavailable=False)
+    assert skills == [{"name": "shared", "path": str(path), "source": "workspace"}]
+
+    path.write_text("---\ndescription: Edited version, longer\n---\nNew body", encoding="utf-8")
+    assert loader.get_skill_metadata("shared")["description"] == "Edited version, longer"
+    assert loader.load_skill("missing") is None
+
+
+def test_requirement_checks_are_memoized(tmp_path, monkeypatch) -> None:
+    loader, ws_skills, _ = _make_loader(tmp_path)
+    _write_skill(ws_skills, "needs", 'metadata: {"nanobot": {"requires": {"bins": ["nb-test-bin"], "env": ["NB_TEST_ENV"]}}}')
+
+    calls: list[str] = []
+    monkeypatch.setattr(shutil, "which", lambda name: calls.append(name) or None)
+    monkeypatch.setenv("NB_TEST_ENV", "1")
+
+    assert loader.list_skills() == []
+    assert "CLI: nb-test-bin" in loader.build_skills_summary()
+    assert calls == ["nb-test-bin"]
+
+    monkeypatch.setattr(skills_module, "REQUIREMENT_TTL_S", 0.0)
+    loader._requirement_cache.clear()
+    monkeypatch.setattr(shutil, "which", lambda name: "/usr/bin/" + name)
+    assert [s["name"] for s in loader.list_skills()] == ["needs"]
+    assert os.environ["NB_TEST_ENV"] == "1"
@@ -0,0 +1,69 @@
+"""Tests for the SQLite session store and the JSONL migration command."""
+
+from pathlib import Path
+from unittest.mock import patch
+
+from typer.testing import CliRunner
+
+from nanobot.cli.commands import app
+from nanobot.config.schema import Config
+from nanobot.session.manager import LazyMessages, SessionManager
+from nanobot.session.sqlite_store import SqliteSessionStore
+
+runner = CliRunner()
+
+
+def _manager(tmp_path: Path) -> SessionManager:
+    return SessionManager(tmp_path, store=SqliteSessionStore(tmp_path / "sessions" / "sessions.db"))
+
+
+def test_sqlite_store_round_trip_and_tail_load(tmp_path: Path) -> None:
+    manager = _manager(tmp_path)
+    session = manager.get_or_create("telegram:1")
+    for i in range(6):
+        session.add_message("user", f"m{i}")
+        manager.save(session)
+    session.last_consolidated = 4
+    manager.save(session)
+    manager.close()
+
+    manager = _manager(tmp_path)
+    loaded = manager.get_or_create("telegram:1")
+    assert isinstance(loaded.messages, LazyMessages)
+    assert loaded.messages.resident == 2
+    assert [m["content"] for m in loaded.get_history()] == ["m4", "m5"]
+    assert [m["content"] for m in loaded.messages] == [f"m{i}" for i in range(6)]
+    assert loaded.updated_at == session.updated_at
+
+    loaded.clear()
+    loaded.add_message("user", "fresh")
+    manager.save(loaded)
+    manager.invalidate("telegram:1")
+    assert [m["content"] for m in manager.get_or_create("telegram:1").messages] == ["fresh"]
+
+    assert [s["key"] for s in manager.list_sessions()] == ["telegram:1"]
+    manager.close()
+
+
+def test_sessions_migrate_copies_jsonl_sessions(tmp_path: Path) -> None:
+    source = SessionManager(tmp_path)
+    for key in ("telegram:1", "slack:2"):
+        session = source.get_or_create(key)
+        session.add_message("user", f"hi from {key}")
+        session.add_message("assistant", "hello")
+        session.last_consolidated = 1
+        source.save(session)
+
+    config = Config()
+    config.agents.defaults.workspace = str(tmp_path)
+    with patch("nanobot.config.loader.load_config", return_value=config):
+        result = runner.invoke(app, ["sessions", "migrate"])
+
+    assert result.exit_code == 0, result.output
+    assert "Migrated 2 session(s)" in result.output
+
+    manager = SessionManager(tmp_path, store=SqliteSessionStore(tmp_path / "sessions" / "sessions.db", lazy_load=False))
+    migrated = manager.get_or_create("slack:2")
+    assert [m["content"] for m in migrated.messages] == ["hi from slack:2", "hello"]
+    assert migrated.last_consolidated == 1
+    manager.close()
@@ -125,6 +125,84 @@ class TestDispatch:
         await asyncio.gather(t1, t2)
         assert order == ["start-a", "end-a", "start-b", "end-b"]
 
+    @pytest.mark.asyncio
+    async def test_different_sessions_run_concurrently(self):
+        from nanobot.bus.events import InboundMessage, OutboundMessage
+
+        loop, bus = _make_loop()
+        order = []
+
+        async def mock_process(m, **kwargs):
+            order.append(f"start-{m.content}")
+            await asyncio.sleep(0.05)
+            order.append(f"end-{m.content}")
+            return OutboundMessage(channel="test", chat_id=m.chat_id, content=m.content)
+
+        loop._process_message = mock_process
+        msg1 = InboundMessage(channel="test", sender_id="u1", chat_id="c1", content="a")
+        msg2 = InboundMessage(channel="test", sender_id="u2", chat_id="c2", content="b")
+
+        await asyncio.gather(loop._dispatch(msg1), loop._dispatch(msg2))
+        assert order[:2] == ["start-a", "start-b"]
+        assert not loop._session_locks and not loop._session_waiters
+
+    @pytest.mark.asyncio
+    async def test_global_turn_limit(self):
+        from nanobot.agent.loop import AgentLoop
+        from nanobot.bus.events import InboundMessage, OutboundMessage
+        from nanobot.bus.queue import MessageBus
+
+        provider = MagicMock()
+        provider.get_default_model.return_value = "test-model"
+        with patch("nanobot.agent.loop.ContextBuilder"), \
+             patch("nanobot.agent.loop.SessionManager"), \
+             patch("nanobot.agent.loop.SubagentManager"):
+            loop = AgentLoop(bus=MessageBus(), provider=provider, workspace=MagicMock(),
+                             max_concurrent_turns=2)
+        running = peak = 0
+
+        async def mock_process(m, **kwargs):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+            return OutboundMessage(channel="test", chat_id=m.chat_id, content=m.content)
+
+        loop._process_message = mock_process
+        msgs = [InboundMessage(channel="test", sender_id="u", chat_id=f"c{i}", content=str(i))
+                for i in range(5)]
+        await asyncio.gather(*(loop._dispatch(m) for m in msgs))
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_direct_turn_serializes_with_bus_turn(self):
+        from nanobot.bus.events import InboundMessage, OutboundMessage
+
+        loop, bus = _make_loop()
+        loop._connect_mcp = AsyncMock()
+        order = []
+
+        async def mock_process(m, **kwargs):
+            order.append(f"start-{m.content}")
+            await asyncio.sleep(0.05)
+            order.append(f"end-{m.content}")
+            return OutboundMessage(channel="cli", chat_id="direct", content=m.content)
+
+        loop._process_message = mock_process
+        msg = InboundMessage(channel="cli", sender_id="u1", chat_id="direct", content="bus")
+
+        await asyncio.gather(loop._dispatch(msg), loop.process_direct("cron", session_key="cli:direct"))
+        assert order == ["start-bus", "end-bus", "start-cron", "end-cron"]
+
+    @pytest.mark.asyncio
+    async def test_system_message_serializes_with_origin_session(self):
+        from nanobot.agent.loop import AgentLoop
+        from nanobot.bus.events import InboundMessage
+
+        msg = InboundMessage(channel="system", sender_id="subagent", chat_id="test:c1", content="x")
+        assert AgentLoop._turn_key(msg) == "test:c1"
+
 
 class TestSubagentCancellation:
     @pytest.mark.asyncio
@@ -1,3 +1,4 @@
+import asyncio
 from typing import Any
 
 from nanobot.agent.tools.base import Tool
@@ -86,3 +87,72 @@ async def test_registry_returns_validation_error() -> None:
     reg.register(SampleTool())
     result = await reg.execute("sample", {"query": "hi"})
     assert "Invalid parameters" in result
+
+
+class _SleepTool(Tool):
+    def __init__(self, name: str, read_only: bool, log: list[str]):
+        self._name, self._read_only, self._log = name, read_only, log
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def description(self) -> str:
+        return "sleep tool"
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {"type": "object", "properties": {"id": {"type": "string"}}}
+
+    @property
+    def read_only(self) -> bool:
+        return self._read_only
+
+    async def execute(self, id: str = "", **kwargs: Any) -> str:
+        self._log.append(f"start-{id}")
+        await asyncio.sleep(0.01)
+        self._log.append(f"end-{id}")
+        return id
+
+
+async def test_execute_batch_parallel_reads_serial_writes() -> None:
+    log: list[str] = []
+    reg = ToolRegistry()
+    reg.register(_SleepTool("read", True, log))
+    reg.register(_SleepTool("write", False, log))
+
+    results = await reg.execute_batch([
+        ("read", {"id": "r1"}), ("read", {"id": "r2"}),
+        ("write", {"id": "w"}),
+        ("read", {"id": "r3"}), ("missing", {}),
+    ])
+
+    assert results[:4] == ["r1", "r2", "w", "r3"]
+    assert "not found" in results[4]
+    assert log[:2] == ["start-r1", "start-r2"]
+    assert log[4:] == ["start-w", "end-w", "start-r3", "end-r3"]
+
+
+async def test_filesystem_reads_run_off_the_event_loop(tmp_path, monkeypatch) -> None:
+    import threading
+
+    from nanobot.agent.tools.filesystem import ListDirTool, ReadFileTool
+
+    (tmp_path / "a.txt").write_text("hello", encoding="utf-8")
+    threads: set[int] = set()
+    original = ReadFileTool._read
+
+    def _read(self, path: str) -> str:
+        threads.add(threading.get_ident())
+        return original(self, path)
+
+    monkeypatch.setattr(ReadFileTool, "_read", _read)
+    reg = ToolRegistry()
+    reg.register(ReadFileTool(workspace=tmp_path))
+    reg.register(ListDirTool(workspace=tmp_path))
+
+    results = await reg.execute_batch([("read_file", {"path": "a.txt"}), ("list_dir", {"path": "."})])
+
+    assert results == ["hello", "📄 a.txt"]
+    assert threads and threading.get_ident() not in threads